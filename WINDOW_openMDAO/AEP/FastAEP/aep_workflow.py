@@ -1,4 +1,57 @@
 from farm_energy.wake_model_mean_new.aero_power_ct_models.aero_models import AeroLookup
+from farm_energy.wake_model_mean_new.wake_cone import calibrate_cone
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
+from itertools import count
+import numpy as np
+
+# Models of the workflow that owns a process pool, set once in each worker.
+worker_models = {}
+# Incremental states of the directions evaluated in this process, by workflow and direction. They stay where they are
+# computed instead of being sent back and forth with every run.
+resident_states = {}
+workflow_keys = count()
+
+
+def set_worker_models(models):
+    worker_models.update(models)
+
+
+def one_direction(task):
+    # Energy, powers and maximum turbulence of one wind direction. The state for the next incremental run is kept in
+    # resident_states. Process workers have their own wake cache, which the parent cannot reset, so they reset it
+    # themselves with reset_wake_cache.
+    from farm_energy.wake_model_mean_new.wake_1angle import energy_one_angle, energy_one_angle_incremental
+    from farm_energy.wake_model_mean_new.wake_1angle_turbulence import max_turbulence_one_angle
+    from farm_energy.wake_model_mean_new.downstream_effects import JensenEffects as Jensen
+    from farm_energy.wake_model_mean_new.memoize import wake_cache
+    models, workflow, turbine_coordinates, wind_speeds, wind_speeds_probabilities, wind_direction, freestream_turbulence, incremental, moved, reset_wake_cache = task
+    if models is None:
+        models = worker_models
+    if incremental:
+        # Without moved, the stored state is for another layout, and the direction is evaluated from scratch.
+        key = (workflow, wind_direction)
+        previous = resident_states.get(key) if moved is not None else None
+        energy, powers, deficits, state = energy_one_angle_incremental(previous, moved, turbine_coordinates, wind_speeds,
+                                                                       wind_speeds_probabilities, wind_direction,
+                                                                       freestream_turbulence, models['wake_mean_model'],
+                                                                       models['power_model'], models['table_power'],
+                                                                       models['thrust_coefficient_model'],
+                                                                       models['ct_table'], models['wake_merging_model'],
+                                                                       models['cone'])
+        resident_states[key] = state
+    else:
+        energy, powers, deficits = energy_one_angle(turbine_coordinates, wind_speeds, wind_speeds_probabilities,
+                                                    wind_direction, freestream_turbulence, models['wake_mean_model'],
+                                                    models['power_model'], models['table_power'],
+                                                    models['thrust_coefficient_model'], models['ct_table'],
+                                                    models['wake_merging_model'], models['cone'])
+    turbulences = max_turbulence_one_angle(deficits, turbine_coordinates, wind_speeds, wind_direction,
+                                           freestream_turbulence, Jensen, models['thrust_coefficient_model'],
+                                           models['ct_table'], models['wake_turbulence_model'])
+    if reset_wake_cache:
+        wake_cache.reset()
+    return energy, powers, turbulences
 
 
 class Workflow:
@@ -6,6 +59,27 @@ class Workflow:
                  wake_mean_model, wake_merging_model, power_model, power_lookup_file):
 
         self.print_output = False
+        # Keep the in-wake checks of one layout for the next one. Worth it when consecutive layouts differ in only a few
+        # turbines, as in an optimisation. The cache is bounded either way.
+        self.keep_wake_cache = False
+        # Reuse the deficits of the previous layout for the turbines that did not move, see energy_one_angle_incremental.
+        self.incremental = False
+        self.previous_layout = None
+        self.key = next(workflow_keys)
+        # How directions are evaluated: 'serial', or in a pool of workers, 'thread' or 'process'. The pool is created
+        # on the first run and kept for the next ones, until close(), which is also called at the end of a with block.
+        self.executor = 'serial'
+        self.workers = None
+        self.pool = None
+        # Executor, number of workers and models of the last run, which the pool and the incremental states were built
+        # with. Process workers only get the models when the pool is created.
+        self.run_settings = None
+        # Leave out the pairs of turbines where the wake deficit cannot exceed this threshold, see wake_cone. None
+        # checks every pair. The cone is calibrated again whenever the threshold, the wake model, the Ct curve or the
+        # wind conditions change.
+        self.wake_threshold = None
+        self.cone = None
+        self.cone_key = None
 
         self.inflow_model = inflow_model
         self.wake_turbulence_model = wake_turbulence_model
@@ -34,16 +108,12 @@ class Workflow:
 
         self.table_power = AeroLookup(self.px, self.py)
         self.ct_table = AeroLookup(self.ctx, self.cty)
+        self.wind_directions = None
 
-    def connect(self, turbine_coordinates):
-        layout = []
-        for t in turbine_coordinates:
-            if t[0] >= 0.0 and t[1] >= 0.0:
-                layout.append([t[0], t[1]])
-        self.number_turbines = len(layout)
-        from farm_energy.wake_model_mean_new.wake_1angle import energy_one_angle
-        from farm_energy.wake_model_mean_new.wake_1angle_turbulence import max_turbulence_one_angle
-        from farm_energy.wake_model_mean_new.downstream_effects import JensenEffects as Jensen
+    def prepare_wind_conditions(self):
+        # Directions, speeds and their probabilities depend on the windrose settings only, not on the layout, so they
+        # are computed on the first run and reused afterwards. Call again after changing the windrose settings. The
+        # incremental states are for the previous wind conditions, so they are dropped.
         from WINDOW_openMDAO.input_params import cutin_wind_speed, cutout_wind_speed
 
         if self.print_output is True: print("=== PREPARING WIND CONDITIONS ===")
@@ -54,6 +124,85 @@ class Workflow:
         self.windrose.cutout = cutout_wind_speed
         self.wind_speeds, self.wind_speeds_probabilities = self.windrose.speed_probabilities()
         self.freestream_turbulence = [0.11 for _ in range(len(self.wind_speeds[0]))]
+        self.cone_key = None
+        self.forget_states()
+
+    def models(self):
+        # Everything a direction needs apart from the layout and wind conditions.
+        return {'wake_mean_model': self.wake_mean_model, 'power_model': self.power_model, 'table_power': self.table_power,
+                'thrust_coefficient_model': self.thrust_coefficient_model, 'ct_table': self.ct_table,
+                'wake_merging_model': self.wake_merging_model, 'wake_turbulence_model': self.wake_turbulence_model,
+                'cone': self.cone}
+
+    def map(self, function, tasks):
+        if self.executor == 'serial':
+            return map(function, tasks)
+        if self.pool is None:
+            if self.executor == 'thread':
+                self.pool = ThreadPool(self.workers)
+            elif self.executor == 'process':
+                # One single-process pool per worker, so that each direction always runs in the same worker and finds
+                # its incremental state there.
+                self.pool = [Pool(1, initializer=set_worker_models, initargs=(self.models(),))
+                             for _ in range(self.workers or cpu_count())]
+            else:
+                raise ValueError("executor should be 'serial', 'thread' or 'process'.")
+        if self.executor == 'process':
+            results = [self.pool[i % len(self.pool)].apply_async(function, (task,)) for i, task in enumerate(tasks)]
+            return [result.get() for result in results]
+        # One direction per task, as their cost varies with how many turbines are in each other's wakes.
+        return self.pool.map(function, tasks, 1)
+
+    def settings_changed(self):
+        # Whether the executor, the number of workers or any of the models changed since the last run.
+        executor, workers, models = self.run_settings
+        current = self.models()
+        return executor != self.executor or workers != self.workers or any(current[name] is not models[name] for name in current)
+
+    def forget_states(self):
+        # Without a previous layout, the next run evaluates every direction from scratch, including in the workers,
+        # which still hold their states.
+        for key in [key for key in resident_states if key[0] == self.key]:
+            del resident_states[key]
+        self.previous_layout = None
+
+    def close(self):
+        # Stops the workers and drops the incremental states, which the next run builds again.
+        if self.pool is not None:
+            for pool in (self.pool if isinstance(self.pool, list) else [self.pool]):
+                pool.close()
+                pool.join()
+            self.pool = None
+        self.forget_states()
+        self.run_settings = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def connect(self, turbine_coordinates):
+        layout = []
+        for t in turbine_coordinates:
+            if t[0] >= 0.0 and t[1] >= 0.0:
+                layout.append([t[0], t[1]])
+        self.number_turbines = len(layout)
+        if self.wind_directions is None:
+            self.prepare_wind_conditions()
+        cone_key = (self.wake_mean_model, self.thrust_coefficient_model, self.ct_table, self.wake_threshold)
+        if self.wake_threshold is None:
+            self.cone = None
+        elif self.cone is None or self.cone_key != cone_key:
+            # Calibrated for the largest Ct of the curve, at the free stream wind speeds of all directions, which differ
+            # with the Gauss integration.
+            self.cone = calibrate_cone(self.wake_mean_model, max(self.thrust_coefficient_model(self.ctx, self.ct_table)),
+                                       np.concatenate(self.wind_speeds),
+                                       np.tile(self.freestream_turbulence, len(self.wind_speeds)), self.wake_threshold)
+        self.cone_key = cone_key
+        if self.run_settings is not None and self.settings_changed():
+            self.close()
+        self.run_settings = (self.executor, self.workers, self.models())
 
         self.energies_per_angle = []
         self.turbulences_per_angle = []
@@ -63,23 +212,24 @@ class Workflow:
         self.max_turbulence_per_turbine = [0.0 for _ in range(len(turbine_coordinates))]
 
         if self.print_output is True: print("=== CALCULATING ENERGY, TURBULENCE PER WIND DIRECTION ===")
+        # Turbines that moved since the previous incremental run. The previous states are only valid for the same
+        # turbines.
+        moved = None
+        if self.incremental and self.previous_layout is not None and len(self.previous_layout) == len(turbine_coordinates):
+            moved = [t for t in range(len(turbine_coordinates)) if list(turbine_coordinates[t]) != self.previous_layout[t]]
+        self.previous_layout = [list(t) for t in turbine_coordinates] if self.incremental else None
+
+        # Directions are independent. They run in the executor's pool, which only gets the models once. Threads share
+        # the wake cache of this process, which run() resets.
+        models = None if self.executor == 'process' else self.models()
+        reset_wake_cache = self.executor == 'process' and not self.keep_wake_cache
+        tasks = [(models, self.key, turbine_coordinates, self.wind_speeds[i], self.wind_speeds_probabilities[i],
+                  self.wind_directions[i], self.freestream_turbulence, self.incremental, moved, reset_wake_cache)
+                 for i in range(len(self.wind_directions))]
+        results = self.map(one_direction, tasks)
+
         for i in range(len(self.wind_directions)):
-            self.aero_energy_one_angle, self.powers_one_angle, deficits = energy_one_angle(turbine_coordinates,
-                                                                                           self.wind_speeds[i],
-                                                                                           self.wind_speeds_probabilities[
-                                                                                               i],
-                                                                                           self.wind_directions[i],
-                                                                                           self.freestream_turbulence,
-                                                                                           self.wake_mean_model,
-                                                                                           self.power_model,
-                                                                                           self.table_power,
-                                                                                           self.thrust_coefficient_model,
-                                                                                           self.ct_table,
-                                                                                           self.wake_merging_model)
-            self.turbulences = max_turbulence_one_angle(deficits, turbine_coordinates, self.wind_speeds[i],
-                                                        self.wind_directions[i], self.freestream_turbulence, Jensen,
-                                                        self.thrust_coefficient_model, self.ct_table,
-                                                        self.wake_turbulence_model)
+            self.aero_energy_one_angle, self.powers_one_angle, self.turbulences = results[i]
 
             self.energy_one_angle_weighted = self.aero_energy_one_angle * self.direction_probabilities[i] / 100.0
             self.energies_per_angle.append(self.energy_one_angle_weighted)
@@ -114,6 +264,7 @@ class Workflow:
         from farm_energy.wake_model_mean_new.ainslie1d import ainslie
         from farm_energy.wake_model_mean_new.ainslie2d import ainslie_full
         from farm_energy.wake_model_mean_new.jensen import determine_if_in_wake, wake_radius, wake_deficit
+        from farm_energy.wake_model_mean_new.memoize import wake_cache
         from farm_energy.wake_model_mean_new.larsen import deff, wake_deficit_larsen, wake_radius, x0, rnb, r95, c1, \
             determine_if_in_wake_larsen, wake_speed
         from farm_energy.wake_model_mean_new.wake_turbulence_models import frandsen2, Quarton, danish_recommendation, \
@@ -128,7 +279,9 @@ class Workflow:
         # thrust_coefficient.reset()
         # # ainslie.reset()
         # # ainslie_full.reset()
-        determine_if_in_wake.reset()
+        if self.print_output is True: print(" --- Wake cache ---\n" + str(wake_cache.stats()) + "\n")
+        if not self.keep_wake_cache:
+            wake_cache.reset()
         # wake_radius.reset()
         # wake_deficit.reset()
         # frandsen2.reset()
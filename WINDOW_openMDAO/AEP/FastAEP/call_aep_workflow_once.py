@@ -3,14 +3,22 @@ from site_conditions.wind_conditions.windrose_new import WeibullWindBins
 from farm_energy.wake_model_mean_new.aero_power_ct_models.aero_models import power, thrust_coefficient
 
 
-def call_aep(wake_model, turbulence_model, merge_model, power_curve_file, ct_curve_file, windrose_file, layout, nbins, artif_angle):
+def build_workflow(wake_model, turbulence_model, merge_model, power_curve_file, ct_curve_file, windrose_file, nbins, artif_angle, integration='bins', breakpoints=()):
     real_angle = 30.0
     workflow1 = aep_workflow(WeibullWindBins, windrose_file, turbulence_model, thrust_coefficient, ct_curve_file, wake_model, merge_model, power, power_curve_file)
 
     workflow1.windrose.nbins = nbins
     workflow1.windrose.artificial_angle = artif_angle
     workflow1.windrose.real_angle = real_angle
+    workflow1.windrose.integration = integration
+    workflow1.windrose.breakpoints = breakpoints
     workflow1.print_output = False
+    workflow1.prepare_wind_conditions()
+    return workflow1
+
+
+def call_aep(wake_model, turbulence_model, merge_model, power_curve_file, ct_curve_file, windrose_file, layout, nbins, artif_angle):
+    workflow1 = build_workflow(wake_model, turbulence_model, merge_model, power_curve_file, ct_curve_file, windrose_file, nbins, artif_angle)
     answer = workflow1.run(layout)
     # power2.reset()
     # thrust_coefficient2.reset()
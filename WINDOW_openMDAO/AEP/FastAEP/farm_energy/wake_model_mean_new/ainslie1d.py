@@ -1,43 +1,73 @@
 from numpy import exp
-from ainslie_common import b, E
+import numpy as np
+from ainslie_common import karman, near_wake_factor, wake_width
 from WINDOW_openMDAO.input_params import rotor_radius
 from memoize import Memoize
 D = rotor_radius * 2.0
 
 
 def ainslie(Ct, u0, distance_parallel, distance_perpendicular, I0):
-    # centreline = open('centreline.dat', 'w')
-    # velocity = open('velocity.dat', 'w')
-    h = 0.007
-    L = distance_parallel
-    n = int(L / h) + 1
-    Uc1 = [0.0 for _ in range(n)]
-    d1 = [0.0 for _ in range(n)]
-    U0 = u0
-    # dr = 0.1
-    Y = distance_perpendicular
-    i0 = I0
-    ct = Ct
-    # m = int(Y / dr)
+    # Ct, u0 and I0 can be arrays over wakes, e.g. wind speed bins, and distance_parallel and distance_perpendicular
+    # arrays of points in every one of them. Each centreline is marched once up to the farthest point, by
+    # centreline_deficits. Returns the shape of the points followed by the shape of the wakes.
+    Ct, u0, I0 = np.broadcast_arrays(*[np.asarray(arg, dtype=float) for arg in [Ct, u0, I0]])
+    L, Y = np.broadcast_arrays(np.asarray(distance_parallel, dtype=float), np.asarray(distance_perpendicular, dtype=float))
+    d = centreline_deficits(Ct, u0, I0, L.ravel()).T
 
-    Dmi = ct - 0.05 - (16.0 * ct - 0.5) * i0 / 10.0
-    if Dmi < 0:
-        Dmi = 0.0000000001
+    # Code to calculate wake deficit at a specific point instead of the whole grid. Namely, the rotor's centrepoint.
+    answer = d * exp(- 3.56 * (Y.reshape(-1, 1) / wake_width(d, Ct.ravel())) ** 2.0)  # * (1.0 + 7.12 * (0.07 * distance_perpendicular b(d1[-1], ct))) ** (- 0.5)
 
-    Uc1[0] = U0 * (1.0 - Dmi)  # Boundary condition at x = 2.0
-    d1[0] = Dmi
+    return answer.reshape(L.shape + Ct.shape)[()]
 
-    for i in range(1, n):  # For all positions in the wake centreline direction. Recursive. Whole grid
-        Uc1[i] = Uc1[i - 1] + (h * 16.0 * E(i * h, Uc1[i - 1], d1[i - 1], U0, I0, Ct) * (Uc1[i - 1] ** 3.0 - U0 * Uc1[i - 1] ** 2.0 - Uc1[i - 1] * U0 ** 2.0 + U0 ** 3.0) / (Uc1[i - 1] * Ct * U0 ** 2.0))
-        d1[i] = 1.0 - Uc1[i] / U0
 
-    # Code to calculate wake deficit at a specific point instead of the whole grid. Namely, the rotor's centrepoint.
-    answer = d1[-1] * exp(- 3.56 * (Y / b(d1[-1], ct)) ** 2.0)  # * (1.0 + 7.12 * (0.07 * distance_perpendicular b(d1[-1], ct))) ** (- 0.5)
+# ainslie = Memoize(ainslie)
+
 
+# Up to this many wakes, centreline_deficits marches them one after the other with floats, which is faster than
+# numpy's per-call overhead on small arrays. Beyond it, all are marched together as arrays.
+max_float_wakes = 32
+
+
+def centreline_deficits(Ct, u0, I0, distances):
+    # Centreline deficit of many wakes at once, sampled at every distance in distances. Ct, u0 and I0 are arrays with
+    # one element per wake. Returns an array of shape (wakes, distances).
+    h = 0.007
+    ct, U0, i0 = [np.asarray(arg, dtype=float).ravel() for arg in np.broadcast_arrays(Ct, u0, I0)]
+    steps = (np.asarray(distances, dtype=float) / h).astype(int)
+    order = np.argsort(steps)
+    answer = np.zeros((len(ct), len(steps)))
+    if len(steps) == 0:
+        return answer
+    # The near wake factor of the eddy viscosity only depends on the distance, so it is computed for all steps at once.
+    factor = near_wake_factor(np.arange(steps.max() + 1) * h).tolist()
+    samples = steps[order].tolist()
+    if len(ct) > max_float_wakes:
+        answer[:, order] = np.transpose(march(ct, U0, i0, h, factor, samples))
+    else:
+        for wake in range(len(ct)):
+            answer[wake, order] = march(float(ct[wake]), float(U0[wake]), float(i0[wake]), h, factor, samples)
     return answer
 
 
-# ainslie = Memoize(ainslie)
+def march(ct, U0, i0, h, factor, samples):
+    # Euler march of the centreline of one wake, with floats, or of many, with arrays. Returns the deficit at every step
+    # in samples, which are sorted.
+    Dmi = ct - 0.05 - (16.0 * ct - 0.5) * i0 / 10.0
+    Dmi = Dmi * (Dmi >= 0.0) + 0.0000000001 * (Dmi < 0.0)
+    Uc1 = U0 * (1.0 - Dmi)  # Boundary condition at x = 2.0
+    d1 = Dmi
+
+    deficits = []
+    next_sample = samples[0]
+    for i in range(samples[-1] + 1):  # For all positions in the wake centreline direction. Recursive.
+        if i > 0:
+            eddy = factor[i] * ((0.015 * wake_width(d1, ct) * (U0 - Uc1)) + (karman ** 2.0) * i0)
+            Uc1 = Uc1 + (h * 16.0 * eddy * (Uc1 ** 3.0 - U0 * Uc1 ** 2.0 - Uc1 * U0 ** 2.0 + U0 ** 3.0) / (Uc1 * ct * U0 ** 2.0))
+            d1 = 1.0 - Uc1 / U0
+        while i == next_sample:
+            deficits.append(d1)
+            next_sample = samples[len(deficits)] if len(deficits) < len(samples) else - 1
+    return deficits
     # Code to calculate average wake deficit in all area of the rotor ###############
 
     # Define function to integrate.
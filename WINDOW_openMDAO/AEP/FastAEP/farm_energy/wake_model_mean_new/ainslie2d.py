@@ -1,109 +1,64 @@
-from numpy import exp
+import numpy as np
 from thomas_algorithm import thomas
-from ainslie_common import b, E
-from time import time
-from memoize import Memoize
+from ainslie_common import wake_width, eddy_viscosity
 from WINDOW_openMDAO.input_params import rotor_radius
-# b = Memoize(b)
-# E = Memoize(E)
 rotor_diameter = 2.0 * rotor_radius
 
 
+# Radial extent of the grid in diameters and number of radial and downstream steps.
+di = 2.0
+ni = 100
+nj = 100
+
+
 def ainslie_full(ct, u0, distance_parallel, distance_perpendicular, i0):
-    # centreline = open('centreline.dat', 'w')
-    # velocity = open('velocity.dat', 'w')
+    # Arguments can be arrays, one wake per element. All wakes are marched together, each on its own grid.
+    ct, u0, distance_parallel, distance_perpendicular, i0 = np.broadcast_arrays(
+        *[np.asarray(arg, dtype=float) for arg in [ct, u0, distance_parallel, distance_perpendicular, i0]])
+    deficits = deficit_profile(ct.ravel(), u0.ravel(), distance_parallel.ravel(), i0.ravel())
+    index = (distance_perpendicular.ravel() * (ni + 1) / di).astype(int)
+    return deficits[np.arange(len(index)), index].reshape(ct.shape)[()]
+
 
-    di = 2.0
+def deficit_profile(ct, u0, distance_parallel, i0):
+    # Radial deficit profile 1 - u / u0 at distance_parallel, on the ni + 1 nodes from the centreline to di diameters.
+    ct, u0, distance_parallel, i0 = [np.asarray(arg, dtype=float).reshape(-1, 1) for arg in [ct, u0, distance_parallel, i0]]
     dj = distance_parallel
-    # ni = int(di * 80)
-    # nj = int(dj * 80)
-    ni = 100
-    nj = 100
     k = dj / float(nj)
     h = di / float(ni)
 
-    nj += 1
-    ni += 1
     Dmi = ct - 0.05 - (16.0 * ct - 0.5) * i0 / 10.0
-    if Dmi < 0.0:
-        Dmi = 0.00000000001
+    Dmi = np.where(Dmi < 0.0, 0.00000000001, Dmi)
 
-    u = [0.0 for _ in range(ni)]
-    v = [0.0 for _ in range(ni)]
-
-    for g in range(ni):
-        u[g] = u0 * (1.0 - Dmi * exp(- 3.56 * float(g * h) ** 2.0 / b(Dmi, ct) ** 2.0))
-    # print u
+    radius = np.arange(ni + 1) * h
+    u = u0 * (1.0 - Dmi * np.exp(- 3.56 * radius ** 2.0 / wake_width(Dmi, ct) ** 2.0))
+    # The wind speed is freestream beyond the last node.
+    outer = u0[:, 0]
     old_u = u
-    u_initial = u
-    old_v = v
     old2_u = u
-    # start = time()
-    for j in range(1, nj):
-        # start = time()
-        A = []
-        B = []
-        C = []
-        R = []
-
-        i = 0
-
-        A.append(- k * E(j * k, old_u[i], (u0 - old_u[i]) / u0, u0, i0, ct))
-        B.append(2.0 * (h ** 2.0 * old_u[i] + k * E(j * k, old_u[i], (u0 - old_u[i]) / u0, u0, i0, ct)))
-        C.append(- k * E(j * k, old_u[i], (u0 - old_u[i]) / u0, u0, i0, ct))
-        R.append(k * E(j * k, old_u[i], (u0 - old_u[i]) / u0, u0, i0, ct) * (2.0 * old_u[i + 1] - 2.0 * old_u[i]) + 2.0 * h ** 2.0 * old_u[i] ** 2.0)
+    for j in range(1, nj + 1):
+        eddy = eddy_viscosity(j * k, old_u, (u0 - old_u) / u0, u0, i0, ct)
+
+        # Radial velocity from continuity, v[i] = r / (r + h) * (v[i - 1] - h / k * du[i]) with v[0] = 0.
+        v = np.cumsum(radius / h * (- h / k * (old_u - old2_u)), axis=-1) / (radius / h + 1.0)
+
+        upper = np.concatenate([old_u[:, 1:], u0], axis=-1)
+        lower = np.concatenate([old_u[:, :1], old_u[:, :-1]], axis=-1)
+        A = k * (h * eddy - radius * h * v - 2.0 * radius * eddy)
+        B = 4.0 * radius * (h ** 2.0 * old_u + k * eddy)
+        C = k * (radius * h * v - 2.0 * radius * eddy - h * eddy)
+        R = h * k * eddy * (upper - lower) + 2.0 * k * eddy * radius * (upper - 2.0 * old_u + lower) - radius * h * k * v * (upper - lower) + 4.0 * radius * h ** 2.0 * old_u ** 2.0
+        # Symmetry at the centreline, where the sub-diagonal term folds onto the super-diagonal.
+        B[:, 0] = 2.0 * (h ** 2.0 * old_u[:, 0] + k[:, 0] * eddy[:, 0])
+        C[:, 0] = - 2.0 * k[:, 0] * eddy[:, 0]
+        R[:, 0] = k[:, 0] * eddy[:, 0] * (2.0 * old_u[:, 1] - 2.0 * old_u[:, 0]) + 2.0 * h ** 2.0 * old_u[:, 0] ** 2.0
+        R[:, -1] -= C[:, -1] * outer
 
-        v[0] = 0.0
-        # print time() - start, "loop out"
-        for i in range(1, ni):
-            # print j, i, j * k, i * h, old_u[i], (u0 - old_u[i]) / u0
-            #  Uncomment if v is not neglected. Radial velocity.
-            if j == 1:
-                v[i] = (i * h) / ((i * h) + h) * (old_v[i - 1] - h / k * (old_u[i] - u_initial[i]))
-            elif j > 1:
-                v[i] = (i * h) / ((i * h) + h) * (old_v[i - 1] - h / k * (old_u[i] - old2_u[i]))
-
-            A.append(k * (h * E(j * k, old_u[i], (u0 - old_u[i]) / u0, u0, i0, ct) - (i * h) * h * v[i] - 2.0 * (i * h) * E(j * k, old_u[i], (u0 - old_u[i]) / u0, u0, i0, ct)))
-            B.append(4.0 * (i * h) * (h ** 2.0 * old_u[i] + k * E(j * k, old_u[i], (u0 - old_u[i]) / u0, u0, i0, ct)))
-            C.append(k * ((i * h) * h * v[i] - 2.0 * (i * h) * E(j * k, old_u[i], (u0 - old_u[i]) / u0, u0, i0, ct) - h * E(j * k, old_u[i], (u0 - old_u[i]) / u0, u0, i0, ct)))
-            if i < ni - 1:
-                R.append(h * k * E(j * k, old_u[i], (u0 - old_u[i]) / u0, u0, i0, ct) * (old_u[i + 1] - old_u[i - 1]) + 2.0 * k * E(j * k, old_u[i], (u0 - old_u[i]) / u0, u0, i0, ct) * (i * h) * (old_u[i + 1] - 2.0 * old_u[i] + old_u[i - 1]) - (i * h) * h * k * old_v[i] * (old_u[i + 1] - old_u[i - 1]) + 4.0 * (i * h) * h ** 2.0 * old_u[i] ** 2.0)
-            elif i == ni - 1:
-                R.append(h * k * E(j * k, old_u[i], (u0 - old_u[i]) / u0, u0, i0, ct) * (u0 - old_u[i - 1]) + 2.0 * k * E(j * k, old_u[i], (u0 - old_u[i]) / u0, u0, i0, ct) * (i * h) * (u0 - 2.0 * old_u[i] + old_u[i - 1]) - (i * h) * h * k * old_v[i] * (u0 - old_u[i - 1]) + 4.0 * (i * h) * h ** 2.0 * old_u[i] ** 2.0)
-        # print time() - start
-
-        C[0] += A[0]
-        del A[0]
-        R[-1] -= C[-1] * u0
-        del C[-1]
-        # start3 = time()
         old2_u = old_u
-        old_u = thomas(A, B, C, R)
-        # print old_u
-        old_v = v
-        # print time() - start3
-    # print time() - star,
-    # print 's'
-
-    # Code to calculate the average wake deficit in all the area of the rotor ###############
-
-    # Define function to integrate.
-
-    # p. 77 Adapting and calibration of existing wake models to meet the conditions inside offshore wind farms. For integrand squared momentum deficit.
-    # def G(r, theta):
-    #     z = sqrt(Y ** 2.0 + r ** 2.0 + 2.0 * Y * r * cos(theta))
-    #     gauss = U0 * (1.0 - d1[n - 1] * exp(- 3.56 * (z / b(d1[n - 1])) ** 2.0))
-    #     return r * (U0 - gauss) ** 2.0
-    #
-    # A = pi * 0.5 ** 2.0  ## Unitary diameter in this program.
-    # U = U0 - sqrt((1.0 / A) * simpson_integrate2D(G, 0.0, 0.5, 5, 0.0, 2.0 * pi, 10))
-    # return 1.0 - old_u[int(round(distance_perpendicular * rotor_diameter, 0))] / u0
-    return 1.0 - old_u[int(distance_perpendicular * ni / di)] / u0
+        old_u = thomas(A[:, 1:], B, C[:, :-1], R)
 
+    return 1.0 - old_u / u0
 
-# ainslie_full = Memoize(ainslie_full)
-    # centreline.close()
-    # velocity.close()
 
 if __name__ == '__main__':
 #     from ainslie1d import ainslie
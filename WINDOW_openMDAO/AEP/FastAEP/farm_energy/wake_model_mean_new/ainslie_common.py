@@ -1,4 +1,5 @@
 from numpy import radians, cos, sin
+import numpy as np
 from memoize import Memoize
 karman = 0.41  # von Karman constant
 
@@ -34,6 +35,21 @@ def E(x1, Ud, Dm, u0, i0, ct):  # Eddy viscosity term
 # E = Memoize(E)
 
 
+# Array versions of b, F and E, for marching many wakes or grid nodes at once. wake_width also takes floats.
+def wake_width(deficit, ct):
+    deficit = deficit * (deficit > 0.0) + 0.0000000000001 * (deficit <= 0.0)
+    return (3.56 * ct / (8.0 * deficit * (1.0 - 0.5 * deficit))) ** 0.5
+
+
+def near_wake_factor(x):
+    x = np.asarray(x, dtype=float)
+    return np.where(x >= 5.5, 1.0, 0.65 + np.sign(x - 4.5) * (abs(x - 4.5) / 23.32) ** (1.0 / 3.0))
+
+
+def eddy_viscosity(x1, Ud, Dm, u0, i0, ct):
+    return near_wake_factor(x1) * ((0.015 * wake_width(Dm, ct) * (u0 - Ud)) + (karman ** 2.0) * i0)
+
+
 def determine_front(wind_angle, x_t1, y_t1, x_t2, y_t2):
     wind_angle = radians(wind_angle)
     projection = (x_t2 - x_t1) * cos(wind_angle) + (y_t2 - y_t1) * sin(wind_angle)
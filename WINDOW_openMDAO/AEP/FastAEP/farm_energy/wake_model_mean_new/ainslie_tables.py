@@ -0,0 +1,103 @@
+import os
+import hashlib
+import tempfile
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+from ainslie_common import karman, wake_width
+import ainslie1d
+import ainslie2d
+
+# Tables are built once and reused by every run, from this directory.
+cache_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ainslie_tables')
+
+# Default grids: thrust coefficient, upstream wind speed, ambient turbulence intensity and downstream distance, in the
+# units each model normalises distances with (radii for 1D, diameters for 2D).
+axes_1d = [np.linspace(0.05, 1.0, 20), np.linspace(3.0, 25.0, 12), np.linspace(0.02, 0.2, 10), np.linspace(0.0, 150.0, 301)]
+axes_2d = [np.linspace(0.05, 1.0, 20), np.linspace(3.0, 25.0, 8), np.linspace(0.02, 0.2, 6), np.linspace(1.0, 60.0, 30)]
+
+
+def build_1d(axes):
+    # Centreline deficit over the grid. The width follows from it, so it is not stored.
+    ct, u0, i0 = [grid.ravel() for grid in np.meshgrid(*axes[:3], indexing='ij')]
+    return ainslie1d.centreline_deficits(ct, u0, i0, axes[3]).reshape([len(axis) for axis in axes])
+
+
+def build_2d(axes):
+    # Whole radial deficit profile over the grid, marched in chunks of one thrust coefficient to bound memory.
+    table = np.zeros([len(axis) for axis in axes] + [ainslie2d.ni + 1])
+    for n, ct in enumerate(axes[0]):
+        u0, i0, x = [grid.ravel() for grid in np.meshgrid(*axes[1:], indexing='ij')]
+        table[n] = ainslie2d.deficit_profile(ct, u0, x, i0).reshape(table.shape[1:])
+    return table
+
+
+# Name, builder and the constants the results depend on, apart from the grid.
+models = {'1d': (build_1d, (karman, 0.007)),
+          '2d': (build_2d, (karman, ainslie2d.di, ainslie2d.ni, ainslie2d.nj))}
+
+
+def table_path(model, axes):
+    key = hashlib.sha1(repr(models[model][1]).encode())
+    for axis in axes:
+        key.update(np.ascontiguousarray(axis, dtype=float).tobytes())
+    return os.path.join(cache_directory, 'ainslie{}_{}.npy'.format(model, key.hexdigest()[:16]))
+
+
+def load_table(model, axes):
+    # Builds the table on the first call and memory-maps the stored one afterwards. The table is written to a temporary
+    # file and renamed into place, so that a run interrupted while saving, or another process loading the same table,
+    # never sees a partial file. On Windows the rename fails if another process stored the table meanwhile, and that
+    # one, built from the same grid, is used.
+    path = table_path(model, axes)
+    if not os.path.isfile(path):
+        if not os.path.isdir(cache_directory):
+            os.makedirs(cache_directory)
+        table = models[model][0](axes)
+        descriptor, temporary = tempfile.mkstemp(suffix='.npy', dir=cache_directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as stored:
+                np.save(stored, table)
+            os.rename(temporary, path)
+        except OSError:
+            os.remove(temporary)
+            if not os.path.isfile(path):
+                raise
+        except Exception:
+            os.remove(temporary)
+            raise
+    return np.load(path, mmap_mode='r')
+
+
+class AinslieTable(object):
+    # Interpolates the deficit of the 1D or 2D Ainslie model, with the arguments of ainslie() and ainslie_full(),
+    # instead of marching the wake. Beyond the last distance of the grid, and beyond the radial profile in 2D, the
+    # deficit is zero. Other arguments outside the grid are clipped to its edges.
+    def __init__(self, model, axes=None):
+        self.model = model
+        self.axes = [np.asarray(axis, dtype=float) for axis in (axes if axes is not None else {'1d': axes_1d, '2d': axes_2d}[model])]
+        self.interpolate = RegularGridInterpolator(self.axes, load_table(model, self.axes))
+
+    def __call__(self, ct, u0, distance_parallel, distance_perpendicular, i0):
+        ct, u0, distance_parallel, distance_perpendicular, i0 = np.broadcast_arrays(
+            *[np.asarray(arg, dtype=float) for arg in [ct, u0, distance_parallel, distance_perpendicular, i0]])
+        points = np.stack([np.clip(arg.ravel(), axis[0], axis[-1]) for arg, axis in zip([ct, u0, i0, distance_parallel], self.axes)], axis=-1)
+        inside = distance_parallel.ravel() <= self.axes[3][-1]
+        if self.model == '1d':
+            centreline = self.interpolate(points)
+            deficit = centreline * np.exp(- 3.56 * (distance_perpendicular.ravel() / wake_width(centreline, ct.ravel())) ** 2.0)
+        else:
+            profiles = self.interpolate(points)
+            index = (distance_perpendicular.ravel() * (ainslie2d.ni + 1) / ainslie2d.di).astype(int)
+            inside &= index <= ainslie2d.ni
+            deficit = profiles[np.arange(len(index)), np.minimum(index, ainslie2d.ni)]
+        return np.where(inside, deficit, 0.0).reshape(ct.shape)[()]
+
+
+tables = {}
+
+
+def ainslie_table(model):
+    # Default tables, shared by every caller and loaded on first use.
+    if model not in tables:
+        tables[model] = AinslieTable(model)
+    return tables[model]
@@ -1,4 +1,5 @@
 from math import pi, acos, sin, sqrt
+from WINDOW_openMDAO.WakeModel.area import overlap_fraction
 
 __author__ = 'Sebastian Sanchez Perez Moreno' \
              's.sanchezperezmoreno@tudelft.nl'
@@ -31,15 +32,7 @@ class AreaReal:
         self.d = d
 
     def area(self):
-        r = self.r
-        R = self.R
-        d = self.d
-        if d <= abs(r - R):
-            return 1.0
-        elif abs(r - R) < d and d < abs(r + R):
-            return (r ** 2 * acos((d ** 2 + r ** 2 - R ** 2) / (2.0 * d * r)) + R ** 2 * acos((d ** 2 + R ** 2 - r ** 2) / (2.0 * d * R)) - 0.5 * sqrt((- d + r + R) * (d + r - R) * (d - r + R) * (d + r + R))) / (pi * r ** 2)
-        else:
-            return 0.0
+        return overlap_fraction(self.r, self.R, self.d)
 
 
 if __name__ == '__main__':
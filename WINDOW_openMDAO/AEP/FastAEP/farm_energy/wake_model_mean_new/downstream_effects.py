@@ -6,88 +6,99 @@ from ainslie2d import ainslie_full
 #from farm_energy.wake_model_mean_new.ainslie2d_cy import ainslie_full
 # ainslie_full = Memoize(ainslie_full)
 from ainslie_common import crosswind_distance, determine_front
-from time import time
+from ainslie_tables import ainslie_table
+import numpy as np
 from WINDOW_openMDAO.input_params import rotor_radius
 
 
+# Each wake model gives the deficits on the downstream turbines, shape (len(coordinates_downstream),) + shape of the
+# thrust coefficient. The thrust coefficient, upstream wind speed and ambient turbulence can be arrays over wind speed
+# bins, with the geometry shared by all of them.
+
+
 def constantwake(coordinates_upstream, thrust_coefficient, coordinates_downstream, angle, wind_speed_upstream, ambient_turbulence_intensity):
-    return [0.0 for _ in range(len(coordinates_downstream))]
+    return np.zeros((len(coordinates_downstream),) + np.shape(thrust_coefficient))
 
 
 def JensenEffects(coordinates_upstream, thrust_coefficient, coordinates_downstream, angle, wind_speed_upstream, ambient_turbulence_intensity):
     angle3 = angle + 180.0
     # coordinates downstream will be an array with coordinates and original index.
-    partial_deficits = []
+    partial_deficits = np.zeros((len(coordinates_downstream),) + np.shape(thrust_coefficient))
 
     for i in range(len(coordinates_downstream)):
         determ = determine_if_in_wake(coordinates_upstream[1], coordinates_upstream[2], coordinates_downstream[i][1], coordinates_downstream[i][2], angle3)
-        # print determ[1], "determ1"
-        # print determ[0], "determ0"
-
         if determ[0] != 0.0:
-            # print jensen.wake_deficit(thrust_coefficient, determ[1])
-            partial_deficits.append(determ[0] * wake_deficit(thrust_coefficient, determ[1]))
-        else:
-            partial_deficits.append(0.0)
+            partial_deficits[i] = determ[0] * wake_deficit(thrust_coefficient, determ[1])
 
     return partial_deficits
 
 
 def LarsenEffects(coordinates_upstream, thrust_coefficient, coordinates_downstream, angle, wind_speed_upstream, ambient_turbulence_intensity):
     angle3 = angle + 180.0
-    partial_deficits = []
-
-    for i in range(len(coordinates_downstream)):
-        proportion, flag, perpendicular_distance, parallel_distance = determine_if_in_wake_larsen(coordinates_upstream[1], coordinates_upstream[2], coordinates_downstream[i][1], coordinates_downstream[i][2], thrust_coefficient, angle3, ambient_turbulence_intensity)
-        if parallel_distance > 0.0:
-            if proportion != 0.0:
-                partial_deficits.append(proportion * wake_deficit_larsen(wind_speed_upstream, thrust_coefficient, parallel_distance + x0(thrust_coefficient, ambient_turbulence_intensity), perpendicular_distance, ambient_turbulence_intensity))
-            else:
-                partial_deficits.append(0.0)
-        else:
-            partial_deficits.append(0.0)
+    partial_deficits = np.zeros((len(coordinates_downstream),) + np.shape(thrust_coefficient))
+    if len(coordinates_downstream) == 0:
+        return partial_deficits
+
+    # One wake for all downstream turbines and wind speed bins.
+    wake = LarsenWake(thrust_coefficient, ambient_turbulence_intensity)
+    downstream = np.array([[coordinates[1], coordinates[2]] for coordinates in coordinates_downstream])
+    proportion, flag, perpendicular_distance, parallel_distance = wake.in_wake(coordinates_upstream[1], coordinates_upstream[2], downstream[:, 0], downstream[:, 1], angle3)
+    affected = (parallel_distance > 0.0) & np.any((proportion != 0.0).reshape(len(downstream), -1), axis=1)
+    if affected.any():
+        proportion = proportion[affected]
+        partial_deficits[affected] = np.where(proportion != 0.0, proportion * wake.deficit(wind_speed_upstream, per_turbine(parallel_distance[affected], thrust_coefficient) + wake.x0, per_turbine(perpendicular_distance[affected], thrust_coefficient)), 0.0)
 
     return partial_deficits
 
 
-def Ainslie1DEffects(coordinates_upstream, thrust_coefficient, coordinates_downstream, angle, wind_speed_upstream, ambient_turbulence_intensity, diameter=rotor_radius):
+def Ainslie1DEffects(coordinates_upstream, thrust_coefficient, coordinates_downstream, angle, wind_speed_upstream, ambient_turbulence_intensity, diameter=rotor_radius, tabulated=False):
     angle3 = angle + 180.0
-    partial_deficits = []
     normalised_upstream = [coordinates_upstream[i] / diameter for i in range(1, 3)]
     normalised_downstream = [[coordinates_downstream[j][i] / diameter for i in range(1, 3)] for j in range(len(coordinates_downstream))]
-
-    for i in range(len(normalised_downstream)):
-
-        parallel_distance = determine_front(angle3, normalised_upstream[0], normalised_upstream[1], normalised_downstream[i][0], normalised_downstream[i][1])
-        perpendicular_distance = crosswind_distance(angle3, normalised_upstream[0], normalised_upstream[1], normalised_downstream[i][0], normalised_downstream[i][1])
-        if perpendicular_distance <= 1.7 and parallel_distance > 0.0:  # 1.7 gives same results as a bigger distance, many times faster.
-            partial_deficits.append(ainslie(thrust_coefficient, wind_speed_upstream, parallel_distance, perpendicular_distance, ambient_turbulence_intensity))
+    parallel_distances = np.array([determine_front(angle3, normalised_upstream[0], normalised_upstream[1], downstream[0], downstream[1]) for downstream in normalised_downstream])
+    perpendicular_distances = np.array([crosswind_distance(angle3, normalised_upstream[0], normalised_upstream[1], downstream[0], downstream[1]) for downstream in normalised_downstream])
+    partial_deficits = np.zeros((len(coordinates_downstream),) + np.shape(thrust_coefficient))
+    in_wake = (perpendicular_distances <= 1.7) & (parallel_distances > 0.0)  # 1.7 gives same results as a bigger distance, many times faster.
+    if in_wake.any():
+        if tabulated:
+            partial_deficits[in_wake] = ainslie_table('1d')(thrust_coefficient, wind_speed_upstream, per_turbine(parallel_distances[in_wake], thrust_coefficient), per_turbine(perpendicular_distances[in_wake], thrust_coefficient), ambient_turbulence_intensity)
         else:
-            partial_deficits.append(0.0)
+            # One centreline per wind speed bin, all marched together.
+            partial_deficits[in_wake] = ainslie(thrust_coefficient, wind_speed_upstream, parallel_distances[in_wake], perpendicular_distances[in_wake], ambient_turbulence_intensity)
 
     return partial_deficits
 
 
 # from time import time
-def Ainslie2DEffects(coordinates_upstream, thrust_coefficient, coordinates_downstream, angle, wind_speed_upstream, ambient_turbulence_intensity, diameter=rotor_radius * 2.0):
+def Ainslie2DEffects(coordinates_upstream, thrust_coefficient, coordinates_downstream, angle, wind_speed_upstream, ambient_turbulence_intensity, diameter=rotor_radius * 2.0, tabulated=False):
     angle3 = angle + 180.0
-    partial_deficits = []
     normalised_upstream = [coordinates_upstream[i] / diameter for i in range(1, 3)]
     normalised_downstream = [[coordinates_downstream[j][i] / diameter for i in range(1, 3)] for j in range(len(coordinates_downstream))]
-    # start = time()
-    for i in range(len(normalised_downstream)):
-        parallel_distance = determine_front(angle3, normalised_upstream[0], normalised_upstream[1], normalised_downstream[i][0], normalised_downstream[i][1])
-        perpendicular_distance = crosswind_distance(angle3, normalised_upstream[0], normalised_upstream[1], normalised_downstream[i][0], normalised_downstream[i][1])
-        if perpendicular_distance < 2.0 and parallel_distance > 0.0:
-            # if wind_speed_upstream > 23.0:
-                # print thrust_coefficient, wind_speed_upstream, parallel_distance, perpendicular_distance, ambient_turbulence_intensity
-            partial_deficits.append(ainslie_full(thrust_coefficient, wind_speed_upstream, parallel_distance, perpendicular_distance, ambient_turbulence_intensity))
-        else:
-            partial_deficits.append(0.0)
+    parallel_distances = np.array([determine_front(angle3, normalised_upstream[0], normalised_upstream[1], downstream[0], downstream[1]) for downstream in normalised_downstream])
+    perpendicular_distances = np.array([crosswind_distance(angle3, normalised_upstream[0], normalised_upstream[1], downstream[0], downstream[1]) for downstream in normalised_downstream])
+    partial_deficits = np.zeros((len(coordinates_downstream),) + np.shape(thrust_coefficient))
+    # All turbines in the wake, and all wind speed bins, are marched together in one call.
+    in_wake = (perpendicular_distances < 2.0) & (parallel_distances > 0.0)
+    if in_wake.any():
+        partial_deficits[in_wake] = (ainslie_table('2d') if tabulated else ainslie_full)(thrust_coefficient, wind_speed_upstream, per_turbine(parallel_distances[in_wake], thrust_coefficient), per_turbine(perpendicular_distances[in_wake], thrust_coefficient), ambient_turbulence_intensity)
 
     return partial_deficits
 
 
+# The Ainslie models interpolated from their tables, see ainslie_tables, selectable as any other wake model.
+def TabulatedAinslie1DEffects(coordinates_upstream, thrust_coefficient, coordinates_downstream, angle, wind_speed_upstream, ambient_turbulence_intensity):
+    return Ainslie1DEffects(coordinates_upstream, thrust_coefficient, coordinates_downstream, angle, wind_speed_upstream, ambient_turbulence_intensity, tabulated=True)
+
+
+def TabulatedAinslie2DEffects(coordinates_upstream, thrust_coefficient, coordinates_downstream, angle, wind_speed_upstream, ambient_turbulence_intensity):
+    return Ainslie2DEffects(coordinates_upstream, thrust_coefficient, coordinates_downstream, angle, wind_speed_upstream, ambient_turbulence_intensity, tabulated=True)
+
+
+def per_turbine(distances, thrust_coefficient):
+    # Distances along the first axis, to broadcast against a thrust coefficient array over wind speed bins.
+    return distances.reshape((-1,) + (1,) * np.ndim(thrust_coefficient))
+
+
 if __name__ == '__main__':
     upstream = [0, 0.0, 0.0]
     ct_upstream = 0.79
@@ -1,7 +1,9 @@
-from numpy import pi, sqrt, deg2rad, tan, cos, sin
-from area import AreaReal
+from numpy import pi, sqrt, deg2rad, tan, cos, sin, maximum, minimum
+import numpy as np
+from area import overlap_fraction
 from WINDOW_openMDAO.input_params import rotor_radius as r0, hub_height as H
-from memoize import Memoize
+from WINDOW_openMDAO.src.AbsWakeModel.geometry import rotate
+from memoize import Memoize, wake_cache
 
 D = 2.0 * r0
 rotor_area = pi * r0 ** 2.0
@@ -9,13 +11,13 @@ rotor_area = pi * r0 ** 2.0
 
 
 def rnb(ia):
-    return max(1.08 * D, 1.08 * D + 21.7 * D * (ia - 0.05))
+    return maximum(1.08 * D, 1.08 * D + 21.7 * D * (ia - 0.05))
 # rnb = Memoize(rnb)
 
 
 def r95(ia):
     # print 0.5 * (rnb(ia) + min(H, rnb(ia)))
-    return 0.5 * (rnb(ia) + min(H, rnb(ia)))
+    return 0.5 * (rnb(ia) + minimum(H, rnb(ia)))
 # r95 = Memoize(r95)
 
 
@@ -44,43 +46,23 @@ def c1(Ct, ia):
 
 
 def determine_if_in_wake_larsen(xt, yt, xw, yw, ct, alpha, ia):  # According to Larsen Model only
-    # Eq. of centreline is Y = tan (d) (X - Xt) + Yt
-    # Distance from point to line
+    # Separation in the frame aligned with the centreline: along it to the turbine, across it to the centre.
     alpha = deg2rad(alpha + 180)
-    distance_to_centre = abs(- tan(alpha) * xw + yw + tan(alpha) * xt - yt) / sqrt(1.0 + tan(alpha) ** 2.0)
-    # print distance_to_centre
-    # Coordinates of the intersection between closest path from turbine in wake to centreline.
-    X_int = (xw + tan(alpha) * yw + tan(alpha) * (tan(alpha) * xt - yt)) / (tan(alpha) ** 2.0 + 1.0)
-    Y_int = (- tan(alpha) * (- xw - tan(alpha) * yw) - tan(alpha) * xt + yt) / (tan(alpha) ** 2.0 + 1.0)
-    # Distance from intersection point to turbine
-    distance_to_turbine = sqrt((X_int - xt) ** 2.0 + (Y_int - yt) ** 2.0)
+    along, across = rotate(xw - xt, yw - yt, alpha)
+    distance_to_centre = abs(across)
+    distance_to_turbine = abs(along)
     # Radius of wake at that distance
     radius = wake_radius(ct, distance_to_turbine + x0(ct, ia), ia)
     # print radius
-    if (xw - xt) * cos(alpha) + (yw - yt) * sin(alpha) <= 0.0:
-        if abs(radius) >= abs(distance_to_centre):
-            if abs(radius) >= abs(distance_to_centre) + r0:
-                fraction = 1.0
-                value = True
-                return fraction, value, distance_to_centre, distance_to_turbine
-            elif abs(radius) < abs(distance_to_centre) + r0:
-                fraction = AreaReal(r0, radius, distance_to_centre).area()
-                value = True
-                return fraction, value, distance_to_centre, distance_to_turbine
-        elif abs(radius) < abs(distance_to_centre):
-            if abs(radius) <= abs(distance_to_centre) - r0:
-                fraction = 0.0
-                value = False
-                return fraction, value, distance_to_centre, distance_to_turbine
-            elif abs(radius) > abs(distance_to_centre) - r0:
-                fraction = AreaReal(r0, radius, distance_to_centre).area()
-                value = True
-                return fraction, value, distance_to_centre, distance_to_turbine
+    if along <= 0.0:
+        fraction = overlap_fraction(r0, radius, distance_to_centre)
+        value = fraction > 0.0
+        return fraction, value, distance_to_centre, distance_to_turbine
     else:
         return 0.0, False, distance_to_centre, distance_to_turbine
 
 
-determine_if_in_wake_larsen = Memoize(determine_if_in_wake_larsen)
+determine_if_in_wake_larsen = Memoize(determine_if_in_wake_larsen, cache=wake_cache)
 
 
 def wake_speed(U0, ct, x, y, ia):
@@ -91,9 +73,65 @@ def wake_speed(U0, ct, x, y, ia):
 
 
 def wake_deficit_larsen(U0, ct, x, y, ia):
-    if U0 == 0.0:
+    if np.ndim(U0) == 0 and U0 == 0.0:
         return 1.0
     return 1.0 - wake_speed(U0, ct, x + x0(ct, ia), y, ia) / U0
 
 
 # wake_deficit_larsen = Memoize(wake_deficit_larsen)
+
+
+class LarsenWake(object):
+    # Wake of one upstream turbine. The constants that depend on Ct and ambient turbulence only are computed once here,
+    # instead of again for every downstream point, and radius, speed and deficit take arrays of distances. The
+    # arithmetic is that of the functions above, in the same order, so the results are the same. ct and ia can be
+    # arrays over wind speed bins, with distances broadcast against them.
+    def __init__(self, ct, ia):
+        self.ct = ct
+        self.x0 = x0(ct, ia)
+        c1_ct = c1(ct, ia)
+        self.radius_factor = ((35.0 / 2.0 / pi) ** (1.0 / 5.0)) * ((3.0 * c1_ct ** 2.0) ** (1.0 / 5.0))
+        self.ct_area = ct * rotor_area
+        self.mixing = 3.0 * c1_ct ** 2.0 * ct * rotor_area
+        self.offset = (35.0 / 2.0 / pi) ** (3.0 / 10.0) * (3.0 * c1_ct ** 2.0) ** (- 1.0 / 5.0)
+
+    def radius(self, x):
+        return self.radius_factor * ((self.ct_area * x) ** (1.0 / 3.0))
+
+    def speed(self, U0, x, y):
+        return U0 * (1.0 - ((self.ct_area * x ** (- 2.0)) ** (1.0 / 3.0)) / 9.0 * (y ** (3.0 / 2.0) * (self.mixing * x) ** (- 1.0 / 2.0) - self.offset) ** 2.0)
+
+    def deficit(self, U0, x, y):
+        if np.ndim(U0) == 0 and U0 == 0.0:
+            return np.ones(np.broadcast(x, y, self.ct).shape)[()]
+        return 1.0 - self.speed(U0, x + self.x0, y) / U0
+
+    def in_wake(self, xt, yt, xw, yw, alpha):
+        # Arrays version of determine_if_in_wake_larsen, for all points (xw, yw) at once. The fractions have the shape of
+        # the points followed by that of ct.
+        along, across = rotate(np.asarray(xw, dtype=float) - xt, np.asarray(yw, dtype=float) - yt, deg2rad(alpha + 180))
+        distance_to_centre = abs(across)
+        distance_to_turbine = abs(along)
+        points = (slice(None),) * np.ndim(along) + (np.newaxis,) * np.ndim(self.ct)
+        radius = self.radius(distance_to_turbine[points] + self.x0)
+        fraction = np.where((along <= 0.0)[points], overlap_fraction(r0, radius, distance_to_centre[points]), 0.0)
+        return fraction, fraction > 0.0, distance_to_centre, distance_to_turbine
+
+
+if __name__ == '__main__':
+    # LarsenWake against the scalar functions, over a grid of turbines around one at the origin.
+    ct = np.array([0.2, 0.5, 0.8])
+    ia = 0.11
+    U0 = np.array([6.0, 9.0, 12.0])
+    x, y = [grid.ravel() for grid in np.meshgrid(np.linspace(-3000.0, 3000.0, 61), np.linspace(-3000.0, 3000.0, 61))]
+    wake = LarsenWake(ct, ia)
+    fraction, _, centre, turbine = wake.in_wake(0.0, 0.0, x, y, 270.0)
+    deficit = wake.deficit(U0, turbine[:, np.newaxis] + wake.x0, centre[:, np.newaxis])
+    error = 0.0
+    for i in range(len(x)):
+        for j in range(len(ct)):
+            scalar = determine_if_in_wake_larsen.f(0.0, 0.0, x[i], y[i], ct[j], 270.0, ia)
+            error = max(error, abs(scalar[0] - fraction[i, j]))
+            if scalar[0] > 0.0:
+                error = max(error, abs(wake_deficit_larsen(U0[j], ct[j], turbine[i] + x0(ct[j], ia), centre[i], ia) - deficit[i, j]))
+    print("max difference to the scalar functions: {}".format(error))
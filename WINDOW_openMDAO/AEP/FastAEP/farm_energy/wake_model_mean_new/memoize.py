@@ -1,42 +1,124 @@
-class Memoize:
-    def __init__(self, f):
-        self.f = f
-        self.memo = {}
+from threading import Lock
+from functools import partial
 
-    def __call__(self, *args):
-        if args not in self.memo:
-            self.memo[args] = self.f(*args)
-        return self.memo[args]
+missing = object()
 
-    def reset(self):
-        self.memo = {}
 
+class LRUCache(object):
+    "Keeps the results of recently used calls, at most maxsize of them, with hit/miss/eviction counters."
 
-def Memoize2(fn):
-    """returns a memoized version of any function that can be called
-    with the same list of arguments.
-    Usage: foo = memoize(foo)"""
+    __instances = []
 
-    def handle_item(x):
-        if isinstance(x, dict):
-            return make_tuple(sorted(x.items()))
+    def __init__(self, name, maxsize=100000, decimals=None):
+        # With decimals, float arguments are rounded to that many decimals in the keys, so that calls whose coordinates
+        # differ by less share a result.
+        self.name = name
+        self.maxsize = maxsize
+        self.decimals = decimals
+        # An approximate LRU: two generations of plain dicts instead of an exact recency order, which is too slow for
+        # calls this cheap. Results used since the last generation change are in young. When young is half full, the
+        # old generation, holding the results not used since, is dropped at once, so a result can be evicted while
+        # more recent than some of those kept. Each generation holds less than maxsize / 2 results.
+        self.young = {}
+        self.old = {}
+        # Shared by wake models that may run in several threads.
+        self.lock = Lock()
+        self.reset_stats()
+        LRUCache.__instances.append(self)
+
+    def key(self, args):
+        if self.decimals is None:
+            try:
+                hash(args)
+                return args
+            except TypeError:
+                pass
+        return tuple(self.key_item(x) for x in args)
+
+    def key_item(self, x):
+        if isinstance(x, float):
+            return x if self.decimals is None else round(x, self.decimals)
+        elif isinstance(x, dict):
+            return self.key(sorted(x.items()))
         elif hasattr(x, '__iter__'):
-            return make_tuple(x)
+            return self.key(x)
         else:
             return x
 
-    def make_tuple(L):
-        return tuple(handle_item(x) for x in L)
-
-    def foo(*args, **kwargs):
-        items_cache = make_tuple(sorted(kwargs.items()))
-        args_cache = make_tuple(args)
-        if (args_cache, items_cache) not in foo.past_calls:
-            foo.past_calls[(args_cache, items_cache)] = fn(*args, **kwargs)
-        return foo.past_calls[(args_cache, items_cache)]
-    foo.past_calls = {}
-    foo.__name__ = 'memoized_' + fn.__name__
-    return foo
+    def get(self, key, f, args):
+        # Under the lock, as store may swap the generations meanwhile.
+        with self.lock:
+            value = self.young.get(key, missing)
+            if value is not missing:
+                self.hits += 1
+                return value
+            value = self.old.pop(key, missing)
+            if value is not missing:
+                self.hits += 1
+                self.store(key, value)
+                return value
+            self.misses += 1
+        value = f(*args)
+        with self.lock:
+            self.store(key, value)
+        return value
+
+    def store(self, key, value):
+        self.young[key] = value
+        if 2 * len(self.young) >= self.maxsize:
+            self.evictions += len(self.old)
+            self.old = self.young
+            self.young = {}
+
+    def reset(self):
+        with self.lock:
+            self.young = {}
+            self.old = {}
+
+    def reset_stats(self):
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        "Return the hits, misses, evictions and current size of the cache."
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self.young) + len(self.old)}
+
+    @staticmethod
+    def counts():
+        "Return a dict of {cache name: stats} for all caches."
+        return dict([(cache.name, cache.stats()) for cache in LRUCache.__instances])
+
+
+class Memoize(object):
+    # Memoized version of f. By default each function has its own cache. Several functions can share one, as their
+    # keys include the function.
+    def __init__(self, f, cache=None, maxsize=100000, decimals=None):
+        self.f = f
+        self.__name__ = f.__name__
+        self.cache = cache if cache is not None else LRUCache(f.__name__, maxsize, decimals)
+
+    def __call__(self, *args, **kwargs):
+        if kwargs:
+            return self.cache.get((self.__name__, self.cache.key(args), self.cache.key(sorted(kwargs.items()))),
+                                  partial(self.f, **kwargs), args)
+        return self.cache.get((self.__name__, self.cache.key(args)), self.f, args)
+
+    def reset(self):
+        self.cache.reset()
+
+    def stats(self):
+        return self.cache.stats()
+
+
+# Memoize also takes list and dict arguments, and keyword arguments.
+Memoize2 = Memoize
+
+# Cache of the in-wake checks of all the wake models.
+wake_cache = LRUCache('wake', maxsize=200000)
 
 
 class countcalls(object):
@@ -1,17 +1,20 @@
-from numpy import radians, tan, cos, sqrt
+from numpy import radians
+import numpy as np
+from WINDOW_openMDAO.src.AbsWakeModel import geometry
 
 
 def distance_to_front(x, y, theta):
-    theta = radians(theta)
-    return abs(x + tan(theta) * y - 10000000000.0 / cos(theta)) / sqrt(1.0 + tan(theta) ** 2.0)
+    return geometry.distance_to_front(x, y, radians(theta))
+
+
+def order_indices(layout_array, wind_direction):
+    # Position in layout_array of each turbine in wind order.
+    indices, x, y = np.array(layout_array, dtype=float).T
+    return np.lexsort((indices, distance_to_front(x, y, wind_direction)))
 
 
 def order(layout_array, wind_direction):
-    distances = []
-    for turbine in layout_array:
-        distances.append([distance_to_front(turbine[1], turbine[2], wind_direction), turbine[0]])
-    distances.sort()
-    ordered_indices = [item[1] for item in distances]
+    ordered_indices = [layout_array[i][0] for i in order_indices(layout_array, wind_direction)]
     ordered_layout = [layout_array[i] for i in ordered_indices]
 
     return ordered_layout
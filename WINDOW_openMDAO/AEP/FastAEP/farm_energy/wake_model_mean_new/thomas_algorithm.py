@@ -1,9 +1,9 @@
-from memoize import Memoize2
+import numpy as np
 
 
 def thomas(a, b, c, d):
     """Uses Thomas algorithm for solving a tridiagonal matrix for n unknowns.
-     a, b, and  are a list of the matrix entries
+     a, b, and  are arrays of the matrix entries
      Matrix form of:
      [b1 c1    ] [x1] [d1]
      |a2 b2 c2   | |x2|  |d2|
@@ -11,53 +11,34 @@ def thomas(a, b, c, d):
      |     | |' |= | '|
      |     | |' |  | '|
      [   an bn cn] |xn] [dn]
+     Any leading axes are a batch of independent systems, solved together along the last axis.
     """
-    # Finding the size of the matrix and determine n
-    n = len(b)
-    # print n # Used for debugging
-    # Test the size of a and c
-    if len(a) != n - 1:
-        # print 'Wrong index size for a.\n A should have an index of', n - 1, '\n Your a has ', len(a)
-        exit()
-    if len(c) != n - 1:
-        # print 'Wrong index size for c.\n C should have an index of', n - 1, '\n Your c has', len(c)
-        exit()
-
-    # Converting to float and appending 0.0 to c
-    for i in range(0, len(a)):
-        a[i] = float(a[i])
-    for i in range(0, len(b)):
-        b[i] = float(b[i])
-    for i in range(0, len(c)):
-        c[i] = float(c[i])
-    for i in range(0, len(d)):
-        d[i] = float(d[i])
-    c.append(0.0)  # Hack to make the function to work
-
-    # Calculate p and q
-    p = []
-    q = []
-    p.append(c[0] / b[0])
-    q.append(d[0] / b[0])
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    c = np.asarray(c, dtype=float)
+    d = np.asarray(d, dtype=float)
+    n = b.shape[-1]
+    if a.shape[-1] != n - 1 or c.shape[-1] != n - 1:
+        raise ValueError('a and c should have one entry less than b.')
+
+    # Forward sweep
+    p = np.empty(np.broadcast(a[..., :1], b, c[..., :1], d).shape)
+    q = np.empty_like(p)
+    p[..., 0] = c[..., 0] / b[..., 0]
+    q[..., 0] = d[..., 0] / b[..., 0]
     for j in range(1, n):
-        # print 'thomas algorithm'
-        # print j, b[j], c[j], p[j - 1]
-        # print
-        pj = c[j] / (b[j] - a[j - 1] * p[j - 1])
-        qj = (d[j] - a[j - 1] * q[j - 1]) / (b[j] - a[j - 1] * p[j - 1])
-        p.append(pj)
-        q.append(qj)
-    # print p,q # Used for debugging the code!
+        denominator = b[..., j] - a[..., j - 1] * p[..., j - 1]
+        if j < n - 1:
+            p[..., j] = c[..., j] / denominator
+        q[..., j] = (d[..., j] - a[..., j - 1] * q[..., j - 1]) / denominator
 
     # Back sub
-    x = [q[n - 1]]
+    x = q
     for j in range(n - 2, -1, -1):
-        xj = q[j] - p[j] * x[0]  # Value holder
-        x.insert(0, xj)  # Building the list backwards
+        x[..., j] -= p[..., j] * x[..., j + 1]
 
     # Return the value
     return x
-# thomas = Memoize2(thomas)
 
 
 if __name__ == '__main__':
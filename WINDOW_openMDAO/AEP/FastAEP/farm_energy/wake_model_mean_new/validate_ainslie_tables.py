@@ -0,0 +1,49 @@
+# Compares the tabulated Ainslie models against the direct solvers at random points inside the default grids.
+# Builds the tables on the first run.
+import sys
+from time import time
+import numpy as np
+from ainslie1d import ainslie
+from ainslie2d import ainslie_full
+from ainslie_tables import ainslie_table, axes_1d, axes_2d
+
+
+def sample(axes, n_points, max_perpendicular, seed=0):
+    random = np.random.RandomState(seed)
+    ct, u0, i0, parallel = [random.uniform(axis[0], axis[-1], n_points) for axis in axes]
+    perpendicular = random.uniform(0.0, max_perpendicular, n_points)
+    return ct, u0, parallel, perpendicular, i0
+
+
+def report(name, direct, tabulated):
+    error = abs(tabulated - direct)
+    print("{}: max abs error {:.2e}, mean abs error {:.2e}, max relative error {:.2%} for deficits above 0.01".format(
+        name, error.max(), error.mean(), (error / direct)[direct > 0.01].max()))
+
+
+if __name__ == '__main__':
+    n_points = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    start = time()
+    table = ainslie_table('1d')
+    print("1D table ready in {:.1f} s".format(time() - start))
+    ct, u0, parallel, perpendicular, i0 = sample(axes_1d, n_points, 1.7)
+    start = time()
+    direct = np.array([ainslie(*point) for point in zip(ct, u0, parallel, perpendicular, i0)])
+    direct_time = time() - start
+    start = time()
+    tabulated = table(ct, u0, parallel, perpendicular, i0)
+    print("1D direct {:.3f} s, tabulated {:.4f} s".format(direct_time, time() - start))
+    report("1D", direct, tabulated)
+
+    start = time()
+    table = ainslie_table('2d')
+    print("2D table ready in {:.1f} s".format(time() - start))
+    ct, u0, parallel, perpendicular, i0 = sample(axes_2d, n_points, 1.99)
+    start = time()
+    direct = ainslie_full(ct, u0, parallel, perpendicular, i0)
+    direct_time = time() - start
+    start = time()
+    tabulated = table(ct, u0, parallel, perpendicular, i0)
+    print("2D direct {:.3f} s, tabulated {:.4f} s".format(direct_time, time() - start))
+    report("2D", direct, tabulated)
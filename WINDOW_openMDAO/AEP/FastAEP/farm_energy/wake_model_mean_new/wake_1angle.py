@@ -1,31 +1,150 @@
-from order_layout import order
+from order_layout import order, order_indices
+import numpy as np
+from WINDOW_openMDAO.src.AbsWakeModel.geometry import wake_pairs
 
 
-def energy_one_angle(original_layout, freestream_wind_speeds, probabilities_speed, wind_angle, ambient_turbulences, WakeModel, PowerModel, table_power, ThrustModel, ct_table, MergingModel):
+def wake_candidates(original_layout, wind_angle, cone):
+    # Turbines in the wake cone of each turbine, by original index, or None to check all of them.
+    if cone is None:
+        return None
+    indices, x, y = np.array(original_layout, dtype=float).T
+    upstream, downstream = wake_pairs(x, y, np.radians(wind_angle), cone)
+    by_upstream = np.argsort(upstream, kind='mergesort')
+    bounds = np.searchsorted(upstream[by_upstream], np.arange(len(original_layout) + 1))
+    return [downstream[by_upstream[bounds[k]:bounds[k + 1]]] for k in range(len(original_layout))]
+
+
+def complete_weak_wakes(deficit_matrix, ordered_layout, cts, wind_angle, freestream, turbulences, WakeModel, cone):
+    # The wake-added turbulence of a turbine comes from the upstream turbine with the largest deficit on it. The pairs
+    # left out by the cone have deficits below cone.threshold, so they can only matter for the turbines without a
+    # larger deficit in some wind speed bin. Those pairs are computed here, within cone.nonzero, for the turbulence
+    # only: the wind speeds keep the deficits of the cone. deficit_matrix[i, j] is in wind order, with the bins along
+    # the last axis.
+    weak = np.any(np.max(deficit_matrix, axis=0) < cone.threshold, axis=-1)
+    candidates = wake_candidates(ordered_layout, wind_angle, cone.nonzero)
+    completed = deficit_matrix.copy()
+    for i in range(len(ordered_layout) - 1):
+        downstream = np.sort(candidates[i][candidates[i] > i])
+        downstream = downstream[weak[downstream] & ~np.any(deficit_matrix[i, downstream], axis=-1)]
+        if len(downstream):
+            completed[i, downstream] = WakeModel(ordered_layout[i], cts[i], [ordered_layout[j] for j in downstream], wind_angle, freestream, turbulences)
+    return completed
+
+
+def energy_one_angle(original_layout, freestream_wind_speeds, probabilities_speed, wind_angle, ambient_turbulences, WakeModel, PowerModel, table_power, ThrustModel, ct_table, MergingModel, cone=None):
+    # All wind speed bins go down the cascade together, along the last axis of the arrays. Returns the deficits of every
+    # bin, deficit_matrix[speed][i][j] being the deficit the i-th turbine in wind order causes on the j-th.
+    # With a cone (geometry.WakeCone), only the turbines in it are passed to WakeModel; the others get no deficit, except
+    # in the returned deficits where they can change the turbulence, see complete_weak_wakes.
     ordered_layout = order(original_layout, wind_angle)
-    energy = 0.0
-    weighted_individuals = [0.0 for _ in range(len(original_layout))]
-
-    def first(x):
-        return x[0]
-    for speed in range(len(freestream_wind_speeds)):
-        ct = []
-        wind_speeds_array = [freestream_wind_speeds[speed]]
-        deficit_matrix = [[] for _ in range(len(ordered_layout))]
-        total_deficit = [0.0]
-        for i in range(len(ordered_layout)):
+    permutation = order_indices(original_layout, wind_angle)
+    n_turbines = len(ordered_layout)
+    freestream = np.array(freestream_wind_speeds, dtype=float)
+    turbulences = np.array(ambient_turbulences, dtype=float)
+
+    candidates = wake_candidates(original_layout, wind_angle, cone)
+    position = np.empty(n_turbines, dtype=int)
+    position[permutation] = np.arange(n_turbines)
+
+    deficit_matrix = np.zeros((n_turbines, n_turbines, len(freestream)))
+    wind_speeds_array = np.zeros((n_turbines, len(freestream)))
+    cts = np.zeros((n_turbines, len(freestream)))
+    for i in range(n_turbines):
+        if i == 0:
+            wind_speeds_array[i] = freestream
+        else:
+            wind_speeds_array[i] = freestream * (1.0 - MergingModel(deficit_matrix[:i, i]))
+        ct = cts[i] = ThrustModel(wind_speeds_array[i], ct_table)
+        if candidates is not None:
+            downstream = np.sort(position[candidates[permutation[i]]])
+            downstream = downstream[downstream > i]
+            if len(downstream):
+                deficit_matrix[i, downstream] = WakeModel(ordered_layout[i], ct, [ordered_layout[j] for j in downstream], wind_angle, freestream, turbulences)
+        elif i < n_turbines - 1:
+            deficit_matrix[i, i + 1:] = WakeModel(ordered_layout[i], ct, ordered_layout[i + 1:], wind_angle, freestream, turbulences)
+    wind_speeds_array_original = np.zeros((n_turbines, len(freestream)))
+    wind_speeds_array_original[permutation] = wind_speeds_array
+    individual_powers = PowerModel(wind_speeds_array_original, table_power)
+    probabilities = np.array(probabilities_speed, dtype=float) / 100.0
+    weighted_individuals = list(np.sum(individual_powers * probabilities, axis=1))
+    energy = np.sum(np.sum(individual_powers, axis=0) * probabilities) * 8760.0
+    if cone is not None:
+        deficit_matrix = complete_weak_wakes(deficit_matrix, ordered_layout, cts, wind_angle, freestream, turbulences, WakeModel, cone)
+    return energy, weighted_individuals, np.moveaxis(deficit_matrix, -1, 0)
+
+
+def energy_one_angle_incremental(previous, moved, original_layout, freestream_wind_speeds, probabilities_speed, wind_angle, ambient_turbulences, WakeModel, PowerModel, table_power, ThrustModel, ct_table, MergingModel, cone=None):
+    # Same as energy_one_angle, but reusing the state this direction had for the previous layout. moved lists the
+    # turbines whose position changed since. Without a previous state, or one for other wind conditions, every turbine
+    # is taken as moved. Returns the new state as well, to be passed in with the next layout.
+    # deficits[k, j] is the deficit turbine k causes on turbine j, by original index, for all wind speed bins. A row is
+    # recomputed only if turbine k moved or its Ct changed in any bin; otherwise only its pairs with the moved turbines
+    # are.
+    n_turbines = len(original_layout)
+    permutation = order_indices(original_layout, wind_angle)
+    position = np.empty(n_turbines, dtype=int)
+    position[permutation] = np.arange(n_turbines)
+    freestream = np.array(freestream_wind_speeds, dtype=float)
+    turbulences = np.array(ambient_turbulences, dtype=float)
+    if previous is not None and not (np.array_equal(previous['freestream'], freestream) and
+                                     np.array_equal(previous['turbulences'], turbulences)):
+        previous = None
+    if previous is None:
+        moved = range(n_turbines)
+        previous = {'order': None, 'deficits': np.zeros((n_turbines, n_turbines, len(freestream))),
+                    'ct': np.full((n_turbines, len(freestream)), np.nan),
+                    'speeds': np.zeros((n_turbines, len(freestream)))}
+    moved = np.array(moved, dtype=int)
+    is_moved = np.zeros(n_turbines, dtype=bool)
+    is_moved[moved] = True
+
+    # The turbines ahead of any change in the ordering have the same upstream turbines as before, so their wind speeds
+    # and Ct are kept. The cascade is re-propagated from the first position after them.
+    start = 0
+    if previous['order'] is not None:
+        while start < n_turbines and permutation[start] == previous['order'][start] and not is_moved[permutation[start]]:
+            start += 1
+
+    candidates = wake_candidates(original_layout, wind_angle, cone)
+    in_cone = np.ones(n_turbines, dtype=bool)
+
+    deficits = previous['deficits'].copy()
+    cts = previous['ct'].copy()
+    wind_speeds = previous['speeds'].copy()
+    for i in range(n_turbines):
+        turbine = permutation[i]
+        changed = False
+        if i >= start:
             if i == 0:
-                pass
+                wind_speeds[turbine] = freestream
             else:
-                total_deficit.append(MergingModel([deficit_matrix[j][i] for j in range(i)]))
-                wind_speeds_array.append(freestream_wind_speeds[speed] * (1.0 - total_deficit[i]))
-            ct.append(ThrustModel(wind_speeds_array[i], ct_table))
-            deficit_matrix[i] = [0.0 for _ in range(i + 1)]
-            deficit_matrix[i] += WakeModel(ordered_layout[i], ct[i], ordered_layout[i + 1:], wind_angle, freestream_wind_speeds[speed], ambient_turbulences[speed])
-        wind_speeds_array_original = [x for (y, x) in sorted(zip([item[0] for item in ordered_layout], wind_speeds_array), key=first)]
-        individual_powers = [PowerModel(wind, table_power) for wind in wind_speeds_array_original]
-        for turb in range(len(individual_powers)):
-            weighted_individuals[turb] += individual_powers[turb] * probabilities_speed[speed] / 100.0
-        farm_power = sum(individual_powers)
-        energy += farm_power * probabilities_speed[speed] / 100.0 * 8760.0
-    return energy, weighted_individuals, deficit_matrix
+                wind_speeds[turbine] = freestream * (1.0 - MergingModel(deficits[permutation[:i], turbine]))
+            ct = ThrustModel(wind_speeds[turbine], ct_table)
+            changed = is_moved[turbine] or np.any(ct != cts[turbine])
+            cts[turbine] = ct
+        if candidates is not None:
+            in_cone[:] = False
+            in_cone[candidates[turbine]] = True
+        if changed:
+            deficits[turbine] = 0.0
+            downstream = permutation[i + 1:]
+        else:
+            deficits[turbine, moved] = 0.0
+            downstream = moved[position[moved] > i]
+        downstream = downstream[in_cone[downstream]]
+        if len(downstream):
+            deficits[turbine, downstream] = WakeModel(original_layout[turbine], cts[turbine], [original_layout[j] for j in downstream], wind_angle, freestream, turbulences)
+
+    individual_powers = PowerModel(wind_speeds, table_power)
+    probabilities = np.array(probabilities_speed, dtype=float) / 100.0
+    weighted_individuals = list(np.sum(individual_powers * probabilities, axis=1))
+    energy = np.sum(np.sum(individual_powers, axis=0) * probabilities) * 8760.0
+
+    # Deficits in wind order, as energy_one_angle returns them.
+    deficit_matrix = deficits[permutation][:, permutation]
+    if cone is not None:
+        deficit_matrix = complete_weak_wakes(deficit_matrix, [original_layout[j] for j in permutation], cts[permutation], wind_angle, freestream, turbulences, WakeModel, cone)
+    deficit_matrix = np.moveaxis(deficit_matrix, -1, 0)
+    state = {'order': permutation, 'deficits': deficits, 'ct': cts, 'speeds': wind_speeds, 'freestream': freestream,
+             'turbulences': turbulences}
+    return energy, weighted_individuals, deficit_matrix, state
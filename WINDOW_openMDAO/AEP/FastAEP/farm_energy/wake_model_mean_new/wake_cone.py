@@ -0,0 +1,26 @@
+import numpy as np
+from WINDOW_openMDAO.input_params import rotor_radius
+from WINDOW_openMDAO.src.AbsWakeModel.geometry import cone_from_deficits
+
+D = 2.0 * rotor_radius
+
+
+def calibrate_cone(WakeModel, thrust_coefficient, wind_speeds, ambient_turbulences, threshold, max_distance=100.0 * D,
+                   distance_step=0.5 * D, max_offset=10.0 * D, offset_step=0.1 * D):
+    # Wake cone of one of the downstream_effects models: the region behind a turbine where its deficit exceeds threshold
+    # for any of the wind speeds. The model is evaluated on a grid behind a turbine at the origin, for wind coming from
+    # angle 0 (along +x), so that the wake goes along -x. Use the largest thrust coefficient the turbines can have, as
+    # wakes grow with it.
+    distances = np.arange(1, int(round(max_distance / distance_step)) + 1) * distance_step
+    offsets = np.arange(0, int(round(max_offset / offset_step)) + 1) * offset_step
+    along, across = [grid.ravel() for grid in np.meshgrid(distances, offsets, indexing='ij')]
+    points = [[n + 1, - along[n], across[n]] for n in range(len(along))]
+    wind_speeds = np.array(wind_speeds, dtype=float)
+    deficits = WakeModel([0, 0.0, 0.0], np.full(wind_speeds.shape, thrust_coefficient), points, 0.0, wind_speeds,
+                         np.array(ambient_turbulences, dtype=float))
+    deficits = deficits.reshape((len(distances), len(offsets), -1))
+    cone = cone_from_deficits(distances, offsets, deficits, threshold)
+    cone.threshold = threshold
+    # Wider cone of every nonzero deficit, for the turbulence, see wake_1angle.complete_weak_wakes.
+    cone.nonzero = cone_from_deficits(distances, offsets, deficits, 0.0)
+    return cone
@@ -1,9 +1,12 @@
-from math import sqrt
+import numpy as np
+
+# Deficits of all upstream turbines come along the first axis. Each can be an array, e.g. over wind speeds, and the
+# total has the same shape.
 
 
 def root_sum_square(array_deficits):
     #  This is one model, root sum square of individual wind speed deficits.
-    total_deficit = sqrt(sum([deficit ** 2.0 for deficit in array_deficits]))
+    total_deficit = np.sqrt(sum([deficit ** 2.0 for deficit in array_deficits]))
     return total_deficit
 
 
@@ -15,14 +18,12 @@ def multiplied(array_deficits):
 
 
 def summed(array_deficits):
-    total_deficit = sum(array_deficits)
-    if total_deficit > 1.0:
-        total_deficit = 1.0
+    total_deficit = np.minimum(sum(array_deficits), 1.0)
     return total_deficit
 
 
 def maximum(array_deficits):
-    return max(array_deficits)
+    return np.max(array_deficits, axis=0)
 
 if __name__ == '__main__':
     deficits = [0.3, 0.4]
@@ -1,5 +1,5 @@
-from numpy import exp
 from WINDOW_openMDAO.input_params import cutin_wind_speed, cutout_wind_speed
+from WINDOW_openMDAO.src.SiteConditionsPrep.windrose_process import cumulative_weibull, weibull_bin_probabilities
 
 
 class WeibullWindBins(object):
@@ -61,7 +61,7 @@ class WeibullWindBins(object):
 
     def cumulative_weibull(self, wind_speed, weibull_scale_dir, weibull_shape_dir):
 
-        return 1.0 - exp(-(wind_speed / weibull_scale_dir) ** weibull_shape_dir)
+        return cumulative_weibull(wind_speed, weibull_scale_dir, weibull_shape_dir)
 
     def get_wind_speeds(self):
         delta = (self.cutout - self.cutin) / self.nbins
@@ -74,30 +74,9 @@ class WeibullWindBins(object):
 
     def speed_probabilities(self):
         self.adapt_directions()
-        speed_probabilities = []
         self.windspeeds = self.get_wind_speeds()
-        # print self.windspeeds
-        for angle in self.new_direction2:
-            place = self.new_direction2.index(angle)
-            prob_cutout = (1.0 - self.cumulative_weibull(self.cutout, self.new_weibull_scale2[place], self.new_weibull_shape2[place]))
-            # print prob_cutout
-            length = len(self.windspeeds)
-            windspeedprobabilities = [0.0 for _ in range(length)]
-
-            for i in range(length):
-
-                if i == 0:
-
-                    windspeedprobabilities[i] = (self.cumulative_weibull(self.windspeeds[i], self.new_weibull_scale2[place], self.new_weibull_shape2[place]))
-
-                elif i < length - 1:
-
-                    windspeedprobabilities[i] = (self.cumulative_weibull(self.windspeeds[i], self.new_weibull_scale2[place], self.new_weibull_shape2[place]) - sum(windspeedprobabilities[:i]))
-
-                elif i == length - 1:
-
-                    windspeedprobabilities[i] = (self.cumulative_weibull(self.windspeeds[i], self.new_weibull_scale2[place], self.new_weibull_shape2[place]) - sum(windspeedprobabilities[:i]) + prob_cutout)
-
-            speed_probabilities.append([item * 100.0 for item in windspeedprobabilities])
-        # print [sum(i) for i in speed_probabilities]
+        probabilities = weibull_bin_probabilities(self.windspeeds, self.new_weibull_scale2, self.new_weibull_shape2)
+        # Speeds above cut-out count in the last bin.
+        probabilities[:, -2] += probabilities[:, -1]
+        speed_probabilities = (probabilities[:, :-1] * 100.0).tolist()
         return [self.windspeeds for _ in range(len(self.new_direction2))], speed_probabilities
@@ -1,5 +1,6 @@
-from numpy import exp
 from WINDOW_openMDAO.input_params import cutin_wind_speed, cutout_wind_speed
+from WINDOW_openMDAO.src.SiteConditionsPrep.windrose_process import cumulative_weibull, weibull_bin_probabilities, \
+    gauss_weibull_speeds
 
 
 class WeibullWindBins(object):
@@ -12,6 +13,10 @@ class WeibullWindBins(object):
         self.dir_probability = []
         self.cutin = cutin_wind_speed
         self.cutout = cutout_wind_speed
+        # 'bins': nbins uniform bins between cut-in and cut-out, and one below and one above them. 'gauss': nbins + 1
+        # Gauss nodes per direction between cut-in and cut-out, as in the OpenMDAO workflows, see gauss_weibull_speeds.
+        self.integration = 'bins'
+        self.breakpoints = []
 
         with open(self.windrose_file, 'r') as windrose:
 
@@ -61,7 +66,7 @@ class WeibullWindBins(object):
 
     def cumulative_weibull(self, wind_speed, weibull_scale_dir, weibull_shape_dir):
 
-        return 1.0 - exp(-(wind_speed / weibull_scale_dir) ** weibull_shape_dir)
+        return cumulative_weibull(wind_speed, weibull_scale_dir, weibull_shape_dir)
 
     def get_wind_speeds(self):
         delta = (self.cutout - self.cutin) / self.nbins
@@ -74,30 +79,14 @@ class WeibullWindBins(object):
 
     def speed_probabilities(self):
         self.adapt_directions()
-        speed_probabilities = []
+        if self.integration == 'gauss':
+            speeds, probabilities = gauss_weibull_speeds(self.nbins + 1, self.new_weibull_scale2, self.new_weibull_shape2,
+                                                         self.cutin, self.cutout, self.breakpoints)
+            return speeds.tolist(), (probabilities * 100.0).tolist()
+        elif self.integration != 'bins':
+            raise ValueError("integration should be 'bins' or 'gauss'.")
         self.windspeeds, delta = self.get_wind_speeds()
-        # print self.windspeeds
-        for angle in self.new_direction2:
-            place = self.new_direction2.index(angle)
-            prob_cutout = (1.0 - self.cumulative_weibull(self.windspeeds[-1], self.new_weibull_scale2[place], self.new_weibull_shape2[place]))
-            # print prob_cutout
-            length = len(self.windspeeds)
-            windspeedprobabilities = [0.0 for _ in range(length)]
-
-            for i in range(length):
-
-                if i == 0:
-
-                    windspeedprobabilities[i] = (self.cumulative_weibull(self.cutin, self.new_weibull_scale2[place], self.new_weibull_shape2[place]))
-
-                elif i < length - 1:
-
-                    windspeedprobabilities[i] = (self.cumulative_weibull(self.windspeeds[i+1], self.new_weibull_scale2[place], self.new_weibull_shape2[place]) - sum(windspeedprobabilities[:i]))
-
-                elif i == length - 1:
-
-                    windspeedprobabilities[i] = prob_cutout
-
-            speed_probabilities.append([item * 100.0 for item in windspeedprobabilities])
-        # print [sum(i) for i in speed_probabilities]
+        # The first speed stands for everything below cut-in and the last for everything above cut-out + 1.
+        probabilities = weibull_bin_probabilities(self.windspeeds[1:], self.new_weibull_scale2, self.new_weibull_shape2)
+        speed_probabilities = (probabilities * 100.0).tolist()
         return [self.windspeeds for _ in range(len(self.new_direction2))], speed_probabilities
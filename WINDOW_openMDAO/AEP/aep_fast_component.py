@@ -1,13 +1,28 @@
 from openmdao.api import ExplicitComponent
 from WINDOW_openMDAO.input_params import max_n_turbines
 
-from WINDOW_openMDAO.AEP.FastAEP.call_aep_workflow_once import call_aep
+from WINDOW_openMDAO.AEP.FastAEP.call_aep_workflow_once import build_workflow
 
 
 class AEPFast(ExplicitComponent):
     def __init__(self, wake_model, turbulence_model, merge_model, artif_angles, nbins, windrose_file, power_curve_file,
-                 ct_curve_file):
+                 ct_curve_file, incremental=False, executor='serial', workers=None, wake_threshold=None, integration='bins', breakpoints=(),
+                 keep_wake_cache=False):
         super(AEPFast, self).__init__()
+        # The workflow, with the windrose discretisation and the power and Ct curves, is built once in setup() and only
+        # the wakes are evaluated in compute(). With incremental, only the turbines that moved since the previous layout
+        # are re-evaluated. With a 'thread' or 'process' executor, wind directions are evaluated by a pool of workers,
+        # kept between calls. With a wake_threshold, pairs of turbines outside the wake cone for that deficit are skipped.
+        # With keep_wake_cache, the in-wake checks of one layout are kept for the next ones.
+        self.incremental = incremental
+        self.keep_wake_cache = keep_wake_cache
+        self.wake_threshold = wake_threshold
+        # Wind speeds as uniform 'bins' or nbins + 1 'gauss' nodes per direction, see WeibullWindBins.
+        self.integration = integration
+        self.breakpoints = breakpoints
+        self.executor = executor
+        self.workers = workers
+        self.workflow = None
         self.artif_angles = artif_angles
         self.nbins = nbins
         self.windrose_file = windrose_file
@@ -19,27 +34,36 @@ class AEPFast(ExplicitComponent):
 
     def setup(self):
         self.add_input("layout", shape=(max_n_turbines, 2))
+        # Turbines actually in the layout; the remaining rows are padding and are not evaluated.
+        self.add_input("n_turbines", val=max_n_turbines)
         self.add_output("AEP", val=0.0)
         self.add_output("max_TI", shape=max_n_turbines)
         self.add_output("efficiency", val=0.0)
 
+        if self.workflow is not None:
+            self.workflow.close()
+        self.workflow = build_workflow(self.wake_model, self.turbulence_model, self.merge_model, self.power_curve_file,
+                                       self.ct_curve_file, self.windrose_file, self.nbins, self.artif_angles,
+                                       self.integration, self.breakpoints)
+        self.workflow.incremental = self.incremental
+        self.workflow.executor = self.executor
+        self.workflow.workers = self.workers
+        self.workflow.wake_threshold = self.wake_threshold
+        self.workflow.keep_wake_cache = self.keep_wake_cache
+
     def compute(self, inputs, outputs):
-        layout2 = inputs["layout"]
+        layout2 = inputs["layout"][:int(inputs["n_turbines"])]
         layout = []
         for t in layout2:
             if t[0] >= 0.0 and t[1] >= 0.0:
                 layout.append(t)
         diff = max_n_turbines - len(layout)
-        AEP, max_TI, efficiency = fun_aep_fast(self.wake_model, self.turbulence_model, self.merge_model,
-                                               self.power_curve_file, self.ct_curve_file, self.windrose_file, layout,
-                                               self.nbins, self.artif_angles)
+        AEP, max_TI, efficiency = self.workflow.run(layout)
         max_TI += [0.0 for _ in range(diff)]
         outputs['AEP'], outputs['max_TI'], outputs['efficiency'] = AEP, max_TI, efficiency
         # outputs['AEP'] = 2710828306070.0
 
-
-def fun_aep_fast(wake_model, turbulence_model, merge_model, power_curve_file, ct_curve_file, windrose_file, layout,
-                 nbins, artif_angle):
-
-    return call_aep(wake_model, turbulence_model, merge_model, power_curve_file, ct_curve_file, windrose_file, layout,
-                    nbins, artif_angle)
+    def close(self):
+        # Stops the workers of the workflow's pool, which are otherwise kept until the program exits.
+        if self.workflow is not None:
+            self.workflow.close()
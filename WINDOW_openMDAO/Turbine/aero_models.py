@@ -1,39 +1,32 @@
 from numpy import pi
+import numpy as np
+import os
 from WINDOW_openMDAO.input_params import cutout_wind_speed, cutin_wind_speed, rotor_radius, wind_speed_at_max_thrust as rated_wind, turbine_rated_power as rated_power
 
+# Tables already read, keyed by path and modification time so that an edited file is read again.
+curve_cache = {}
+
+
 def interpolate(minx, miny, maxx, maxy, valx):
     return miny + (maxy - miny) * ((valx - minx) / (maxx - minx))
 
+
+def read_curve(file_in):
+    key = (os.path.abspath(file_in), os.path.getmtime(file_in))
+    if key not in curve_cache:
+        table = np.loadtxt(file_in, usecols=(0, 1), ndmin=2)
+        curve_cache[key] = table[:, 0], table[:, 1]
+    return curve_cache[key]
+
+
 class AeroLookup:
 
     def __init__(self, file_in):
-
-        with open(file_in, "r") as data:
-            self.x = []
-            self.y = []
-            for line in data:
-                col = line.split()
-                self.x.append(float(col[0]))
-                self.y.append(float(col[1]))
+        self.x, self.y = read_curve(file_in)
 
     def interpolation(self, value):
-        ii = 0
-        lower = []
-        upper = []
-        if value <= self.x[0]:
-            result = self.y[0]
-        elif value < self.x[-1]:
-            for x in self.x:
-                if x <= value:
-                    lower = [x, self.y[ii]]
-                else:
-                    upper = [x, self.y[ii]]
-                    break
-                ii += 1
-            result = interpolate(float(lower[0]), float(lower[1]), float(upper[0]), float(upper[1]), value)
-        else:
-            result = self.y[-1]
-        return result
+        # Linear interpolation of one speed or an array of speeds, constant beyond the ends of the table.
+        return np.interp(value, self.x, self.y)
 
 
 def power(wind_speed, power_lookup_file, cutin=cutin_wind_speed, cutout=cutout_wind_speed, rated=rated_wind, r=rotor_radius):
@@ -0,0 +1,6 @@
+from WINDOW_openMDAO.src.api import AbsTurbine
+
+
+class Polynomial(AbsTurbine):
+    # The polynomial default model of AbsTurbine, called once with the wind speeds of all cases.
+    batched = True
@@ -5,44 +5,27 @@ from numpy import sqrt
 
 
 class Frandsen2(AbstractWakeAddedTurbulence):
+    batched = True
 
     def TI_model(self, ambient_turbulence, ct, wind_speed, spacing):
         return sqrt(1.2 * ct / spacing ** 2.0 + ambient_turbulence ** 2.0)
 
 
 class DanishRecommendation(AbstractWakeAddedTurbulence):
+    batched = True
 
     def TI_model(self, ambient_turbulence, ct, wind_speed, spacing):
 
         def beta_v(u):
-            if u < 12.0:
-                beta = 1.0
-            elif u < 20.0:
-                beta = 1.747 - 0.0625 * u
-            else:
-                beta = 0.5
-            return beta
+            return np.select([u < 12.0, u < 20.0], [1.0, 1.747 - 0.0625 * u], 0.5)
 
         # Beta_l, x is turbine spacing
 
         def beta_l(d, cluster=True):
             if cluster:
-                if d < 2.9838:
-                    beta = 1.0
-                elif d < 5.9856:
-                    beta = 1.333 - 0.1116 * d
-                else:
-                    beta = 0.665
-
+                return np.select([d < 2.9838, d < 5.9856], [1.0, 1.333 - 0.1116 * d], 0.665)
             else:
-                if d < 5.0:
-                    beta = 1.0
-                elif d < 10.0:
-                    beta = 1.333 - 0.067 * d
-                else:
-                    beta = 0.665
-
-            return beta
+                return np.select([d < 5.0, d < 10.0], [1.0, 1.333 - 0.067 * d], 0.665)
 
         Iw = 0.15 * beta_v(wind_speed) * beta_l(spacing)
         Ia = ambient_turbulence
@@ -52,6 +35,7 @@ class DanishRecommendation(AbstractWakeAddedTurbulence):
 
 
 class Larsen(AbstractWakeAddedTurbulence):
+    batched = True
 
     def TI_model(self, ambient_turbulence, ct, wind_speed, spacing):
 
@@ -66,6 +50,8 @@ class Larsen(AbstractWakeAddedTurbulence):
 
 
 class Frandsen(AbstractWakeAddedTurbulence):
+    batched = True
+
     def TI_model(self, ambient_turbulence, ct, wind_speed, spacing, large=False):
         #  For spacings smaller than 10D
         Ia = ambient_turbulence
@@ -89,11 +75,11 @@ class Frandsen(AbstractWakeAddedTurbulence):
 
 
 class Quarton(AbstractWakeAddedTurbulence):
+    batched = True
 
     def TI_model(self, ambient_turbulence, ct, wind_speed, spacing, tsr=7.6):
         D = 40.0 * 2.0
-        spacing *= D
-        x = spacing
+        x = spacing * D
         Ia = ambient_turbulence
         K1 = 5.7#4.8
         a1 = 0.7
@@ -102,10 +88,7 @@ class Quarton(AbstractWakeAddedTurbulence):
         m = sqrt(1.0 / (1.0 - ct))
         r0 = D / 2.0 * sqrt((m + 1.0) / 2.0)
 
-        if Ia >= 0.02:
-            da = 2.5 * Ia + 0.05
-        else:
-            da = 5.0 * Ia
+        da = np.where(Ia >= 0.02, 2.5 * Ia + 0.05, 5.0 * Ia)
 
         B = 3  # Number of blades
         L = tsr  # Tip speed ratio
@@ -6,11 +6,12 @@ from WINDOW_openMDAO.src.api import AbstractWakeMerge
 
 
 class MergeRSS(AbstractWakeMerge):
+    batched = True
 
-    def merge_model(self, defs):  
+    def merge_model(self, defs, axis=-1):
 
         sq = defs ** 2.0
-        summation = sum(sq)
+        summation = np.sum(sq, axis=axis)
         case_ans = sqrt(summation)
         return case_ans
 
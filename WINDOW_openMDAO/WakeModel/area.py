@@ -1,8 +1,34 @@
 from numpy import pi, arccos, sin, sqrt
+import numpy as np
 
 __author__ = 'Sebastian Sanchez Perez Moreno' \
              's.sanchezperezmoreno@tudelft.nl'
 
+
+def overlap_fraction(r, R, d):
+    # Fraction of the circle of radius r covered by a circle of radius R whose centre is at a distance d.
+    # Accepts whole arrays of (r, R, d); full, partial and no overlap are then selected with masks.
+    if np.ndim(r) == np.ndim(R) == np.ndim(d) == 0:
+        # Plain branches for single pairs, where array overhead would dominate.
+        if d <= abs(r - R):
+            return 1.0
+        elif abs(r - R) < d < abs(r + R):
+            return lens_fraction(r, R, d)
+        else:
+            return 0.0
+    r, R, d = np.broadcast_arrays(np.asarray(r, dtype=float), np.asarray(R, dtype=float), np.asarray(d, dtype=float))
+    fraction = np.zeros(d.shape)
+    fraction[d <= abs(r - R)] = 1.0
+    partial = (abs(r - R) < d) & (d < abs(r + R))
+    fraction[partial] = lens_fraction(r[partial], R[partial], d[partial])
+    return fraction
+
+
+def lens_fraction(r, R, d):
+    # Closed-form lens area of two partially overlapping circles, normalised by the area of the first one.
+    return (r ** 2 * arccos((d ** 2 + r ** 2 - R ** 2) / (2.0 * d * r)) + R ** 2 * arccos((d ** 2 + R ** 2 - r ** 2) / (2.0 * d * R)) - 0.5 * sqrt((- d + r + R) * (d + r - R) * (d - r + R) * (d + r + R))) / (pi * r ** 2)
+
+
 class AreaReal:
     def __init__(self, r, R, d):
         self.r = r
@@ -10,15 +36,7 @@ class AreaReal:
         self.d = d
 
     def area(self):
-        r = self.r
-        R = self.R
-        d = self.d
-        if d <= abs(r - R):
-            return 1.0
-        elif abs(r - R) < d < abs(r + R):
-            return (r ** 2 * arccos((d ** 2 + r ** 2 - R ** 2) / (2.0 * d * r)) + R ** 2 * arccos((d ** 2 + R ** 2 - r ** 2) / (2.0 * d * R)) - 0.5 * sqrt((- d + r + R) * (d + r - R) * (d - r + R) * (d + r + R))) / (pi * r ** 2)
-        else:
-            return 0.0
+        return overlap_fraction(self.r, self.R, self.d)
 
 
 if __name__ == '__main__':
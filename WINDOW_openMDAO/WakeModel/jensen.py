@@ -1,4 +1,4 @@
-from area import AreaReal
+from area import overlap_fraction
 from WINDOW_openMDAO.src.api import DetermineIfInWake, WakeDeficit
 from numpy import deg2rad, sqrt, cos, sin
 import numpy as np
@@ -6,6 +6,8 @@ from WINDOW_openMDAO.input_params import max_n_turbines
 
 
 class JensenWakeDeficit(WakeDeficit):
+    batched = True
+
     def setup(self):
         super(JensenWakeDeficit, self).setup()
 
@@ -14,11 +16,13 @@ class JensenWakeDeficit(WakeDeficit):
 
 
 class JensenWakeFraction(DetermineIfInWake):
+    batched = True
+
     def setup(self):
         super(JensenWakeFraction, self).setup()
 
     def wake_fraction_model(self, inputs, *args, **kwargs):
-        return determine_if_in_wake(k_jensen=0.04, *args, **kwargs)
+        return determine_if_in_wake_batch(k_jensen=0.04, *args, **kwargs)
 
 
 def wake_deficit1(x_down, x_cross, Ct, k_jensen, r0):
@@ -32,19 +36,20 @@ def determine_if_in_wake(x_upstream, y_upstream, x_downstream, y_downstream, win
     radius = jensen_wake_radius(downwind_d, radius, k_jensen)
     fraction = 0.0
     if (x_downstream - x_upstream) * cos(wind_direction) + (y_downstream - y_upstream) * sin(wind_direction) <= 0.0:
-        if abs(radius) >= abs(crosswind_d):
-            if abs(radius) >= abs(crosswind_d) + radius:
-                fraction = 1.0
-            elif abs(radius) < abs(crosswind_d) + radius:
-                fraction = AreaReal(radius, radius, crosswind_d).area()
-        elif abs(radius) < abs(crosswind_d):
-            if abs(radius) <= abs(crosswind_d) - radius:
-                pass
-            elif abs(radius) > abs(crosswind_d) - radius:
-                fraction = AreaReal(radius, radius, crosswind_d).area()
+        fraction = overlap_fraction(radius, radius, crosswind_d)
     return np.array(fraction)
 
 
+def determine_if_in_wake_batch(x_upstream, y_upstream, x_downstream, y_downstream, wind_direction, downwind_d,
+                               crosswind_d, radius, k_jensen):
+    # Array version of determine_if_in_wake. The same branches are evaluated as masks over all pairs.
+    wind_direction = - np.asarray(wind_direction) + 90.0
+    wind_direction = deg2rad(wind_direction + 180.0)
+    radius = jensen_wake_radius(downwind_d, radius, k_jensen)
+    behind = (x_downstream - x_upstream) * cos(wind_direction) + (y_downstream - y_upstream) * sin(wind_direction) <= 0.0
+    return np.where(behind, overlap_fraction(radius, radius, crosswind_d), 0.0)
+
+
 def jensen_wake_radius(x_down, r0, k_jensen):
     return r0 + k_jensen * x_down
 
@@ -22,6 +22,8 @@ class WorkingGroup(Group):
         self.apex_model = options.models.apex
         self.windspeed_sampling_points = options.samples.wind_speeds
         self.direction_sampling_angle = options.samples.wind_sectors_angle
+        self.integration = options.samples.integration
+        self.breakpoints = options.samples.breakpoints
         self.n_cases = int((360.0 / self.direction_sampling_angle) * (self.windspeed_sampling_points + 1.0))
         self.windrose_file = options.input.site.windrose_file
         self.bathymetry_file = options.input.site.bathymetry_file
@@ -51,7 +53,7 @@ class WorkingGroup(Group):
         self.add_subsystem('depths', RoughClosestNode(max_n_turbines, self.bathymetry_file))
         self.add_subsystem('platform_depth', RoughClosestNode(max_n_substations, self.bathymetry_file))
 
-        self.add_subsystem('AeroAEP', self.aep_model(self.wake_model, self.turbulence_model, self.merge_model, self.direction_sampling_angle, self.windspeed_sampling_points, self.windrose_file, self.power_curve_file, self.ct_curve_file))
+        self.add_subsystem('AeroAEP', self.aep_model(self.wake_model, self.turbulence_model, self.merge_model, self.direction_sampling_angle, self.windspeed_sampling_points, self.windrose_file, self.power_curve_file, self.ct_curve_file, integration=self.integration, breakpoints=self.breakpoints))
 
         self.add_subsystem('electrical', self.electrical_model())
 
@@ -69,7 +71,7 @@ class WorkingGroup(Group):
         self.connect("indep2.layout_angle", "regular_layout.layout_angle")
         self.connect("regular_layout.regular_layout", ["numberlayout.orig_layout", "AeroAEP.layout"])
 
-        self.connect("regular_layout.n_turbines_regular", ['electrical.n_turbines', 'support.n_turbines', 'Costs.n_turbines'])
+        self.connect("regular_layout.n_turbines_regular", ['AeroAEP.n_turbines', 'depths.n_turbines', 'electrical.n_turbines', 'support.n_turbines', 'Costs.n_turbines'])
 
         self.connect('numberlayout.number_layout', 'depths.layout')
 
@@ -18,12 +18,7 @@ class FarmAeroPower(ExplicitComponent):
 
     def compute(self, inputs, outputs):
         n_turbines = int(inputs['n_turbines'])
-        ans = np.array([])
-        for case in range(self.n_cases):
-            farm_output = sum(inputs['ind_powers'][case][:n_turbines])  # Alternative without using n_turbines.
-            ans = np.append(ans, farm_output)
-        ans = ans.reshape(self.n_cases)
-        outputs['farm_power'] = ans
+        outputs['farm_power'] = np.sum(inputs['ind_powers'][:, :n_turbines], axis=1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,50 @@
+from openmdao.api import ExplicitComponent
+import numpy as np
+
+
+class CasePruning(ExplicitComponent):
+    # Marks the windrose cases worth a wake calculation in 'active'. The others are evaluated without wakes, at their
+    # free stream power:
+    # - cases with probability zero or below min_probability, or whose energy, even with the whole farm at its free
+    #   stream power, is below min_energy (Wh).
+    # - with max_deficit, cases where the power curve is flat from the free stream speed down to that speed reduced by
+    #   max_deficit, i.e. above rated or below cut-in. These are exact as long as no merged deficit exceeds max_deficit.
+    # AEP_error_bound is the most the AEP can be off by because of the first kind: with wakes, their power would be
+    # between zero and the free stream power they are given.
+    # The wake-added turbulence is not bounded: inactive cases get no deficits (dU = 0), so the TI workflow sees them as
+    # unwaked, at the ambient turbulence, and max_TI only covers the active cases. With max_deficit these include the
+    # cases above rated, where the loads are largest, so keep pruning off when max_TI sizes the support structure.
+    def __init__(self, n_cases, turbine_model, min_probability=0.0, min_energy=0.0, max_deficit=None):
+        super(CasePruning, self).__init__()
+        self.n_cases = n_cases
+        # Only instantiated to reuse its model method, as VectorizedWake does.
+        self.turbine = turbine_model(0, n_cases)
+        self.min_probability = min_probability
+        self.min_energy = min_energy
+        self.max_deficit = max_deficit
+
+    def setup(self):
+        self.add_input('cases', shape=(self.n_cases, 2))
+        self.add_input('probabilities', shape=self.n_cases)
+        self.add_input('n_turbines', val=1)
+
+        self.add_output('active', shape=self.n_cases)
+        self.add_output('AEP_error_bound', val=0.0)
+
+    def compute(self, inputs, outputs):
+        freestream = inputs['cases'][:, 1]
+        probabilities = inputs['probabilities']
+        free_energy = probabilities * int(inputs['n_turbines']) * self.power(freestream) * 8760.0
+
+        dropped = (probabilities == 0.0) | (probabilities < self.min_probability) | (free_energy < self.min_energy)
+        flat = np.zeros(self.n_cases, dtype=bool)
+        if self.max_deficit is not None:
+            flat = self.power(freestream) == self.power(freestream * (1.0 - self.max_deficit))
+
+        outputs['active'] = ~(dropped | flat)
+        outputs['AEP_error_bound'] = np.sum(free_energy[dropped & ~flat])
+
+    def power(self, u):
+        if self.turbine.batched:
+            return self.turbine.turbine_model(u)[1]
+        return np.vectorize(self.turbine.turbine_model, otypes=[float, float])(u)[1]
@@ -1,14 +1,27 @@
 from openmdao.api import Group, ExplicitComponent
 from WINDOW_openMDAO.src.AbsWakeModel.wake_linear_solver import WakeModel
+from WINDOW_openMDAO.src.AbsWakeModel.wake_vectorized import VectorizedWakeModel
 from WINDOW_openMDAO.src.AbsAEP.abstract_power import FarmAeroPower
 from WINDOW_openMDAO.src.SiteConditionsPrep.windrose_process import WindrosePreprocessor
 from WINDOW_openMDAO.src.AbsAEP.open_cases import OpenCases
+from WINDOW_openMDAO.src.AbsAEP.case_pruning import CasePruning
 from time import clock
 
 
 class AEPWorkflow(Group):
-    def __init__(self, real_angle, artificial_angle, n_windspeedbins, fraction_model, deficit_model, merge_model, turbine_model):
+    def __init__(self, real_angle, artificial_angle, n_windspeedbins, fraction_model, deficit_model, merge_model, turbine_model, wake_group=WakeModel, min_probability=0.0, min_energy=0.0, max_deficit=None, integration='bins', breakpoints=()):
         super(AEPWorkflow, self).__init__()
+        # Cases below min_probability or min_energy, or insensitive to deficits up to max_deficit, skip the wake model,
+        # see CasePruning. Only VectorizedWakeModel can skip cases.
+        self.prune_cases = min_probability > 0.0 or min_energy > 0.0 or max_deficit is not None
+        if self.prune_cases and not issubclass(wake_group, VectorizedWakeModel):
+            raise ValueError('Pruning windrose cases needs VectorizedWakeModel as wake_group.')
+        # Wind speeds as uniform 'bins' or as 'gauss' nodes, see WeibullWindBins.
+        self.integration = integration
+        self.breakpoints = breakpoints
+        self.min_probability = min_probability
+        self.min_energy = min_energy
+        self.max_deficit = max_deficit
         self.real_angle = real_angle
         self.artificial_angle = artificial_angle
         self.n_windspeedbins = n_windspeedbins
@@ -19,16 +32,22 @@ class AEPWorkflow(Group):
         self.deficit_model = deficit_model
         self.merge_model = merge_model
         self.turbine_model = turbine_model
+        self.wake_group = wake_group
 
     def setup(self):
         self.add_subsystem('windrose', WindrosePreprocessor(self.real_angle, self.artificial_angle,
-                                                            self.n_windspeedbins), promotes_inputs=['cut_in', 'cut_out',
+                                                            self.n_windspeedbins, self.integration,
+                                                            self.breakpoints), promotes_inputs=['cut_in', 'cut_out',
                                                                                                     'weibull_shapes',
                                                                                                     'weibull_scales',
                                                                                                     'dir_probabilities',
                                                                                                     'wind_directions'])
         self.add_subsystem('open_cases', OpenCases(self.n_cases))
-        self.add_subsystem('wakemodel', WakeModel(self.n_cases, self.fraction_model, self.deficit_model, self.merge_model, self.turbine_model),
+        if self.prune_cases:
+            self.add_subsystem('pruning', CasePruning(self.n_cases, self.turbine_model, self.min_probability,
+                                                      self.min_energy, self.max_deficit),
+                               promotes_inputs=['n_turbines'], promotes_outputs=['AEP_error_bound'])
+        self.add_subsystem('wakemodel', self.wake_group(self.n_cases, self.fraction_model, self.deficit_model, self.merge_model, self.turbine_model),
                            promotes_inputs=['turbine_radius', 'original', 'n_turbines'])
         self.add_subsystem('farmpower', FarmAeroPower(self.n_cases), promotes_inputs=['n_turbines'])
         self.add_subsystem('energy', PowersToAEP(self.artificial_angle, self.n_windspeedbins),
@@ -39,6 +58,10 @@ class AEPWorkflow(Group):
         self.connect('open_cases.freestream_wind_speeds', 'wakemodel.freestream')
         self.connect('open_cases.wind_directions', 'wakemodel.angle')
         self.connect('wakemodel.p', 'farmpower.ind_powers')
+        if self.prune_cases:
+            self.connect('windrose.cases', 'pruning.cases')
+            self.connect('windrose.probabilities', 'pruning.probabilities')
+            self.connect('pruning.active', 'wakemodel.active')
         self.connect('farmpower.farm_power', 'energy.powers')
 
 
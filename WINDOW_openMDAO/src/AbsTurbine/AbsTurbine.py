@@ -3,7 +3,44 @@ from WINDOW_openMDAO.input_params import max_n_turbines, turbine_rated_power
 import numpy as np
 
 
+class TurbineChain(object):
+    # Ct of all ordered turbines, shared by the turbine and wake deficit components of one LinearSolveWake. Each
+    # turbine writes its own column in place, and the deficits of a turbine read the columns of the turbines upstream
+    # instead of receiving them as (n_cases, max_n_turbines) arrays. This relies on the components running in order in
+    # the same process, from turbine0, so running any of them out of order, as finite differences or rerunning a single
+    # component do, raises a RuntimeError.
+    def __init__(self, n_cases):
+        self.ct = np.zeros((n_cases, max_n_turbines))
+        # Number of the turbine expected to run next.
+        self.next = 0
+
+    def write(self, number, c_t):
+        # Ct evaluated by turbine{number}, of the turbine in ordered position number - 1.
+        if number == 0:
+            # A new evaluation of the chain starts at the front turbine.
+            self.ct[:] = 0.0
+        elif number != self.next:
+            raise RuntimeError('turbine{} ran out of order in its TurbineChain, expected turbine{}.'.format(number,
+                                                                                                        self.next))
+        else:
+            self.ct[:, number - 1] = c_t
+        self.next = number + 1
+
+    def read(self, number):
+        # Ct of the turbines upstream of ordered position number, for its wake deficits, which run right after
+        # turbine{number}.
+        if number + 1 != self.next:
+            raise RuntimeError('The wake deficits of turbine {} ran out of order in their TurbineChain.'.format(number))
+        return self.ct
+
+
 class AbsTurbine(ExplicitComponent):
+    # turbine_model is called with the wind speed of one case. Subclasses whose turbine_model takes the array of the
+    # wind speeds of all cases set this to True to be called once for all of them.
+    batched = False
+    # TurbineChain shared with the other turbines and the wake deficits, which read the Ct of the turbines upstream
+    # from it. The components can then only run in order, see TurbineChain.
+    chain = None
 
     def __init__(self, number, n_cases):
         super(AbsTurbine, self).__init__()
@@ -12,78 +49,39 @@ class AbsTurbine(ExplicitComponent):
 
     def setup(self):
         self.add_input('n_turbines', val=0)
-        if self.number < max_n_turbines:
-            for n in range(self.number):
-                self.add_input('U{}'.format(n), shape=self.n_cases)
-                # self.declare_partals(of=['ct', 'power'], wrt=['U{}'.format(n)], method='fd')
-        else:
-            self.add_input('U{}'.format(max_n_turbines - 1), shape=self.n_cases)
-            # self.declare_partals(of=['ct', 'power'], wrt=['U{}'.format(max_n_turbines - 1)], method='fd')
         if self.number > 0:
-            self.add_input('prev_turbine_ct', shape=(self.n_cases, max_n_turbines))
-            self.add_input('prev_turbine_p', shape=(self.n_cases, max_n_turbines))
-            # self.declare_partals(of=['ct', 'power'], wrt=['prev_turbine_ct', 'prev_turbine_p'], method='fd')
-        self.add_output('ct', shape=(self.n_cases, max_n_turbines))
-        self.add_output('power', shape=(self.n_cases, max_n_turbines))
+            # Only the wind speed at the previous turbine is needed.
+            self.add_input('U{}'.format(self.number - 1), shape=self.n_cases)
+            # self.declare_partals(of=['ct', 'power'], wrt=['U{}'.format(self.number - 1)], method='fd')
+        # Ct and power of the turbine in ordered position number - 1, evaluated here. turbine0 evaluates none.
+        self.add_output('ct', shape=self.n_cases)
+        self.add_output('power', shape=self.n_cases)
 
         # Finite difference all partials.
         # self.declare_partals(of=['ct', 'power'], wrt=['n_turbines'], method='fd')
 
     def compute(self, inputs, outputs):
-        # print "2 Turbine"
-        # for n in range(max_n_turbines):
-        #     if n != self.number:
-                # print inputs['U{}'.format(n)], "Input U{}".format(n)
-
-        c_t_ans = np.array([])
-        power_ans = np.array([])
-        for case in range(self.n_cases):
-            if self.number > 0:
-                prev_turbine_p = inputs['prev_turbine_p'][case]
-                prev_turbine_ct = inputs['prev_turbine_ct'][case]
-            n_turbines = int(inputs['n_turbines'])
-            c_t = np.array([])
-            power = np.array([])
-            # if self.number == 0:
-            #     ct, p = self.turbine_model(8.5)
-            #     c_t = np.append(c_t, [ct])
-            #     power = np.append(power, [p])
-            for n in range(self.number):
-                if n == self.number - 1:
-                    ct, p = self.turbine_model(inputs['U{}'.format(n)][case])
-                else:
-                    ct = prev_turbine_ct[n]
-                    p = prev_turbine_p[n]
-                c_t = np.append(c_t, [ct])
-                power = np.append(power, [p])
-            lendif = max_n_turbines - len(c_t)
-            # print c_t
-            c_t = np.concatenate((c_t, [0 for _ in range(lendif)]))
-            power = np.concatenate((power, [0 for _ in range(lendif)]))
-            c_t_ans = np.append(c_t_ans, c_t)
-            power_ans = np.append(power_ans, power)
-        c_t_ans = c_t_ans.reshape(self.n_cases, max_n_turbines)
-        power_ans = power_ans.reshape(self.n_cases, max_n_turbines)
-        # print c_t_ans
-        outputs['ct'] = c_t_ans
-        outputs['power'] = power_ans
+        # Padded slots beyond n_turbines are not evaluated and stay zero.
+        n_turbines = int(inputs['n_turbines'])
+        c_t = np.zeros(self.n_cases)
+        power = np.zeros(self.n_cases)
+        last = self.number - 1
+        if 0 <= last < n_turbines:
+            u = inputs['U{}'.format(last)]
+            if self.batched:
+                c_t[:], power[:] = self.turbine_model(u)
+            else:
+                for case in range(self.n_cases):
+                    c_t[case], power[case] = self.turbine_model(u[case])
+        if self.chain is not None:
+            self.chain.write(self.number, c_t)
+        outputs['ct'] = c_t
+        outputs['power'] = power
 
     def turbine_model(self, u):
-    	if u < 4.0:
-            ct = 0.1
-        elif u <= 25.0:
-            ct = 7.3139922126945e-7 * u ** 6.0 - 6.68905596915255e-5 * u ** 5.0 + 2.3937885e-3 * u ** 4.0 - 0.0420283143 * u ** 3.0 + 0.3716111285 * u ** 2.0 - 1.5686969749 * u + 3.2991094727
-        else:
-            ct = 0.1
+        # Polynomial fit of the DTU 10 MW turbine. Also takes an array of wind speeds, see Polynomial.
+        ct = np.where((u >= 4.0) & (u <= 25.0), 7.3139922126945e-7 * u ** 6.0 - 6.68905596915255e-5 * u ** 5.0 + 2.3937885e-3 * u ** 4.0 - 0.0420283143 * u ** 3.0 + 0.3716111285 * u ** 2.0 - 1.5686969749 * u + 3.2991094727, 0.1)
 
+        power = np.select([u < 4.0, u <= 10.0, u <= 25.0], [0.0, (3.234808e-4 * u ** 7.0 - 0.0331940121 * u ** 6.0 + 1.3883148012 * u ** 5.0 - 30.3162345004 * u ** 4.0 + 367.6835557011 * u ** 3.0 - 2441.6860655008 * u ** 2.0 + 8345.6777042343 * u - 11352.9366182805) * 1000.0, turbine_rated_power], 0.0)
 
-        if u < 4.0:
-            power = 0.0
-        elif u <= 10.0:
-            power = (3.234808e-4 * u ** 7.0 - 0.0331940121 * u ** 6.0 + 1.3883148012 * u ** 5.0 - 30.3162345004 * u ** 4.0 + 367.6835557011 * u ** 3.0 - 2441.6860655008 * u ** 2.0 + 8345.6777042343 * u - 11352.9366182805) * 1000.0
-        elif u <= 25.0:
-            power = turbine_rated_power
-        else:
-            power = 0.0
-
-        return ct, power
+        return ct[()], power[()]
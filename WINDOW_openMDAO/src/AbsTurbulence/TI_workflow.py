@@ -1,19 +1,28 @@
 from openmdao.api import Group
-from WINDOW_openMDAO.src.api import DeficitMatrix, CtMatrix
+from WINDOW_openMDAO.src.api import DeficitMatrix, CtMatrix, StreamingMaxTI
 
 
 class TIWorkflow(Group):
+	# Without streaming, the group builds the full deficit and Ct matrices from dU_matrix.deficits{n} and outputs TI_eff
+	# of every case, e.g. to be recorded, for MaxTI to reduce. With it, the group only outputs max_TI, reduced by
+	# StreamingMaxTI from closest{n} and waked{n}, see DominantWake. Both take ct in the original turbine order.
 
-	def __init__(self, n_cases, turbulence_model):
+	def __init__(self, n_cases, turbulence_model, streaming=False, chunk_size=10):
 		super(TIWorkflow, self).__init__()
 		self.n_cases = n_cases
 		self.turbulence_model = turbulence_model
+		self.streaming = streaming
+		self.chunk_size = chunk_size
 
 	def setup(self):
 
+		if self.streaming:
+			self.add_subsystem('stream', StreamingMaxTI(self.n_cases, self.turbulence_model, self.chunk_size), promotes=['*'])
+			return
+
 		self.add_subsystem('dU_matrix', DeficitMatrix(self.n_cases))
-		self.add_subsystem('ct_matrix', CtMatrix(self.n_cases))
-		self.add_subsystem('TI', self.turbulence_model(self.n_cases), promotes_outputs=['TI_eff'], promotes_inputs=['ordered', 'TI_amb', 'freestream', 'n_turbines', 'radius'])
+		self.add_subsystem('ct_matrix', CtMatrix(self.n_cases), promotes_inputs=['ct', 'permutation', 'n_turbines'])
+		self.add_subsystem('TI', self.turbulence_model(self.n_cases), promotes_outputs=['TI_eff'], promotes_inputs=['ordered', 'permutation', 'TI_amb', 'freestream', 'n_turbines', 'radius'])
 
 		self.connect('dU_matrix.dU_matrix', 'TI.dU_matrix')
 		self.connect('ct_matrix.ct_matrix', 'TI.ct')
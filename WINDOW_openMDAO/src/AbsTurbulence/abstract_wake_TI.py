@@ -5,12 +5,17 @@ from numpy import sqrt
 
 
 class AbstractWakeAddedTurbulence(ExplicitComponent):
+    # By default TI_model gets the scalars of a single waked turbine. Models written with array operations set this to
+    # True and get the ambient turbulence, Ct, wind speed and spacing of every waked turbine of every case at once.
+    batched = False
+
     def __init__(self, n_cases):
         super(AbstractWakeAddedTurbulence, self).__init__()
         self.n_cases = n_cases
 
     def setup(self):
         self.add_input('ordered', shape=(self.n_cases, max_n_turbines, 3))
+        self.add_input('permutation', shape=(self.n_cases, max_n_turbines))
         self.add_input('TI_amb', shape=self.n_cases)
         self.add_input('ct', shape=(self.n_cases, max_n_turbines, max_n_turbines+1))
         self.add_input('dU_matrix', shape=(self.n_cases, max_n_turbines, max_n_turbines+1))
@@ -23,38 +28,45 @@ class AbstractWakeAddedTurbulence(ExplicitComponent):
         #self.declare_partals(of='TI_eff', wrt=['radius', 'n_turbines', 'freestream', 'dU_matrix', 'ct', 'TI_amb', 'ordered'], method='fd')
 
     def compute(self, inputs, outputs):
-        TI_eff = np.array([])
-        n_turbines = int(inputs['n_turbines'])
-        diameter = 2.0 * inputs['radius']
-
-        for case in range(self.n_cases):
-            ordered = inputs['ordered'][case][:n_turbines]
-            TI_amb_case = inputs['TI_amb'][case]
-            freestream_case = inputs['freestream'][case]
-            TI_case = np.array([])
-            for n in range(n_turbines):
-                row = inputs['dU_matrix'][case][n]
-                rowct = inputs['ct'][case][n]
-                max_index = np.argmax(row)
-                if sum(row) == 0:
-                    ct_case_closest = 0
-                else:
-                    ct_case_closest = rowct[max_index]
-                spacing = self.distance(ordered[n][1], ordered[n][2], ordered[max_index][1], ordered[max_index][2]) / diameter
-                # print n, row, max_index, rowct, ct_case_closest, n, max_index, spacing, ordered[n][1], ordered[n][2], ordered[max_index][1], ordered[max_index][2]
-                if ct_case_closest == 0:
-                    ans = TI_amb_case
-                else:
-                    ans = self.TI_model(TI_amb_case, ct_case_closest, freestream_case, spacing)
-                TI_case = np.append(TI_case, ans)
-            TI_case = zip(*sorted(zip(ordered[:, 0], TI_case)))[1]
-            lendif = max_n_turbines - len(TI_case)
-            if lendif > 0:
-                TI_case = np.concatenate((TI_case, [0 for _ in range(lendif)]))
-            TI_eff = np.append(TI_eff, TI_case)
-        TI_eff = TI_eff.reshape(self.n_cases, max_n_turbines)
-
-        outputs['TI_eff'] = TI_eff
+        outputs['TI_eff'] = self.effective_turbulence(inputs['dU_matrix'], inputs['ct'], inputs['ordered'],
+                                                      inputs['permutation'], inputs['TI_amb'], inputs['freestream'],
+                                                      int(inputs['n_turbines']), inputs['radius'])
+
+    def effective_turbulence(self, dU_matrix, ct_matrix, ordered, permutation, TI_amb, freestream, n_turbines, radius):
+        # TI_eff of any number of cases, given as the leading axis of every array.
+        n_cases = len(TI_amb)
+        deficits = dU_matrix[:, :n_turbines]
+        rows = np.arange(n_cases)[:, np.newaxis]
+        turbines = np.arange(n_turbines)[np.newaxis, :]
+
+        # The upstream turbine with the largest deficit on each turbine is the one whose wake adds turbulence to it.
+        closest = np.argmax(deficits, axis=2)
+        ct_closest = np.where(deficits.sum(axis=2) == 0, 0.0, ct_matrix[rows, turbines, closest])
+        return self.wake_turbulence(closest, ct_closest, ordered, permutation, TI_amb, freestream, n_turbines, radius)
+
+    def wake_turbulence(self, closest, ct_closest, ordered, permutation, TI_amb, freestream, n_turbines, radius):
+        # TI_eff from the ordered position of the upstream turbine closest[case, n] whose wake adds turbulence to the
+        # turbine in ordered position n, and its Ct, zero if the turbine is not waked.
+        n_cases = len(TI_amb)
+        diameter = 2.0 * radius
+        rows = np.arange(n_cases)[:, np.newaxis]
+        spacing = self.distance(ordered[:, :n_turbines, 1], ordered[:, :n_turbines, 2], ordered[rows, closest, 1],
+                                ordered[rows, closest, 2]) / diameter
+
+        # Unwaked turbines keep the ambient turbulence.
+        TI = np.repeat(TI_amb[:, np.newaxis], n_turbines, axis=1)
+        waked = ct_closest != 0
+        args = [TI[waked], ct_closest[waked], np.broadcast_to(freestream[:, np.newaxis], waked.shape)[waked],
+                spacing[waked]]
+        if self.batched:
+            TI[waked] = self.TI_model(*args)
+        else:
+            TI[waked] = [self.TI_model(*point) for point in zip(*args)]
+
+        # Back to the original turbine order.
+        TI_eff = np.zeros((n_cases, max_n_turbines))
+        TI_eff[rows, permutation[:, :n_turbines].astype(int)] = TI
+        return TI_eff
 
     def distance(self, x1, y1, x2, y2):
         return sqrt((x1 - x2) ** 2.0 + (y1 - y2) ** 2.0)
@@ -64,6 +76,28 @@ class AbstractWakeAddedTurbulence(ExplicitComponent):
         pass
 
 
+def insert_diagonal(rows):
+    # Rows [case, n] of values at the turbines other than n, (n_cases, N, N), into (n_cases, N, N + 1) with a zero at
+    # column n, i.e. np.insert(row, n, 0) on every row at once.
+    n = rows.shape[1]
+    columns = np.arange(n + 1)
+    source = columns[np.newaxis, :] - (columns[np.newaxis, :] > np.arange(n)[:, np.newaxis])
+    matrix = rows[:, np.arange(n)[:, np.newaxis], source]
+    matrix[:, np.arange(n), np.arange(n)] = 0.0
+    return matrix
+
+
+def ct_matrix(ct):
+    # Ct [case, k] of every ordered turbine, as seen from every turbine n, (n_cases, N, N + 1) aligned with the deficit
+    # matrix, with zeros at column n and in the last column. A turbine's Ct does not depend on the turbine it is looked
+    # up for.
+    n_cases, n = ct.shape
+    matrix = np.zeros((n_cases, n, n + 1))
+    matrix[:, :, :n] = ct[:, np.newaxis, :]
+    matrix[:, np.arange(n), np.arange(n)] = 0.0
+    return matrix
+
+
 class DeficitMatrix(ExplicitComponent):
     def __init__(self, n_cases):
         super(DeficitMatrix, self).__init__()
@@ -77,16 +111,15 @@ class DeficitMatrix(ExplicitComponent):
 
 
     def compute(self, inputs, outputs):
-        matrix = np.array([])
-        for case in range(self.n_cases):
-            matrix_case = np.array([])
-            for n in range(max_n_turbines):
-                row = inputs['deficits{}'.format(n)][case]
-                row = np.insert(row, n, 0)
-                matrix_case = np.append(matrix_case, row)
-            matrix = np.append(matrix, matrix_case)
-        matrix = matrix.reshape(self.n_cases, max_n_turbines, max_n_turbines+1)
-        outputs['dU_matrix'] = matrix
+        outputs['dU_matrix'] = insert_diagonal(np.stack([inputs['deficits{}'.format(n)] for n in range(max_n_turbines)], axis=1))
+
+
+def ordered_ct(ct, permutation, n_turbines):
+    # Ct [case, n] of the turbine in ordered position n, from the Ct in the original order, zero in the padded slots.
+    rows = np.arange(len(ct))[:, np.newaxis]
+    ordered = np.zeros(ct.shape)
+    ordered[:, :n_turbines] = ct[rows, permutation[:, :n_turbines].astype(int)]
+    return ordered
 
 
 class CtMatrix(ExplicitComponent):
@@ -95,22 +128,58 @@ class CtMatrix(ExplicitComponent):
         self.n_cases = n_cases
 
     def setup(self):
-        for n in range(max_n_turbines):
-            self.add_input('ct{}'.format(n), shape=(self.n_cases, max_n_turbines))
-            #self.declare_partals(of='ct_matrix', wrt='ct{}'.format(n), method='fd')
+        # Ct of every turbine in the original order, as the wake model outputs it.
+        self.add_input('ct', shape=(self.n_cases, max_n_turbines))
+        self.add_input('permutation', shape=(self.n_cases, max_n_turbines))
+        self.add_input('n_turbines', val=0)
+        #self.declare_partals(of='ct_matrix', wrt='ct', method='fd')
         self.add_output('ct_matrix', shape=(self.n_cases, max_n_turbines, max_n_turbines+1))
 
     def compute(self, inputs, outputs):
-        matrix = np.array([])
-        for case in range(self.n_cases):
-            matrix_case = np.array([])
-            for n in range(max_n_turbines):
-                row = inputs['ct{}'.format(n)][case]
-                row = np.insert(row, n, 0)
-                matrix_case = np.append(matrix_case, row)
-            matrix = np.append(matrix, matrix_case)
-        matrix = matrix.reshape(self.n_cases, max_n_turbines, max_n_turbines+1)
-        outputs['ct_matrix'] = matrix
+        outputs['ct_matrix'] = ct_matrix(ordered_ct(inputs['ct'], inputs['permutation'], int(inputs['n_turbines'])))
+
+
+class StreamingMaxTI(ExplicitComponent):
+    # Maximum TI_eff of every turbine over all cases, as TIWorkflow followed by MaxTI gives it, without the
+    # (n_cases, N, N + 1) deficit and Ct matrices or the (n_cases, N) TI_eff. Of the deficits on the turbine in ordered
+    # position n, it only takes which upstream turbine has the largest, closest{n}, and whether there is any, waked{n},
+    # see DominantWake, so that its inputs grow with N rather than N^2. Cases are reduced chunk_size at a time.
+    def __init__(self, n_cases, turbulence_model, chunk_size=10):
+        super(StreamingMaxTI, self).__init__()
+        self.n_cases = n_cases
+        self.chunk_size = chunk_size
+        # Only instantiated to reuse its effective_turbulence and TI_model.
+        self.turbulence = turbulence_model(chunk_size)
+
+    def setup(self):
+        for n in range(max_n_turbines):
+            self.add_input('closest{}'.format(n), shape=self.n_cases)
+            self.add_input('waked{}'.format(n), shape=self.n_cases)
+        self.add_input('ct', shape=(self.n_cases, max_n_turbines))
+        self.add_input('ordered', shape=(self.n_cases, max_n_turbines, 3))
+        self.add_input('permutation', shape=(self.n_cases, max_n_turbines))
+        self.add_input('TI_amb', shape=self.n_cases)
+        self.add_input('freestream', shape=self.n_cases)
+        self.add_input('n_turbines', val=0)
+        self.add_input('radius', val=0.0)
+
+        self.add_output('max_TI', shape=max_n_turbines)
+
+    def compute(self, inputs, outputs):
+        n_turbines = int(inputs['n_turbines'])
+        rows = np.arange(self.n_cases)[:, np.newaxis]
+        closest = np.stack([inputs['closest{}'.format(n)] for n in range(max_n_turbines)], axis=1)[:, :n_turbines].astype(int)
+        waked = np.stack([inputs['waked{}'.format(n)] for n in range(max_n_turbines)], axis=1)[:, :n_turbines] != 0.0
+        ct = ordered_ct(inputs['ct'], inputs['permutation'], n_turbines)
+        ct_closest = np.where(waked, ct[rows, closest], 0.0)
+        max_TI = np.full(max_n_turbines, - np.inf)
+        for start in range(0, self.n_cases, self.chunk_size):
+            cases = slice(start, start + self.chunk_size)
+            TI_eff = self.turbulence.wake_turbulence(closest[cases], ct_closest[cases], inputs['ordered'][cases],
+                                                     inputs['permutation'][cases], inputs['TI_amb'][cases],
+                                                     inputs['freestream'][cases], n_turbines, inputs['radius'])
+            max_TI = np.maximum(max_TI, np.amax(TI_eff, axis=0))
+        outputs['max_TI'] = max_TI
 
 
 if __name__ == '__main__':
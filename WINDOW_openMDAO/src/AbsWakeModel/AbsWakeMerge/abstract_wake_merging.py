@@ -5,6 +5,10 @@ import numpy as np
 
 
 class AbstractWakeMerge(ExplicitComponent):
+    # Set to True in subclasses whose merge_model(deficits, axis=-1) merges arrays of deficits along the upstream
+    # turbines axis, so that all cases are merged in one call.
+    batched = False
+
     def __init__(self, n_cases):
         super(AbstractWakeMerge, self).__init__()
         self.n_cases = n_cases
@@ -18,11 +22,15 @@ class AbstractWakeMerge(ExplicitComponent):
 
     def compute(self, inputs, outputs):
         # print "6 SumSquares"
-        ans = np.array([])
         n_turbines = int(inputs['n_turbines'])
-        for case in range(self.n_cases):
-            defs = inputs['all_deficits'][case][:n_turbines]
-            ans = np.append(ans, self.merge_model(defs))
+        ans = np.zeros(self.n_cases)
+        # Cases without any deficit, including every case of a padded slot, have no merged deficit either.
+        waked = np.any(inputs['all_deficits'][:, :n_turbines] != 0.0, axis=1)
+        if self.batched:
+            ans[waked] = self.merge_model(inputs['all_deficits'][waked, :n_turbines], axis=-1)
+        else:
+            for case in np.nonzero(waked)[0]:
+                ans[case] = self.merge_model(inputs['all_deficits'][case][:n_turbines])
         outputs['dU'] = ans
 
     def merge_model(self, deficits):
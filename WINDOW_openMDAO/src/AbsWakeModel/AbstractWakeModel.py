@@ -4,6 +4,9 @@ import numpy as np
 
 
 class DetermineIfInWake(ExplicitComponent):
+    # Set to True in subclasses whose wake_fraction_model takes (n_cases, n_turbines - 1) arrays instead of scalars.
+    batched = False
+
     def __init__(self, number, n_cases):
         super(DetermineIfInWake, self).__init__()
         self.number = number
@@ -22,6 +25,9 @@ class DetermineIfInWake(ExplicitComponent):
         #self.declare_partials(of='fractions', wrt=['ordered', 'angle', 'n_turbines', 'downwind_d', 'crosswind_d', 'turbine_radius'], method='fd')
 
     def compute(self, inputs, outputs):
+        if self.batched:
+            outputs['fractions'] = self.compute_batched(inputs)
+            return
         # print "4 Determine"
         # print inputs['layout'], "Input"
         fractions = np.array([])
@@ -53,8 +59,36 @@ class DetermineIfInWake(ExplicitComponent):
         outputs['fractions'] = fractions
         # print outputs['fraction'], "Output"
 
+    def compute_batched(self, inputs):
+        n_turbines = int(inputs['n_turbines'])
+        fractions = np.zeros((self.n_cases, max_n_turbines))
+        if self.number < n_turbines:
+            # Same pair order as the scalar loop: every other turbine, skipping self.number.
+            others = np.delete(np.arange(n_turbines), self.number)
+            n_others = len(others)
+            shape = (self.n_cases, n_others)
+            upstream = inputs['ordered'][:, self.number]
+            downstream = inputs['ordered'][:, others]
+            fractions[:, :n_others] = self.wake_fraction_model(inputs, x_upstream=np.broadcast_to(upstream[:, 1:2], shape),
+                                                               y_upstream=np.broadcast_to(upstream[:, 2:3], shape),
+                                                               x_downstream=downstream[:, :, 1],
+                                                               y_downstream=downstream[:, :, 2],
+                                                               wind_direction=np.broadcast_to(inputs['angle'][:, np.newaxis], shape),
+                                                               downwind_d=inputs['downwind_d'][:, :n_others],
+                                                               crosswind_d=inputs['crosswind_d'][:, :n_others],
+                                                               radius=inputs['turbine_radius'])
+        return fractions
+
 
 class WakeDeficit(ExplicitComponent):
+    # Set to True in subclasses whose wake_deficit_model takes (n_cases, n_turbines) arrays instead of scalars.
+    batched = False
+    # TurbineChain of the LinearSolveWake and ordered position of the turbine, see AbsTurbine. With it, the Ct of the
+    # turbines upstream are read from the chain, and the ct input is only the column of the turbine evaluated just
+    # before, whose connection keeps this component after it.
+    chain = None
+    number = None
+
     def __init__(self, n_cases):
         super(WakeDeficit, self).__init__()
         self.n_cases = n_cases
@@ -63,7 +97,7 @@ class WakeDeficit(ExplicitComponent):
         self.add_input('turbine_radius', val=0.0)
         self.add_input('downwind_d', shape=(self.n_cases, max_n_turbines))
         self.add_input('crosswind_d', shape=(self.n_cases, max_n_turbines))
-        self.add_input('ct', shape=(self.n_cases, max_n_turbines))
+        self.add_input('ct', shape=(self.n_cases, max_n_turbines) if self.chain is None else self.n_cases)
         self.add_input('fractions', shape=(self.n_cases, max_n_turbines))
         self.add_input('n_turbines', val=1)
         self.add_output('dU', shape=(self.n_cases, max_n_turbines))
@@ -72,6 +106,14 @@ class WakeDeficit(ExplicitComponent):
         
 
     def compute(self, inputs, outputs):
+        n_turbines = int(inputs['n_turbines'])
+        if not np.any(inputs['fractions'][:, :n_turbines] > 0.0):
+            # Turbine out of every wake, or a padded slot beyond n_turbines.
+            outputs['dU'] = np.zeros((self.n_cases, max_n_turbines))
+            return
+        if self.batched:
+            outputs['dU'] = self.compute_batched(inputs)
+            return
         # print "5 WakeDeficit"
         du = np.array([])
         for case in range(self.n_cases):
@@ -79,7 +121,7 @@ class WakeDeficit(ExplicitComponent):
             r = inputs['turbine_radius']
             d_down = inputs['downwind_d'][case]
             d_cross = inputs['crosswind_d'][case]
-            c_t = inputs['ct'][case]
+            c_t = self.upstream_ct(inputs)[case]
             fraction = inputs['fractions'][case]
             # print c_t, "Input1 ct"
             # print fraction, "Input2 fraction"
@@ -98,3 +140,17 @@ class WakeDeficit(ExplicitComponent):
         du = du.reshape(self.n_cases, max_n_turbines)
         outputs['dU'] = du
         # print outputs['dU'], "Output"
+
+    def compute_batched(self, inputs):
+        n_turbines = int(inputs['n_turbines'])
+        fraction = inputs['fractions'][:, :n_turbines]
+        deficits = self.wake_deficit_model(inputs, x_down=inputs['downwind_d'][:, :n_turbines],
+                                           x_cross=inputs['crosswind_d'][:, :n_turbines],
+                                           Ct=self.upstream_ct(inputs)[:, :n_turbines], r0=inputs['turbine_radius'])
+        du = np.zeros((self.n_cases, max_n_turbines))
+        du[:, :n_turbines] = np.where(fraction > 0.0, fraction * deficits, 0.0)
+        return du
+
+    def upstream_ct(self, inputs):
+        # Ct of all ordered turbines, zero from this one on.
+        return inputs['ct'] if self.chain is None else self.chain.read(self.number)
@@ -1,7 +1,8 @@
 from openmdao.api import ExplicitComponent
 from WINDOW_openMDAO.input_params import max_n_turbines
 import numpy as np
-from numpy import sqrt, deg2rad, tan
+from numpy import deg2rad
+from geometry import rotate, unique_directions
 
 
 class DistanceComponent(ExplicitComponent):
@@ -21,43 +22,24 @@ class DistanceComponent(ExplicitComponent):
         #self.declare_partals(of=['dist_down', 'dist_cross'], wrt=['angle', 'ordered', 'n_turbines'], method='fd')
 
     def compute(self, inputs, outputs):
-        d_down2 = []
-        d_cross2 = []
-        for case in range(self.n_cases):
-            # print "3 Distance"
-            n_turbines = int(inputs['n_turbines'])
-            ordered = inputs['ordered']
-            # print layout, "Input"
-            angle = inputs['angle'][case]
-            d_down = np.array([])
-            d_cross = np.array([])
-            for n in range(n_turbines):
-                if n != self.number and self.number < n_turbines:
-                    d_down1, d_cross1 = distance(ordered[case][self.number], ordered[case][n], angle)
-                    d_cross = np.append(d_cross, [d_cross1])
-                    d_down = np.append(d_down, [d_down1])
-            lendif = max_n_turbines - len(d_cross)
-            d_down = np.concatenate((d_down, [0 for _ in range(lendif)]))
-            d_cross = np.concatenate((d_cross, [0 for _ in range(lendif)]))
-            d_down2 = np.append(d_down2, d_down)
-            d_cross2 = np.append(d_cross2, d_cross)
-        d_down2 = d_down2.reshape(self.n_cases, max_n_turbines)
-        d_cross2 = d_cross2.reshape(self.n_cases, max_n_turbines)
-        outputs['dist_down'] = d_down2
-        outputs['dist_cross'] = d_cross2
-        # print outputs['dist_down'], "Output1"
-        # print outputs['dist_cross'], "Output2"
+        n_turbines = int(inputs['n_turbines'])
+        d_down = np.zeros((self.n_cases, max_n_turbines))
+        d_cross = np.zeros((self.n_cases, max_n_turbines))
+        if self.number < n_turbines:
+            # The ordering is the same for all cases of a direction, so distances are computed once per direction.
+            directions, first, inverse = unique_directions(inputs['angle'])
+            ordered = inputs['ordered'][first]
+            # All other turbines at once, in ordered position skipping this turbine.
+            others = np.delete(np.arange(n_turbines), self.number)
+            turbine = np.moveaxis(ordered[:, self.number:self.number + 1], -1, 0)
+            down, cross = distance(turbine, np.moveaxis(ordered[:, others], -1, 0), directions[:, np.newaxis])
+            d_down[:, :n_turbines - 1] = down[inverse]
+            d_cross[:, :n_turbines - 1] = cross[inverse]
+        outputs['dist_down'] = d_down
+        outputs['dist_cross'] = d_cross
 
 
 def distance(t1, t2, angle):
-    wind_direction = deg2rad(- angle + 90.0)
-    distance_to_centre = abs(- tan(wind_direction) * t2[1] + t2[2] + tan(wind_direction) * t1[1] - t1[2]) / \
-                         sqrt(1.0 + tan(wind_direction) ** 2.0)
-    # Coordinates of the intersection between closest path from turbine in wake to centreline.
-    x_int = (t2[1] + tan(wind_direction) * t2[2] + tan(wind_direction) * (tan(wind_direction) * t1[1] - t1[2])) / \
-            (tan(wind_direction) ** 2.0 + 1.0)
-    y_int = (- tan(wind_direction) * (- t2[1] - tan(wind_direction) * t2[2]) - tan(
-        wind_direction) * t1[1] + t1[2]) / (tan(wind_direction) ** 2.0 + 1.0)
-    # Distance from intersection point to turbine
-    distance_to_turbine = sqrt((x_int - t1[1]) ** 2.0 + (y_int - t1[2]) ** 2.0)
-    return np.array(distance_to_turbine), np.array(distance_to_centre)
+    # Distances along and across the wind direction in the frame rotated by the wind angle.
+    along, across = rotate(t2[1] - t1[1], t2[2] - t1[2], deg2rad(- angle + 90.0))
+    return np.array(abs(along)), np.array(abs(across))
@@ -0,0 +1,115 @@
+from numpy import cos, sin
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Position of the line from which turbines are ordered, far enough upstream to be ahead of any layout.
+front = 10000000000.0
+
+
+def rotate(x, y, direction):
+    # Components of (x, y) along and across an axis at angle direction (radians, counter-clockwise from the x axis).
+    # This is the 2x2 rotation matrix [[cos, sin], [-sin, cos]] applied to every point, so x, y and direction can be
+    # any broadcastable arrays.
+    c, s = cos(direction), sin(direction)
+    return x * c + y * s, - x * s + y * c
+
+
+def rotate_layout(x, y, direction):
+    # Whole layout in the frame of each direction. x, y of shape (..., N) and direction of shape (...) give (..., N);
+    # a single layout of shape (N,) with n_dirs directions gives (n_dirs, N).
+    return rotate(x, y, np.asarray(direction)[..., np.newaxis])
+
+
+def pairwise_distances(x, y, direction):
+    # Unsigned distances along and across the direction from turbine i to turbine j, as [..., i, j] arrays,
+    # i.e. (n_dirs, N, N) for a single layout.
+    along, across = rotate_layout(x, y, direction)
+    return abs(along[..., np.newaxis, :] - along[..., :, np.newaxis]), \
+        abs(across[..., np.newaxis, :] - across[..., :, np.newaxis])
+
+
+def distance_to_front(x, y, direction):
+    # Distance from (x, y) to a line perpendicular to the direction, placed at the front.
+    along, _ = rotate(x, y, direction)
+    return front - along
+
+
+def unique_directions(angles):
+    # Distinct wind directions among the cases, the first case with each one, and the map from every case back to its
+    # direction. Geometry depends on direction only, so it is computed per direction and broadcast over the speeds.
+    return np.unique(angles, return_index=True, return_inverse=True)
+
+
+class WakeCone(object):
+    # Region behind a turbine outside of which a wake model's deficits stay below some threshold: the half-width across
+    # the wind at each of a grid of distances along it, up to max_distance. Pairs of turbines outside the cone can be
+    # left out of the wake calculations. An infinite half-width or max_distance means no bound.
+    def __init__(self, distances, half_widths, max_distance=np.inf):
+        self.distances = np.asarray(distances, dtype=float)
+        # Widening with distance, so that the width at the next grid distance bounds the wake at any distance before it.
+        self.half_widths = np.maximum.accumulate(np.asarray(half_widths, dtype=float))
+        self.max_distance = max_distance
+        # Beyond the grid, the width keeps growing at its mean rate over the grid, which bounds wakes that widen ever
+        # more slowly.
+        if len(self.distances) > 1 and np.isfinite(self.half_widths[-1]):
+            self.slope = (self.half_widths[-1] - self.half_widths[0]) / (self.distances[-1] - self.distances[0])
+        else:
+            self.slope = np.inf
+
+    def half_width(self, along):
+        along = np.asarray(along, dtype=float)
+        index = np.searchsorted(self.distances, along)
+        beyond = index >= len(self.distances)
+        width = self.half_widths[np.minimum(index, len(self.distances) - 1)]
+        if beyond.any():
+            with np.errstate(invalid='ignore'):
+                width = np.where(beyond, self.half_widths[-1] + self.slope * (along - self.distances[-1]), width)
+        return width
+
+    def contains(self, along, across):
+        # Whether a point at distances along (downwind positive) and across the wind from a turbine is in its cone.
+        return (along > 0.0) & (along <= self.max_distance) & (abs(across) <= self.half_width(along))
+
+    def reach(self):
+        # Largest separation between a turbine and a point in its cone.
+        return np.hypot(self.max_distance, self.half_width(self.max_distance))
+
+
+def cone_from_deficits(distances, offsets, deficits, threshold):
+    # Cone of the points where deficits[distance, offset], on a grid of distances along and offsets across the wind
+    # behind a turbine, exceed threshold. Each width reaches one offset step past the last point above it, and the cone
+    # ends one distance after the last row above it. Rows still above threshold at the largest offset, or at the
+    # largest distance, leave the cone unbounded there.
+    distances = np.asarray(distances, dtype=float)
+    offsets = np.asarray(offsets, dtype=float)
+    above = np.asarray(deficits) > threshold
+    above = above.reshape(above.shape[:2] + (-1,)).any(axis=2)
+    last = len(offsets) - 1 - np.argmax(above[:, ::-1], axis=1)
+    half_widths = np.where(above.any(axis=1), offsets[np.minimum(last + 1, len(offsets) - 1)], 0.0)
+    half_widths[above[:, -1]] = np.inf
+    rows = np.nonzero(above.any(axis=1))[0]
+    if len(rows) == 0:
+        max_distance = 0.0
+    elif rows[-1] + 1 < len(distances):
+        max_distance = distances[rows[-1] + 1]
+    else:
+        max_distance = np.inf
+    return WakeCone(distances, half_widths, max_distance)
+
+
+def wake_pairs(x, y, direction, cone):
+    # Pairs (upstream, downstream) of turbines with the downstream one in the cone of the upstream one, for the wind
+    # coming from direction (radians, counter-clockwise from the x axis). Only turbines within reach of each other, found
+    # with a KD-tree of the layout, are checked, so that large farms cost about O(N k) instead of O(N^2).
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    reach = cone.reach()
+    if np.isfinite(reach):
+        pairs = cKDTree(np.column_stack((x, y))).query_pairs(reach, output_type='ndarray')
+    else:
+        pairs = np.column_stack(np.triu_indices(len(x), 1))
+    pairs = np.concatenate((pairs, pairs[:, ::-1]))
+    upstream, downstream = pairs[:, 0], pairs[:, 1]
+    along, across = rotate(x, y, direction)
+    keep = cone.contains(along[upstream] - along[downstream], across[downstream] - across[upstream])
+    return upstream[keep], downstream[keep]
@@ -1,22 +1,25 @@
 from openmdao.api import ExplicitComponent
-from numpy import deg2rad, tan, cos, sqrt
+from numpy import deg2rad
 import numpy as np
 from WINDOW_openMDAO.input_params import max_n_turbines
+import geometry
 
 
 def distance_to_front(x, y, theta):
-    theta = deg2rad(- theta + 90.0)
-    return abs(x + tan(theta) * y - 10000000000.0 / cos(theta)) / sqrt(1.0 + tan(theta) ** 2.0)
+    return geometry.distance_to_front(x, y, deg2rad(- theta + 90.0))
+
+
+def order_indices(layout_array, wind_direction):
+    # Permutation that sorts the layout by distance to the front and then by turbine index: position k of the ordering
+    # holds original turbine permutation[k]. An array of n_dirs wind directions gives shape (n_dirs, N).
+    layout_array = np.asarray(layout_array)
+    distances = distance_to_front(layout_array[:, 1], layout_array[:, 2], np.asarray(wind_direction)[..., np.newaxis])
+    indices = np.broadcast_to(layout_array[:, 0], distances.shape)
+    return np.lexsort((indices, distances), axis=-1)
 
 
 def order(layout_array, wind_direction):
-    distances = []
-    for turbine in layout_array:
-        distances.append([distance_to_front(turbine[1], turbine[2], wind_direction), turbine[0]])
-    distances.sort()
-    ordered_indices = [item[1] for item in distances]
-    ordered_layout = np.array([layout_array[int(i)] for i in ordered_indices])
-    return ordered_layout
+    return np.asarray(layout_array)[order_indices(layout_array, wind_direction)]
 
 
 class OrderLayout(ExplicitComponent):
@@ -29,23 +32,20 @@ class OrderLayout(ExplicitComponent):
         self.add_input('angle', shape=self.n_cases)
         self.add_input('n_turbines', val=1)
         self.add_output('ordered', shape=(self.n_cases, max_n_turbines, 3))
+        # Original position of each ordered turbine, so that results are put back in place with one scatter.
+        # Padded slots map onto themselves.
+        self.add_output('permutation', shape=(self.n_cases, max_n_turbines))
 
     def compute(self, inputs, outputs):
-        # print "1 Order"
-        ordered = np.array([])
-        for case in range(self.n_cases):
-            angle = inputs['angle'][case]
-            n_turbines = int(inputs['n_turbines'])
-            original = inputs['original'][:n_turbines]
-            # print original, "Input Original layout"
-            res = order(original, angle)
-            lendif = max_n_turbines - len(original)
-            if lendif > 0:
-                res = np.concatenate((res, [[0 for _ in range(3)] for _ in range(lendif)]))
-            ordered = np.append(ordered, res)
-        ordered = ordered.reshape(self.n_cases, max_n_turbines, 3)
+        n_turbines = int(inputs['n_turbines'])
+        original = inputs['original'][:n_turbines]
+        directions, _, inverse = geometry.unique_directions(inputs['angle'])
+        permutation = np.tile(np.arange(max_n_turbines), (self.n_cases, 1))
+        permutation[:, :n_turbines] = order_indices(original, directions)[inverse]
+        ordered = np.zeros((self.n_cases, max_n_turbines, 3))
+        ordered[:, :n_turbines] = original[permutation[:, :n_turbines]]
         outputs['ordered'] = ordered
-        # print ordered, "Output"
+        outputs['permutation'] = permutation
 
 
 # if __name__ == '__main__':
@@ -4,7 +4,8 @@ import numpy as np
 from order_layout import OrderLayout
 from WINDOW_openMDAO.input_params import max_n_turbines
 from distance import DistanceComponent
-from windspeed_deficits import SpeedDeficits, CombineOutputs
+from windspeed_deficits import SpeedDeficits, CombineOutputs, DominantWake
+from WINDOW_openMDAO.src.AbsTurbine.AbsTurbine import TurbineChain
 
 
 class WakeModel(Group):
@@ -19,11 +20,12 @@ class WakeModel(Group):
     def setup(self):
         self.add_subsystem('linear_solve', LinearSolveWake(self.n_cases, self.fraction_model, self.deficit_model, self.merge_model, self.turbine_model),
                            promotes_inputs=['turbine_radius', 'original', 'angle', 'n_turbines', 'freestream'])
-        self.add_subsystem('combine', CombineOutputs(self.n_cases), promotes_inputs=['n_turbines'], promotes_outputs=['p'])
-        for n in range(max_n_turbines + 1):
-            self.connect('linear_solve.turbine{}.power'.format(n), 'combine.power{}'.format(n))
-            self.connect('linear_solve.turbine{}.ct'.format(n), 'combine.ct{}'.format(n))
-        self.connect('linear_solve.order_layout.ordered', 'combine.ordered_layout')
+        self.add_subsystem('combine', CombineOutputs(self.n_cases), promotes_inputs=['n_turbines'], promotes_outputs=['p', 'ct'])
+        # turbine{n + 1} evaluates the turbine in ordered position n.
+        for n in range(max_n_turbines):
+            self.connect('linear_solve.turbine{}.power'.format(n + 1), 'combine.power{}'.format(n))
+            self.connect('linear_solve.turbine{}.ct'.format(n + 1), 'combine.ct{}'.format(n))
+        self.connect('linear_solve.order_layout.permutation', 'combine.permutation')
 
 
 class LinearSolveWake(Group):
@@ -38,57 +40,63 @@ class LinearSolveWake(Group):
     def setup(self):
         self.add_subsystem('order_layout', OrderLayout(self.n_cases), promotes_inputs=['original', 'angle', 'n_turbines'])
 
+        chain = TurbineChain(self.n_cases)
         for n in range(max_n_turbines):
-            self.add_subsystem('turbine{}'.format(n), self.turbine_model(n, self.n_cases), promotes_inputs=['n_turbines'])
-            self.add_subsystem('deficits{}'.format(n), Wake(self.n_cases, self.fraction_model, self.deficit_model, n),
+            self.add_subsystem('turbine{}'.format(n), self.chained_turbine(n, chain), promotes_inputs=['n_turbines'])
+            self.add_subsystem('deficits{}'.format(n), Wake(self.n_cases, self.fraction_model, self.deficit_model, n, chain),
                                promotes_inputs=['angle', 'turbine_radius', 'n_turbines'])
             self.add_subsystem('merge{}'.format(n), self.merge_model(self.n_cases), promotes_inputs=['n_turbines'])
             self.add_subsystem('speed{}'.format(n), SpeedDeficits(self.n_cases), promotes_inputs=['freestream'])
 
         for n in range(max_n_turbines):
             self.connect('order_layout.ordered', 'deficits{}.ordered'.format(n))
+            # The Ct of the turbines upstream are read from the chain, see WakeDeficit.
             self.connect('turbine{}.ct'.format(n), 'deficits{}.ct'.format(n))
             self.connect('deficits{}.dU'.format(n), 'merge{}.all_deficits'.format(n))
             self.connect('merge{}.dU'.format(n), 'speed{}.dU'.format(n))
-            for m in range(n + 1, max_n_turbines):
-                self.connect('speed{}.U'.format(n), 'turbine{}.U{}'.format(m, n))
-            if n > 0:
-                self.connect('turbine{}.ct'.format(n - 1), 'turbine{}.prev_turbine_ct'.format(n))
-                self.connect('turbine{}.power'.format(n - 1), 'turbine{}.prev_turbine_p'.format(n))
+            # Each turbine only needs the wind speed at the one before it.
+            self.connect('speed{}.U'.format(n), 'turbine{}.U{}'.format(n + 1, n))
 
-        self.add_subsystem('turbine{}'.format(max_n_turbines), self.turbine_model(max_n_turbines, self.n_cases), promotes_inputs=['n_turbines'])
-        self.connect('speed{}.U'.format(max_n_turbines-1), 'turbine{}.U{}'.format(max_n_turbines, max_n_turbines-1))
-        self.connect('turbine{}.power'.format(max_n_turbines - 1), 'turbine{}.prev_turbine_p'.format(max_n_turbines))
-        self.connect('turbine{}.ct'.format(max_n_turbines - 1), 'turbine{}.prev_turbine_ct'.format(max_n_turbines))
+        self.add_subsystem('turbine{}'.format(max_n_turbines), self.chained_turbine(max_n_turbines, chain), promotes_inputs=['n_turbines'])
 
         # self.linear_solver = LinearRunOnce()
         # self.nonlinear_solver = NonlinearBlockGS()
         # self.nonlinear_solver.options['maxiter'] = 30
 
+    def chained_turbine(self, number, chain):
+        turbine = self.turbine_model(number, self.n_cases)
+        turbine.chain = chain
+        return turbine
+
 
 class Wake(Group):
-    def __init__(self, n_cases, fraction_model, deficit_model, number):
+    def __init__(self, n_cases, fraction_model, deficit_model, number, chain=None):
         super(Wake, self).__init__()
         self.fraction_model = fraction_model
         self.deficit_model = deficit_model
         self.number = number
         self.n_cases = n_cases
+        self.chain = chain
 
     def setup(self):
         self.add_subsystem('distance', DistanceComponent(self.number, self.n_cases),
                            promotes_inputs=['angle', 'ordered', 'n_turbines'])
-        self.add_subsystem('total_wake', TotalWake(self.n_cases, self.fraction_model, self.deficit_model, self.number),
+        self.add_subsystem('total_wake', TotalWake(self.n_cases, self.fraction_model, self.deficit_model, self.number, self.chain),
                            promotes_inputs=['ct', 'angle', 'ordered', 'turbine_radius', 'n_turbines'], promotes_outputs=['dU'])
+        self.add_subsystem('dominant', DominantWake(self.n_cases), promotes_inputs=['dU'],
+                           promotes_outputs=['closest', 'waked'])
         self.connect('distance.dist_down', 'total_wake.downwind_d')
         self.connect('distance.dist_cross', 'total_wake.crosswind_d')
 
 
 class TotalWake(Group):
 
-    def __init__(self, n_cases, fraction_model, deficit_model, number):
+    def __init__(self, n_cases, fraction_model, deficit_model, number, chain=None):
         super(TotalWake, self).__init__()
         self.fraction_model = fraction_model(number, n_cases)
         self.deficit_model = deficit_model(n_cases)
+        self.deficit_model.chain = chain
+        self.deficit_model.number = number
 
     def setup(self):
         self.add_subsystem('fraction', self.fraction_model,
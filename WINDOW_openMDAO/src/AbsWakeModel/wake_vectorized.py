@@ -0,0 +1,186 @@
+from openmdao.api import Group, ExplicitComponent
+import numpy as np
+from WINDOW_openMDAO.input_params import max_n_turbines
+from order_layout import order_indices
+from geometry import pairwise_distances, unique_directions
+
+
+class VectorizedWakeModel(Group):
+    def __init__(self, n_cases, fraction_model, deficit_model, merge_model, turbine_model, cone=None):
+        super(VectorizedWakeModel, self).__init__()
+        self.cone = cone
+        self.fraction_model = fraction_model
+        self.deficit_model = deficit_model
+        self.merge_model = merge_model
+        self.turbine_model = turbine_model
+        self.n_cases = n_cases
+
+    def setup(self):
+        self.add_subsystem('wake', VectorizedWake(self.n_cases, self.fraction_model, self.deficit_model, self.merge_model, self.turbine_model, self.cone),
+                           promotes_inputs=['turbine_radius', 'original', 'angle', 'n_turbines', 'freestream', 'active'],
+                           promotes_outputs=['p', 'ct', 'dU', 'ordered', 'permutation', 'closest', 'waked'])
+
+
+def turbine_src_indices(n_cases, number, size=1):
+    # Flat src_indices connecting the values of the turbine in ordered position number, from an output of shape
+    # (n_cases, max_n_turbines), or (n_cases, max_n_turbines, size), to an input of shape n_cases, or (n_cases, size).
+    # The wake-added turbulence takes them per turbine, as LinearSolveWake gives them: dU with size max_n_turbines
+    # for deficits{n}, closest and waked for closest{n} and waked{n}.
+    indices = np.arange(n_cases * max_n_turbines * size).reshape((n_cases, max_n_turbines, size))[:, number]
+    return indices[:, 0] if size == 1 else indices
+
+
+class VectorizedWake(ExplicitComponent):
+    # Same wake cascade as LinearSolveWake, but in a single component. All cases are evaluated at once, and only the
+    # march over ordered turbines remains sequential, since every turbine depends on the Ct of those upstream.
+    # Batched fraction and deficit models get flat arrays of pairs, and batched merge models the deficits of all cases
+    # on one turbine; scalar ones are applied element by element.
+    # With a cone (geometry.WakeCone, in metres), pairs outside it are not evaluated and get no deficit.
+    # Cases whose 'active' is zero (see CasePruning) skip the cascade: every turbine is at the free stream speed.
+    # dU[case, k, n] is the deficit of the turbine in ordered position n on the one in position k, as
+    # LinearSolveWake's deficits{k}.dU[case, n]. closest and waked reduce it for the wake-added turbulence, as
+    # DominantWake does. With a cone or inactive cases, the deficits left out are zero there as well.
+    def __init__(self, n_cases, fraction_model, deficit_model, merge_model, turbine_model, cone=None):
+        super(VectorizedWake, self).__init__()
+        self.n_cases = n_cases
+        self.cone = cone
+        # Model components are only instantiated to reuse their model methods, as TotalWake does.
+        self.fraction = fraction_model(0, n_cases)
+        self.deficit = deficit_model(n_cases)
+        self.merge = merge_model(n_cases)
+        self.turbine = turbine_model(0, n_cases)
+
+    def setup(self):
+        self.add_input('original', shape=(max_n_turbines, 3))
+        self.add_input('angle', shape=self.n_cases)
+        self.add_input('freestream', shape=self.n_cases)
+        self.add_input('n_turbines', val=1)
+        self.add_input('turbine_radius', val=0.0)
+        self.add_input('active', val=1.0, shape=self.n_cases)
+
+        self.add_output('ordered', shape=(self.n_cases, max_n_turbines, 3))
+        self.add_output('permutation', shape=(self.n_cases, max_n_turbines))
+        self.add_output('dU', shape=(self.n_cases, max_n_turbines, max_n_turbines))
+        self.add_output('p', shape=(self.n_cases, max_n_turbines))
+        self.add_output('ct', shape=(self.n_cases, max_n_turbines))
+        self.add_output('closest', shape=(self.n_cases, max_n_turbines))
+        self.add_output('waked', shape=(self.n_cases, max_n_turbines))
+
+    def compute(self, inputs, outputs):
+        n_turbines = int(inputs['n_turbines'])
+        angle = inputs['angle']
+        freestream = inputs['freestream']
+        r = float(inputs['turbine_radius'])
+
+        # Ordering, distances and wake fractions depend on the direction only. They are computed once per direction
+        # and broadcast to the cases.
+        directions, _, inverse = unique_directions(angle)
+        original = inputs['original'][:n_turbines]
+        permutation = order_indices(original, directions)
+        ordered = original[permutation]
+
+        # Pairwise distances [direction, k, n] from turbine k to turbine n, as DistanceComponent(number=k) gives them.
+        d_down, d_cross = pairwise_distances(ordered[:, :, 1], ordered[:, :, 2], np.deg2rad(- directions + 90.0))
+
+        # Only turbines earlier in the ordering (n < k) can shed a wake onto turbine k.
+        lower = np.broadcast_to(np.tril(np.ones((n_turbines, n_turbines), dtype=bool), -1),
+                                (len(directions), n_turbines, n_turbines))
+        if self.cone is not None:
+            lower = lower & self.cone.contains(d_down, d_cross)
+        # Directions without an active case need no fractions.
+        active = inputs['active'] > 0.0
+        needed = np.zeros(len(directions), dtype=bool)
+        needed[inverse[active]] = True
+        lower = lower & needed[:, np.newaxis, np.newaxis]
+        dirs, turbine, other = np.nonzero(lower)
+        fractions = np.zeros((len(directions), n_turbines, n_turbines))
+        fractions[dirs, turbine, other] = self.fractions(inputs, ordered[dirs, turbine], ordered[dirs, other],
+                                                         directions[dirs], d_down[dirs, turbine, other],
+                                                         d_cross[dirs, turbine, other], r)
+        ordered, permutation = ordered[inverse], permutation[inverse]
+
+        deficits = np.zeros((self.n_cases, n_turbines, n_turbines))
+        c_t = np.zeros((self.n_cases, n_turbines))
+        power = np.zeros((self.n_cases, n_turbines))
+        if not active.all():
+            c_t_free, power_free = self.turbines(freestream[~active])
+            c_t[~active] = np.reshape(c_t_free, (-1, 1))
+            power[~active] = np.reshape(power_free, (-1, 1))
+
+        # The cascade, for the active cases only.
+        cases = inverse[active]
+        d_down, d_cross, fractions = d_down[cases], d_cross[cases], fractions[cases]
+        n_active = len(cases)
+        deficits_active = np.zeros((n_active, n_turbines, n_turbines))
+        wind_speeds = np.zeros((n_active, n_turbines))
+        c_t_active = np.zeros((n_active, n_turbines))
+        power_active = np.zeros((n_active, n_turbines))
+        for k in range(n_turbines):
+            if k > 0:
+                wake = fractions[:, k, :k] > 0.0
+                deficits_active[:, k, :k][wake] = fractions[:, k, :k][wake] * self.deficits(inputs, d_down[:, k, :k][wake],
+                                                                                           d_cross[:, k, :k][wake],
+                                                                                           c_t_active[:, :k][wake], r)
+            d_u = self.merged(deficits_active[:, k], k)
+            wind_speeds[:, k] = freestream[active] * (1.0 - d_u)
+            c_t_active[:, k], power_active[:, k] = self.turbines(wind_speeds[:, k])
+        deficits[active] = deficits_active
+        c_t[active] = c_t_active
+        power[active] = power_active
+
+        # Scatter back to the original turbine order.
+        rows = np.arange(self.n_cases)[:, np.newaxis]
+        p = np.zeros((self.n_cases, max_n_turbines))
+        ct = np.zeros((self.n_cases, max_n_turbines))
+        p[rows, permutation] = power
+        ct[rows, permutation] = c_t
+        ordered_padded = np.zeros((self.n_cases, max_n_turbines, 3))
+        ordered_padded[:, :n_turbines] = ordered
+        # As OrderLayout, padded slots keep their own index.
+        permutation_padded = np.tile(np.arange(max_n_turbines), (self.n_cases, 1))
+        permutation_padded[:, :n_turbines] = permutation
+        d_u = np.zeros((self.n_cases, max_n_turbines, max_n_turbines))
+        d_u[:, :n_turbines, :n_turbines] = deficits
+
+        outputs['p'] = p
+        outputs['ct'] = ct
+        outputs['ordered'] = ordered_padded
+        outputs['permutation'] = permutation_padded
+        outputs['dU'] = d_u
+        outputs['closest'] = np.argmax(d_u, axis=2)
+        outputs['waked'] = d_u.sum(axis=2) != 0.0
+
+    def fractions(self, inputs, turbine, other, angle, d_down, d_cross, r):
+        # Argument convention of DetermineIfInWake: the turbine under consideration goes first.
+        if len(angle) == 0:
+            return np.array([])
+        if self.fraction.batched:
+            return self.fraction.wake_fraction_model(inputs, x_upstream=turbine[:, 1], y_upstream=turbine[:, 2],
+                                                     x_downstream=other[:, 1], y_downstream=other[:, 2],
+                                                     wind_direction=angle, downwind_d=d_down, crosswind_d=d_cross,
+                                                     radius=r)
+        model = np.vectorize(lambda xu, yu, xd, yd, wd, dd, dc: self.fraction.wake_fraction_model(
+            inputs, x_upstream=xu, y_upstream=yu, x_downstream=xd, y_downstream=yd, wind_direction=wd, downwind_d=dd,
+            crosswind_d=dc, radius=r), otypes=[float])
+        return model(turbine[:, 1], turbine[:, 2], other[:, 1], other[:, 2], angle, d_down, d_cross)
+
+    def merged(self, deficits, k):
+        # Merged deficit of every case, from the deficits [case, n] on turbine k. Only the k upstream can be nonzero.
+        if self.merge.batched:
+            return self.merge.merge_model(deficits[:, :k], axis=-1)
+        return np.array([self.merge.merge_model(row) for row in deficits])
+
+    def deficits(self, inputs, d_down, d_cross, c_t, r):
+        if len(c_t) == 0:
+            return np.array([])
+        if self.deficit.batched:
+            return self.deficit.wake_deficit_model(inputs, x_down=d_down, x_cross=d_cross, Ct=c_t, r0=r)
+        model = np.vectorize(lambda dd, dc, ct: self.deficit.wake_deficit_model(inputs, x_down=dd, x_cross=dc, Ct=ct,
+                                                                                r0=r), otypes=[float])
+        return model(d_down, d_cross, c_t)
+
+    def turbines(self, u):
+        if self.turbine.batched:
+            return self.turbine.turbine_model(u)
+        model = np.vectorize(self.turbine.turbine_model, otypes=[float, float])
+        return model(u)
@@ -16,19 +16,26 @@ class SpeedDeficits(ExplicitComponent):
         #self.declare_partals(of='U', wrt=['dU', 'freestream'], method='fd')
 
     def compute(self, inputs, outputs):
-        # print "8 Speed"
-        ans = np.array([])
-        for case in range(self.n_cases):
-            dU = inputs['dU'][case]
-            freestream = inputs['freestream'][case]
-        # print dU, 'Input dU'
-            res = [freestream * (1.0 - dU)]
-            ans = np.append(ans, res)
-        ans = ans.reshape(self.n_cases)
-        # print ans
-        # inputs['dU'] = []
-        outputs['U'] = ans
-        # print outputs['U'], "Output U"
+        outputs['U'] = inputs['freestream'] * (1.0 - inputs['dU'])
+
+
+class DominantWake(ExplicitComponent):
+    # Of the deficits on one turbine, only what the wake-added turbulence needs: the ordered position of the upstream
+    # turbine with the largest, closest, and whether there is any, waked. See StreamingMaxTI.
+    def __init__(self, n_cases):
+        super(DominantWake, self).__init__()
+        self.n_cases = n_cases
+
+    def setup(self):
+        self.add_input('dU', shape=(self.n_cases, max_n_turbines))
+        self.add_output('closest', shape=self.n_cases)
+        self.add_output('waked', shape=self.n_cases)
+
+    def compute(self, inputs, outputs):
+        # Only upstream turbines, earlier in the ordering, have deficits on this one, so the column of the largest is
+        # its ordered position.
+        outputs['closest'] = np.argmax(inputs['dU'], axis=1)
+        outputs['waked'] = inputs['dU'].sum(axis=1) != 0.0
 
 
 class CombineOutputs(ExplicitComponent):
@@ -38,47 +45,30 @@ class CombineOutputs(ExplicitComponent):
 
     def setup(self):
 
-        for n in range(max_n_turbines + 1):
-            self.add_input('power{}'.format(n), shape=(self.n_cases, max_n_turbines))
-            self.add_input('ct{}'.format(n), shape=(self.n_cases, max_n_turbines))
+        # Power and Ct of the turbine in each ordered position, as evaluated by the turbines of the chain.
+        for n in range(max_n_turbines):
+            self.add_input('power{}'.format(n), shape=self.n_cases)
+            self.add_input('ct{}'.format(n), shape=self.n_cases)
+
+        #self.declare_partals(of=['p', 'ct'], wrt=['power{}'.format(n), 'ct{}'.format(n)], method='fd')
 
-            #self.declare_partals(of=['p', 'ct'], wrt=['power{}'.format(n), 'ct{}'.format(n)], method='fd')
-            
-        self.add_input('ordered_layout', shape=(self.n_cases, max_n_turbines, 3))
+        self.add_input('permutation', shape=(self.n_cases, max_n_turbines))
         self.add_input('n_turbines', val=1)
 
         self.add_output('p', shape=(self.n_cases, max_n_turbines))
         self.add_output('ct', shape=(self.n_cases, max_n_turbines))
 
-        #self.declare_partals(of=['p', 'ct'], wrt=['ordered_layout', 'n_turbines'], method='fd')
+        #self.declare_partals(of=['p', 'ct'], wrt=['permutation', 'n_turbines'], method='fd')
 
     def compute(self, inputs, outputs):
-        ans = np.array([])
-        ans_ct = np.array([])
         n_turbines = int(inputs['n_turbines'])
-        for case in range(self.n_cases):
-            # print inputs['power0'], inputs['power1'], inputs['power2'], inputs['power3']
-            power_in = inputs['power{}'.format(n_turbines)][case]
-            ct_in = inputs['ct{}'.format(n_turbines)][case]
-            ordered_layout = inputs['ordered_layout'][case][:n_turbines].tolist()
-            # print ordered_layout
-            indices = [i[0] for i in ordered_layout]
-            # print indices
-            # print inputs['U0'], inputs['U1'], inputs['U2']
-            final = [[indices[n], power_in[n]] for n in range(len(indices))]
-            final_ct = [[indices[n], ct_in[n]] for n in range(len(indices))]
-            # print final
-            array_power = [power[1] for power in sorted(final)]
-            array_ct = [c_t[1] for c_t in sorted(final_ct)]
-            # print array_speeds
-            lendif = max_n_turbines - len(array_power)
-            if lendif > 0:
-                array_power = np.concatenate((array_power, [0 for _ in range(lendif)]))
-                array_ct = np.concatenate((array_ct, [0 for _ in range(lendif)]))
-            ans = np.append(ans, array_power)
-            ans_ct = np.append(ans_ct, array_ct)
-        ans = ans.reshape(self.n_cases, max_n_turbines)
-        ans_ct = ans_ct.reshape(self.n_cases, max_n_turbines)
+        # Scatter every case back to the original turbine order.
+        rows = np.arange(self.n_cases)[:, np.newaxis]
+        permutation = inputs['permutation'][:, :n_turbines].astype(int)
+        ans = np.zeros((self.n_cases, max_n_turbines))
+        ans_ct = np.zeros((self.n_cases, max_n_turbines))
+        ans[rows, permutation] = np.stack([inputs['power{}'.format(n)] for n in range(n_turbines)], axis=1)
+        ans_ct[rows, permutation] = np.stack([inputs['ct{}'.format(n)] for n in range(n_turbines)], axis=1)
         # for n in range(self.n_cases):
         #     inputs['U{}'.format(n)] = []
         outputs['p'] = np.array(ans)
@@ -11,18 +11,19 @@ class AbstractWaterDepth(ExplicitComponent):
 
     def setup(self):
         self.add_input('layout', shape=(self.n_turbines, 3))
+        # Turbines actually in the layout. The rest of the n_turbines slots are padding and get a depth of zero.
+        self.add_input('n_turbines', val=self.n_turbines)
 
         self.add_output('water_depths', shape=max_n_turbines)
         #self.declare_partals(of='water_depths', wrt='layout', method='fd')
 
     def compute(self, inputs, outputs):
         layout = inputs['layout']
+        n_turbines = min(int(inputs['n_turbines']), self.n_turbines)
 
-        ans = np.array(self.depth_model(layout[:self.n_turbines]))
-        dif = max_n_turbines - len(ans)
-        if dif > 0:
-            ans = np.append(ans, [0 for _ in range(dif)])
-        ans = ans.reshape(max_n_turbines)
+        ans = np.zeros(max_n_turbines)
+        if n_turbines > 0:
+            ans[:n_turbines] = self.depth_model(layout[:n_turbines])
         outputs['water_depths'] = ans
 
     def depth_model(self, layout):
@@ -6,8 +6,10 @@ from time import clock
 
 
 class WindrosePreprocessor(ExplicitComponent):
-    def __init__(self, real_angle, artificial_angle, n_windspeedbins):
+    def __init__(self, real_angle, artificial_angle, n_windspeedbins, integration='bins', breakpoints=()):
         super(WindrosePreprocessor, self).__init__()
+        self.integration = integration
+        self.breakpoints = breakpoints
         self.real_angle = real_angle
         self.n_directions = int(360.0 / real_angle)
         self.artificial_angle = artificial_angle
@@ -37,29 +39,68 @@ class WindrosePreprocessor(ExplicitComponent):
         wind_directions = inputs['wind_directions']
 
         getdata = WeibullWindBins(weibull_shapes, weibull_scales, dir_probabilities, wind_directions, self.real_angle,
-                                  self.artificial_angle, self.n_windspeedbins)
-        getdata.cutin = cut_in
-        getdata.cutout = cut_out
+                                  self.artificial_angle, self.n_windspeedbins, self.integration, self.breakpoints)
+        getdata.cutin = float(cut_in)
+        getdata.cutout = float(cut_out)
         wind_directions2, direction_probabilities2 = getdata.adapt_directions()
         wind_speeds2, wind_speeds_probabilities2 = getdata.speed_probabilities()
 
-        cases = np.array([])
-        probs = np.array([])
-
-        for wdir, prob1, prob2 in zip(wind_directions2, direction_probabilities2, wind_speeds_probabilities2):
-            for ws, prob3 in zip(wind_speeds2, prob2):
-                cases = np.append(cases, [wdir, ws])
-                probs = np.append(probs, prob1 / 100.0 * prob3 / 100.0)
-        cases = cases.reshape(self.n_cases, 2)
-        probs = probs.reshape(self.n_cases)
-        outputs['probabilities'] = probs
-        outputs['cases'] = np.array(cases)
+        # Every direction with every wind speed, the directions varying slowest. The probability of each case is the
+        # outer product of those of its direction and its speed bin. Gauss nodes differ between directions.
+        wind_directions2 = np.ravel(wind_directions2)
+        wind_speeds2 = np.array(wind_speeds2, dtype=float)
+        if self.integration == 'bins':
+            wind_speeds2 = np.tile(np.ravel(wind_speeds2), len(wind_directions2))
+        n_speeds = wind_speeds2.size // len(wind_directions2)
+        cases = np.column_stack((np.repeat(wind_directions2, n_speeds), np.ravel(wind_speeds2)))
+        probs = np.ravel(direction_probabilities2)[:, np.newaxis] / 100.0 * np.array(wind_speeds_probabilities2) / 100.0
+        outputs['probabilities'] = probs.reshape(self.n_cases)
+        outputs['cases'] = cases.reshape(self.n_cases, 2)
+
+
+def cumulative_weibull(wind_speed, weibull_scale, weibull_shape):
+    return 1.0 - exp(-(wind_speed / weibull_scale) ** weibull_shape)
+
+
+def weibull_bin_probabilities(edges, weibull_scales, weibull_shapes):
+    # Probability of the wind speed being below the first edge, between each two consecutive edges and above the last
+    # one, for every direction: (n_directions, len(edges) + 1), from the Weibull CDF on the whole
+    # (n_directions, len(edges)) grid at once.
+    edges = np.ravel(np.array(edges, dtype=float))
+    cdf = cumulative_weibull(edges, np.array(weibull_scales, dtype=float).reshape(-1, 1),
+                             np.array(weibull_shapes, dtype=float).reshape(-1, 1))
+    bounds = np.ones((cdf.shape[0], 1))
+    return np.diff(np.hstack((0.0 * bounds, cdf, bounds)), axis=1)
+
+
+def gauss_weibull_speeds(n_nodes, weibull_scales, weibull_shapes, cut_in, cut_out, breakpoints=()):
+    # Gauss-Legendre nodes and weights for integrating the power over the wind speed distribution of every direction,
+    # between cut-in and cut-out. The rule is applied in q = F(u), the Weibull CDF, so that the integrand is the power
+    # curve alone. With breakpoints, speeds where the power curve has a kink (e.g. rated), the interval is split there and
+    # the nodes shared among the pieces, so that each piece is smooth. Wind outside cut-in and cut-out produces no power
+    # and gets no node. Returns speeds and probabilities, (n_directions, n_nodes) each.
+    edges = np.unique(np.clip(np.concatenate(([cut_in], np.ravel(breakpoints), [cut_out])), cut_in, cut_out))
+    n_pieces = len(edges) - 1
+    if n_nodes < n_pieces:
+        raise ValueError('At least one node is needed between each two breakpoints.')
+    scales = np.array(weibull_scales, dtype=float).reshape(-1, 1)
+    shapes = np.array(weibull_shapes, dtype=float).reshape(-1, 1)
+    speeds = []
+    probabilities = []
+    for piece in range(n_pieces):
+        nodes, weights = np.polynomial.legendre.leggauss(n_nodes // n_pieces + (1 if piece < n_nodes % n_pieces else 0))
+        q_low = cumulative_weibull(edges[piece], scales, shapes)
+        q_high = cumulative_weibull(edges[piece + 1], scales, shapes)
+        q = q_low + (q_high - q_low) * (nodes + 1.0) / 2.0
+        speeds.append(scales * (- np.log(1.0 - q)) ** (1.0 / shapes))
+        probabilities.append((q_high - q_low) * weights / 2.0)
+    return np.hstack(speeds), np.hstack(probabilities)
 
 
 class WeibullWindBins(object):
 
     def __init__(self, weibull_shapes, weibull_scales, dir_probabilities, direction, real_directions,
-                 artificial_directions, n_windspeedbins):
+                 artificial_directions, n_windspeedbins, integration='bins', breakpoints=()):
         self.weibull_scale = weibull_scales
         self.weibull_shape = weibull_shapes
         self.direction = direction
@@ -69,6 +110,10 @@ class WeibullWindBins(object):
         self.n_directions = real_directions
 
         self.nbins = n_windspeedbins
+        # 'bins': n_windspeedbins uniform bins between cut-in and cut-out. 'gauss': n_windspeedbins + 1 Gauss nodes per
+        # direction, see gauss_weibull_speeds.
+        self.integration = integration
+        self.breakpoints = breakpoints
         self.artificial_angle = artificial_directions
         self.real_angle = real_directions
         self.new_direction = []
@@ -124,7 +169,7 @@ class WeibullWindBins(object):
 
     def cumulative_weibull(self, wind_speed, weibull_scale_dir, weibull_shape_dir):
 
-        return 1.0 - exp(-(wind_speed / weibull_scale_dir) ** weibull_shape_dir)
+        return cumulative_weibull(wind_speed, weibull_scale_dir, weibull_shape_dir)
 
     def get_wind_speeds(self):
         if self.nbins > 0:
@@ -140,39 +185,19 @@ class WeibullWindBins(object):
 
     def speed_probabilities(self):
         self.adapt_directions()
-        speed_probabilities = []
+        if self.integration == 'gauss':
+            # Speeds of each direction.
+            speeds, probabilities = gauss_weibull_speeds(self.nbins + 1, self.new_weibull_scale2, self.new_weibull_shape2,
+                                                         self.cutin, self.cutout, self.breakpoints)
+            self.windspeeds = speeds.tolist()
+            return self.windspeeds, (probabilities * 100.0).tolist()
+        elif self.integration != 'bins':
+            raise ValueError("integration should be 'bins' or 'gauss'.")
         self.windspeeds = self.get_wind_speeds()
-
-        for angle in self.new_direction2:
-            place = self.new_direction2.index(angle)
-            prob_cutout = (1.0 - self.cumulative_weibull(self.cutout, self.new_weibull_scale2[place],
-                                                         self.new_weibull_shape2[place]))
-            length = len(self.windspeeds)
-            windspeedprobabilities = [0.0 for _ in range(length)]
-
-            for i in range(length):
-
-                if i == 0:
-
-                    windspeedprobabilities[i] = (self.cumulative_weibull(self.windspeeds[i],
-                                                                         self.new_weibull_scale2[place],
-                                                                         self.new_weibull_shape2[place]))
-
-                elif i < length - 1:
-
-                    windspeedprobabilities[i] = (self.cumulative_weibull(self.windspeeds[i],
-                                                                         self.new_weibull_scale2[place],
-                                                                         self.new_weibull_shape2[place]) -
-                                                 sum(windspeedprobabilities[:i]))
-
-                elif i == length - 1:
-
-                    windspeedprobabilities[i] = (self.cumulative_weibull(self.windspeeds[i],
-                                                                         self.new_weibull_scale2[place],
-                                                                         self.new_weibull_shape2[place]) -
-                                                 sum(windspeedprobabilities[:i]) + prob_cutout)
-
-            speed_probabilities.append([item * 100.0 for item in windspeedprobabilities])
+        probabilities = weibull_bin_probabilities(self.windspeeds, self.new_weibull_scale2, self.new_weibull_shape2)
+        # Speeds above cut-out count in the last bin.
+        probabilities[:, -2] += probabilities[:, -1]
+        speed_probabilities = (probabilities[:, :-1] * 100.0).tolist()
 
         return self.windspeeds, speed_probabilities
 
@@ -10,6 +10,10 @@ class Samples():
 	def __init__(self):
 		self.wind_speeds = 7
 		self.wind_sector_angle = 6.0
+		# Wind speed integration: uniform 'bins', or 'gauss' nodes on the Weibull distribution of each direction, with the
+		# interval split at the power curve breakpoints (e.g. rated wind speed).
+		self.integration = 'bins'
+		self.breakpoints = []
 
 
 class Input():
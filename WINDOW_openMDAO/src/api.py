@@ -1,7 +1,9 @@
 from AbsWakeModel.wake_linear_solver import WakeModel
+from AbsWakeModel.wake_vectorized import VectorizedWakeModel, turbine_src_indices
 from AbsWakeModel.AbstractWakeModel import DetermineIfInWake, WakeDeficit
 from AbsAEP.farmpower_workflow import AEPWorkflow
-from AbsTurbulence.abstract_wake_TI import AbstractWakeAddedTurbulence, DeficitMatrix, CtMatrix
+from AbsAEP.case_pruning import CasePruning
+from AbsTurbulence.abstract_wake_TI import AbstractWakeAddedTurbulence, DeficitMatrix, CtMatrix, StreamingMaxTI
 from AbsWakeModel.AbsWakeMerge.abstract_wake_merging import AbstractWakeMerge
 from AbsTurbulence.TI_workflow import TIWorkflow
 from SiteConditionsPrep.depth_process import AbstractWaterDepth
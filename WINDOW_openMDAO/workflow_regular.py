@@ -7,7 +7,7 @@ import numpy as np
 from time import time, clock
 from WINDOW_openMDAO.input_params import rotor_radius as turbine_radius, max_n_turbines, max_n_substations, interest_rate, central_platform, areas, n_quadrilaterals, separation_equation_y, cutin_wind_speed, cutout_wind_speed, operational_lifetime, number_turbines_per_cable, wind_directions, weibull_shapes, weibull_scales, direction_probabilities, TI_ambient, n_windrose_sectors, coll_electrical_efficiency, transm_electrical_efficiency, downwind_spacing, crosswind_spacing, odd_row_shift_spacing, layout_angle
 from WINDOW_openMDAO.WakeModel.WakeMerge.RSS import MergeRSS
-from WINDOW_openMDAO.src.api import AEPWorkflow, TIWorkflow, MaxTI, AEP, NumberLayout, MinDistance, WithinBoundaries, RegularLayout, read_layout, read_windrose
+from WINDOW_openMDAO.src.api import AEPWorkflow, WakeModel, VectorizedWakeModel, turbine_src_indices, TIWorkflow, MaxTI, AEP, NumberLayout, MinDistance, WithinBoundaries, RegularLayout, read_layout, read_windrose
 from WINDOW_openMDAO.src.Utils.util_components import create_random_layout
 from WINDOW_openMDAO.WakeModel.Turbulence.turbulence_wake_models import Frandsen2, DanishRecommendation, Larsen, Frandsen, Quarton
 from WINDOW_openMDAO.WaterDepth.water_depth_models import RoughInterpolation, RoughClosestNode
@@ -22,8 +22,12 @@ real_angle = 360.0 / n_windrose_sectors
 
 
 class WorkingGroup(Group):
-    def __init__(self, fraction_model=JensenWakeFraction, direction_sampling_angle=30.0, windspeed_sampling_points=3, deficit_model=JensenWakeDeficit, merge_model=MergeRSS, turbulence_model=DanishRecommendation, turbine_model=Curves):
+    def __init__(self, fraction_model=JensenWakeFraction, direction_sampling_angle=30.0, windspeed_sampling_points=3, deficit_model=JensenWakeDeficit, merge_model=MergeRSS, turbulence_model=DanishRecommendation, turbine_model=Curves, record_TI=False, wake_group=WakeModel):
         super(WorkingGroup, self).__init__()
+        # Keep the TI_eff of every case, e.g. for a recorder, instead of only its maximum over the cases.
+        self.record_TI = record_TI
+        # WakeModel, or VectorizedWakeModel to evaluate the wakes of all cases in one component.
+        self.wake_group = wake_group
         self.fraction_model = fraction_model
         self.deficit_model = deficit_model
         self.merge_model = merge_model
@@ -63,12 +67,13 @@ class WorkingGroup(Group):
         self.add_subsystem('depths', RoughClosestNode(max_n_turbines))
         self.add_subsystem('platform_depth', RoughClosestNode(max_n_substations))
 
-        self.add_subsystem('AeroAEP', AEPWorkflow(real_angle, self.direction_sampling_angle, self.windspeed_sampling_points, self.fraction_model, self.deficit_model, self.merge_model, self.turbine_model))
-        self.add_subsystem('TI', TIWorkflow(self.n_cases, self.turbulence_model))
+        self.add_subsystem('AeroAEP', AEPWorkflow(real_angle, self.direction_sampling_angle, self.windspeed_sampling_points, self.fraction_model, self.deficit_model, self.merge_model, self.turbine_model, self.wake_group))
+        self.add_subsystem('TI', TIWorkflow(self.n_cases, self.turbulence_model, streaming=not self.record_TI))
 
         self.add_subsystem('electrical', TopologyHybridHeuristic())
 
-        self.add_subsystem('find_max_TI', MaxTI(self.n_cases))
+        if self.record_TI:
+            self.add_subsystem('find_max_TI', MaxTI(self.n_cases))
         self.add_subsystem('support', TeamPlay())
         self.add_subsystem('OandM', OM_model1())
         self.add_subsystem('AEP', AEP())
@@ -84,7 +89,7 @@ class WorkingGroup(Group):
 
         self.connect('numberlayout.number_layout', ['depths.layout', 'AeroAEP.original'])
 
-        self.connect("regular_layout.n_turbines_regular", ['AeroAEP.n_turbines', 'TI.n_turbines', 'electrical.n_turbines', 'support.n_turbines', 'Costs.n_turbines'])
+        self.connect("regular_layout.n_turbines_regular", ['AeroAEP.n_turbines', 'TI.n_turbines', 'depths.n_turbines', 'electrical.n_turbines', 'support.n_turbines', 'Costs.n_turbines'])
         self.connect('indep2.cut_in', 'AeroAEP.cut_in')
         self.connect('indep2.cut_out', 'AeroAEP.cut_out')
         self.connect('indep2.weibull_shapes', 'AeroAEP.weibull_shapes')
@@ -93,11 +98,26 @@ class WorkingGroup(Group):
         self.connect('indep2.wind_directions', 'AeroAEP.wind_directions')
         self.connect('indep2.turbine_radius', ['AeroAEP.turbine_radius', 'TI.radius'])
 
-        for n in range(max_n_turbines):
-            self.connect('AeroAEP.wakemodel.linear_solve.deficits{}.dU'.format(n), 'TI.dU_matrix.deficits{}'.format(n))
-            self.connect('AeroAEP.wakemodel.linear_solve.turbine{}.ct'.format(n), 'TI.ct_matrix.ct{}'.format(n))
-
-        self.connect('AeroAEP.wakemodel.linear_solve.order_layout.ordered', 'TI.ordered')
+        if issubclass(self.wake_group, VectorizedWakeModel):
+            # The values of each turbine are taken out of the arrays of all of them.
+            for n in range(max_n_turbines):
+                if self.record_TI:
+                    self.connect('AeroAEP.wakemodel.dU', 'TI.dU_matrix.deficits{}'.format(n), src_indices=turbine_src_indices(self.n_cases, n, max_n_turbines), flat_src_indices=True)
+                else:
+                    self.connect('AeroAEP.wakemodel.closest', 'TI.closest{}'.format(n), src_indices=turbine_src_indices(self.n_cases, n), flat_src_indices=True)
+                    self.connect('AeroAEP.wakemodel.waked', 'TI.waked{}'.format(n), src_indices=turbine_src_indices(self.n_cases, n), flat_src_indices=True)
+            self.connect('AeroAEP.wakemodel.ordered', 'TI.ordered')
+            self.connect('AeroAEP.wakemodel.permutation', 'TI.permutation')
+        else:
+            for n in range(max_n_turbines):
+                if self.record_TI:
+                    self.connect('AeroAEP.wakemodel.linear_solve.deficits{}.dU'.format(n), 'TI.dU_matrix.deficits{}'.format(n))
+                else:
+                    self.connect('AeroAEP.wakemodel.linear_solve.deficits{}.closest'.format(n), 'TI.closest{}'.format(n))
+                    self.connect('AeroAEP.wakemodel.linear_solve.deficits{}.waked'.format(n), 'TI.waked{}'.format(n))
+            self.connect('AeroAEP.wakemodel.linear_solve.order_layout.ordered', 'TI.ordered')
+            self.connect('AeroAEP.wakemodel.linear_solve.order_layout.permutation', 'TI.permutation')
+        self.connect('AeroAEP.wakemodel.ct', 'TI.ct')
         self.connect('indep2.TI_amb', 'TI.TI_amb')
         self.connect('AeroAEP.open_cases.freestream_wind_speeds', 'TI.freestream')
 
@@ -106,9 +126,12 @@ class WorkingGroup(Group):
         self.connect('indep2.substation_coords', 'electrical.substation_coords')
         self.connect('indep2.n_substations', 'electrical.n_substations')
 
-        self.connect('TI.TI_eff', 'find_max_TI.all_TI')
+        if self.record_TI:
+            self.connect('TI.TI_eff', 'find_max_TI.all_TI')
+            self.connect('find_max_TI.max_TI', 'support.max_TI')
+        else:
+            self.connect('TI.max_TI', 'support.max_TI')
         self.connect('depths.water_depths', 'support.depth')
-        self.connect('find_max_TI.max_TI', 'support.max_TI')
 
         self.connect('AeroAEP.AEP', 'OandM.AEP')
         self.connect('OandM.availability', 'AEP.availability')
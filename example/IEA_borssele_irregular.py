@@ -16,7 +16,7 @@ from WINDOW_openMDAO.OandM.OandM_models import OM_model1
 from WINDOW_openMDAO.AEP.aep_fast_component import AEPFast
 from WINDOW_openMDAO.Costs.teamplay_costmodel import TeamPlayCostModel
 from WINDOW_openMDAO.AEP.FastAEP.farm_energy.wake_model_mean_new.wake_turbulence_models import frandsen2, danish_recommendation, frandsen, larsen_turbulence, Quarton, constantturbulence
-from WINDOW_openMDAO.AEP.FastAEP.farm_energy.wake_model_mean_new.downstream_effects import JensenEffects as Jensen, LarsenEffects as Larsen, Ainslie1DEffects as Ainslie1D, Ainslie2DEffects as Ainslie2D, constantwake
+from WINDOW_openMDAO.AEP.FastAEP.farm_energy.wake_model_mean_new.downstream_effects import JensenEffects as Jensen, LarsenEffects as Larsen, Ainslie1DEffects as Ainslie1D, Ainslie2DEffects as Ainslie2D, TabulatedAinslie1DEffects as TabulatedAinslie1D, TabulatedAinslie2DEffects as TabulatedAinslie2D, constantwake
 from WINDOW_openMDAO.AEP.FastAEP.farm_energy.wake_model_mean_new.wake_overlap import root_sum_square, maximum, multiplied, summed
 
 # Imports the Options class to instantiate a workflow.
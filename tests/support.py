@@ -0,0 +1,20 @@
+import os
+import sys
+
+# The input parameters and the files they point to are read from the Input directory of the example, with paths
+# relative to it. Test modules enter it in setUpModule, before importing WINDOW_openMDAO, and leave it in
+# tearDownModule.
+example = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'example')
+saved = []
+
+
+def enter_example():
+    saved.append((os.getcwd(), list(sys.path)))
+    sys.path.insert(0, example)
+    os.chdir(example)
+
+
+def leave_example():
+    cwd, path = saved.pop()
+    os.chdir(cwd)
+    sys.path[:] = path
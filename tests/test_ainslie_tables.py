@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import support
+
+
+def setUpModule():
+    global ainslie_tables, ainslie, ainslie_full
+    support.enter_example()
+    from WINDOW_openMDAO.AEP.FastAEP.farm_energy.wake_model_mean_new import ainslie_tables
+    from WINDOW_openMDAO.AEP.FastAEP.farm_energy.wake_model_mean_new.ainslie1d import ainslie
+    from WINDOW_openMDAO.AEP.FastAEP.farm_energy.wake_model_mean_new.ainslie2d import ainslie_full
+
+
+def tearDownModule():
+    support.leave_example()
+
+
+# Small grids, so that the tables build in a moment.
+axes_1d = [[0.3, 0.8], [8.0, 12.0], [0.08, 0.12], np.linspace(2.0, 20.0, 10)]
+axes_2d = [[0.3, 0.8], [8.0, 12.0], [0.08, 0.12], [2.0, 5.0, 10.0]]
+
+
+def grid_points(axes):
+    ct, u0, i0, parallel = [grid.ravel() for grid in np.meshgrid(*axes, indexing='ij')]
+    return ct, u0, parallel, i0
+
+
+class TestAinslieTable(unittest.TestCase):
+    def setUp(self):
+        self.cache_directory = ainslie_tables.cache_directory
+        ainslie_tables.cache_directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(ainslie_tables.cache_directory)
+        ainslie_tables.cache_directory = self.cache_directory
+
+    def test_same_as_1d_at_grid_points(self):
+        table = ainslie_tables.AinslieTable('1d', axes_1d)
+        ct, u0, parallel, i0 = grid_points(axes_1d)
+        for perpendicular in [0.0, 0.5, 1.2]:
+            direct = np.array([ainslie(*point) for point in zip(ct, u0, parallel, np.full(len(ct), perpendicular), i0)])
+            np.testing.assert_allclose(table(ct, u0, parallel, perpendicular, i0), direct, rtol=1e-10, atol=1e-15)
+
+    def test_same_as_2d_at_grid_points(self):
+        table = ainslie_tables.AinslieTable('2d', axes_2d)
+        ct, u0, parallel, i0 = grid_points(axes_2d)
+        for perpendicular in [0.0, 0.5, 1.2]:
+            np.testing.assert_allclose(table(ct, u0, parallel, perpendicular, i0),
+                                       ainslie_full(ct, u0, parallel, perpendicular, i0), rtol=1e-10, atol=1e-15)
+
+    def test_beyond_grid(self):
+        table = ainslie_tables.AinslieTable('2d', axes_2d)
+        self.assertEqual(table(0.8, 8.0, 10.5, 0.0, 0.08), 0.0)
+        self.assertEqual(table(0.8, 8.0, 5.0, 2.5, 0.08), 0.0)
+        self.assertTrue(table(0.8, 8.0, 5.0, 0.0, 0.08) > 0.0)
+
+    def test_stored(self):
+        first = ainslie_tables.AinslieTable('1d', axes_1d)
+        stored = os.listdir(ainslie_tables.cache_directory)
+        self.assertEqual(stored, [os.path.basename(ainslie_tables.table_path('1d', first.axes))])
+        second = ainslie_tables.AinslieTable('1d', axes_1d)
+        self.assertEqual(os.listdir(ainslie_tables.cache_directory), stored)
+        self.assertEqual(second(0.5, 10.0, 7.0, 0.3, 0.1), first(0.5, 10.0, 7.0, 0.3, 0.1))
+
+    def test_stored_meanwhile(self):
+        # Another process saved the same table while this one built it, and the rename fails as on Windows.
+        rename = os.rename
+
+        def rename_over_existing(source, target):
+            shutil.copy(source, target)
+            raise OSError('target exists')
+        os.rename = rename_over_existing
+        try:
+            table = ainslie_tables.AinslieTable('1d', axes_1d)
+        finally:
+            os.rename = rename
+        self.assertEqual(os.listdir(ainslie_tables.cache_directory),
+                         [os.path.basename(ainslie_tables.table_path('1d', table.axes))])
+        self.assertTrue(table(0.5, 10.0, 7.0, 0.3, 0.1) > 0.0)
+
+    def test_failed_save(self):
+        rename = os.rename
+
+        def failing_rename(source, target):
+            raise OSError('no space left')
+        os.rename = failing_rename
+        try:
+            self.assertRaises(OSError, ainslie_tables.AinslieTable, '1d', axes_1d)
+        finally:
+            os.rename = rename
+        self.assertEqual(os.listdir(ainslie_tables.cache_directory), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+
+import numpy as np
+
+import support
+
+
+def setUpModule():
+    global Problem, Group, IndepVarComp, max_n_turbines, layout, rotor_radius, turbine_rated_power, CasePruning, \
+        VectorizedWakeModel, JensenWakeFraction, JensenWakeDeficit, MergeRSS, Polynomial
+    support.enter_example()
+    from openmdao.api import Problem, Group, IndepVarComp
+    from WINDOW_openMDAO.input_params import max_n_turbines, layout, rotor_radius, turbine_rated_power
+    from WINDOW_openMDAO.src.api import CasePruning, VectorizedWakeModel
+    from WINDOW_openMDAO.WakeModel.jensen import JensenWakeFraction, JensenWakeDeficit
+    from WINDOW_openMDAO.WakeModel.WakeMerge.RSS import MergeRSS
+    from WINDOW_openMDAO.Turbine.polynomial import Polynomial
+
+
+def tearDownModule():
+    support.leave_example()
+
+
+def pruning_problem(freestream, probabilities, n_turbines=10, **options):
+    n_cases = len(freestream)
+    model = Group()
+    indep = model.add_subsystem('indep', IndepVarComp(), promotes=['*'])
+    indep.add_output('cases', val=np.column_stack((np.zeros(n_cases), freestream)))
+    indep.add_output('probabilities', val=probabilities)
+    indep.add_output('n_turbines', val=n_turbines)
+    model.add_subsystem('pruning', CasePruning(n_cases, Polynomial, **options), promotes=['*'])
+    problem = Problem(model)
+    problem.setup()
+    problem.run_model()
+    return problem
+
+
+def wake_problem(active, n_turbines=20):
+    # Vectorized wakes of the first turbines of the example layout, for 12 directions at two wind speeds.
+    angle = np.tile(np.arange(0.0, 360.0, 30.0), 2)
+    original = np.zeros((max_n_turbines, 3))
+    original[:, 0] = np.arange(max_n_turbines)
+    original[:n_turbines, 1:] = np.array(layout[:n_turbines]) - np.min(layout, axis=0) + 1000.0
+    model = Group()
+    indep = model.add_subsystem('indep', IndepVarComp(), promotes=['*'])
+    indep.add_output('original', val=original)
+    indep.add_output('angle', val=angle)
+    indep.add_output('freestream', val=np.repeat([8.0, 12.0], 12))
+    indep.add_output('n_turbines', val=n_turbines)
+    indep.add_output('turbine_radius', val=rotor_radius)
+    indep.add_output('active', val=active)
+    model.add_subsystem('wake', VectorizedWakeModel(len(angle), JensenWakeFraction, JensenWakeDeficit, MergeRSS,
+                                                    Polynomial), promotes_inputs=['*'])
+    problem = Problem(model)
+    problem.setup()
+    problem.run_model()
+    return problem
+
+
+class TestCasePruning(unittest.TestCase):
+    def test_active(self):
+        # Below cut-in and above rated the power curve is flat; 30 m/s drops from rated to zero, 11 m/s from rated.
+        freestream = [3.0, 8.0, 8.0, 11.0, 15.0, 15.0, 30.0]
+        probabilities = [0.1, 0.0, 0.2, 0.001, 0.1, 0.001, 0.1]
+        problem = pruning_problem(freestream, probabilities, min_probability=0.01, max_deficit=0.2)
+        np.testing.assert_array_equal(problem['active'], [0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0])
+        # Only the improbable case that is not flat can be off, by at most its free stream energy.
+        bound = 0.001 * 10 * turbine_rated_power * 8760.0
+        self.assertAlmostEqual(problem['AEP_error_bound'] / bound, 1.0, places=12)
+
+    def test_no_pruning(self):
+        problem = pruning_problem([3.0, 8.0, 15.0], [0.2, 0.3, 0.5])
+        np.testing.assert_array_equal(problem['active'], [1.0, 1.0, 1.0])
+        self.assertEqual(problem['AEP_error_bound'], 0.0)
+
+    def test_min_energy(self):
+        problem = pruning_problem([3.0, 8.0, 15.0], [0.2, 0.3, 0.5], min_energy=1.0)
+        # Below cut-in there is no energy to lose, so the bound stays zero.
+        np.testing.assert_array_equal(problem['active'], [0.0, 1.0, 1.0])
+        self.assertEqual(problem['AEP_error_bound'], 0.0)
+
+
+class TestInactiveCases(unittest.TestCase):
+    def test_free_stream(self):
+        active = np.ones(24)
+        active[::5] = 0.0
+        full = wake_problem(np.ones(24))
+        pruned = wake_problem(active)
+        on = active > 0.0
+        for name in ['p', 'ct', 'dU']:
+            np.testing.assert_array_equal(pruned['wake.' + name][on], full['wake.' + name][on])
+        # Inactive cases run at the free stream, the power of the unwaked turbines, without deficits for the
+        # wake-added turbulence.
+        free = full['wake.p'][~on, :20].max(axis=1)
+        np.testing.assert_array_equal(pruned['wake.p'][~on, :20], np.repeat(free[:, np.newaxis], 20, axis=1))
+        self.assertFalse(np.any(pruned['wake.dU'][~on]))
+        self.assertFalse(np.any(pruned['wake.waked'][~on]))
+        self.assertTrue(np.any(full['wake.dU'][~on]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+
+import support
+
+
+def setUpModule():
+    global build_workflow, JensenEffects, LarsenEffects, frandsen, root_sum_square, layout, Problem, Group, \
+        IndepVarComp, WindrosePreprocessor, read_windrose
+    support.enter_example()
+    from WINDOW_openMDAO.AEP.FastAEP.call_aep_workflow_once import build_workflow
+    from WINDOW_openMDAO.AEP.FastAEP.farm_energy.wake_model_mean_new.downstream_effects import JensenEffects, \
+        LarsenEffects
+    from WINDOW_openMDAO.AEP.FastAEP.farm_energy.wake_model_mean_new.wake_turbulence_models import frandsen
+    from WINDOW_openMDAO.AEP.FastAEP.farm_energy.wake_model_mean_new.wake_overlap import root_sum_square
+    from WINDOW_openMDAO.input_params import layout
+    from openmdao.api import Problem, Group, IndepVarComp
+    from WINDOW_openMDAO.src.api import read_windrose
+    from WINDOW_openMDAO.src.SiteConditionsPrep.windrose_process import WindrosePreprocessor
+
+
+def tearDownModule():
+    support.leave_example()
+
+
+def wake_cache_size():
+    # Run in a pool worker, to see its own wake cache.
+    from WINDOW_openMDAO.AEP.FastAEP.farm_energy.wake_model_mean_new.memoize import wake_cache
+    return wake_cache.stats()['size']
+
+
+def workflow(integration='bins', breakpoints=(), wake_model=None):
+    return build_workflow(wake_model or JensenEffects, frandsen, root_sum_square, 'Input/power_dtu10.dat', 'Input/ct_dtu10.dat',
+                          'Input/weibull_windrose_12unique.dat', 7, 30.0, integration, breakpoints)
+
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.layout = [list(map(float, turbine)) for turbine in layout[:20]]
+        self.moved = [list(turbine) for turbine in self.layout]
+        self.moved[3][0] += 150.0
+        self.moved[11][1] -= 200.0
+
+    def assertSameRun(self, run, reference):
+        self.assertAlmostEqual(run[0] / reference[0], 1.0, places=12)
+        for turbulence, expected in zip(run[1], reference[1]):
+            self.assertAlmostEqual(turbulence, expected, places=12)
+
+    def test_moved_turbines(self):
+        with workflow() as incremental:
+            incremental.incremental = True
+            incremental.run(self.layout)
+            self.assertSameRun(incremental.run(self.moved), workflow().run(self.moved))
+
+    def test_new_wind_conditions(self):
+        # The states of the previous wind speeds are not reused after prepare_wind_conditions.
+        with workflow('gauss') as incremental:
+            incremental.incremental = True
+            incremental.run(self.layout)
+            incremental.windrose.breakpoints = [11.0]
+            incremental.prepare_wind_conditions()
+            self.assertSameRun(incremental.run(self.moved), workflow('gauss', [11.0]).run(self.moved))
+            self.assertSameRun(incremental.run(self.layout), workflow('gauss', [11.0]).run(self.layout))
+
+
+class TestWakeThreshold(unittest.TestCase):
+    def test_turbulence_of_weak_wakes(self):
+        # The threshold only changes the wind speeds. The turbulence still comes from the largest deficit, however weak.
+        turbines = [list(map(float, turbine)) for turbine in layout[:25]]
+        for wake_model in [JensenEffects, LarsenEffects]:
+            reference = workflow('gauss', wake_model=wake_model).run(turbines)
+            pruned = workflow('gauss', wake_model=wake_model)
+            pruned.wake_threshold = 1e-2
+            energy, turbulences, _ = pruned.run(turbines)
+            self.assertAlmostEqual(energy / reference[0], 1.0, places=2)
+            self.assertNotEqual(energy, reference[0])
+            for turbulence, expected in zip(turbulences, reference[1]):
+                self.assertAlmostEqual(turbulence, expected, places=12)
+
+    def test_new_wake_model(self):
+        turbines = [list(map(float, turbine)) for turbine in layout[:25]]
+        reference = workflow(wake_model=LarsenEffects)
+        reference.wake_threshold = 1e-2
+        changed = workflow()
+        changed.wake_threshold = 1e-2
+        changed.run(turbines)
+        changed.wake_mean_model = LarsenEffects
+        self.assertEqual(changed.run(turbines)[0], reference.run(turbines)[0])
+
+
+class TestGaussIntegration(unittest.TestCase):
+    def test_same_as_windrose_preprocessor(self):
+        # FastAEP evaluates the same nodes and weights as the OpenMDAO workflows.
+        directions, scales, shapes, probabilities = read_windrose('Input/weibull_windrose_12unique.dat')
+        for breakpoints in [(), (11.0,)]:
+            fast = workflow('gauss', breakpoints)
+            model = Group()
+            indep = model.add_subsystem('indep', IndepVarComp(), promotes=['*'])
+            indep.add_output('wind_directions', val=directions)
+            indep.add_output('weibull_scales', val=scales)
+            indep.add_output('weibull_shapes', val=shapes)
+            indep.add_output('dir_probabilities', val=probabilities)
+            model.add_subsystem('windrose', WindrosePreprocessor(30.0, 30.0, 7, 'gauss', breakpoints), promotes=['*'])
+            problem = Problem(model)
+            problem.setup()
+            problem.run_model()
+            cases = problem['cases'].reshape(12, 8, 2)
+            case_probabilities = problem['probabilities'].reshape(12, 8)
+            for i in range(12):
+                self.assertTrue(all(cases[i, :, 0] == fast.wind_directions[i]))
+                self.assertEqual(list(cases[i, :, 1]), fast.wind_speeds[i])
+                for probability, speed_probability in zip(case_probabilities[i], fast.wind_speeds_probabilities[i]):
+                    self.assertAlmostEqual(probability,
+                                           fast.direction_probabilities[i] / 100.0 * speed_probability / 100.0,
+                                           places=15)
+
+
+class TestProcessWorkers(unittest.TestCase):
+    def setUp(self):
+        self.turbines = [list(map(float, turbine)) for turbine in layout[:20]]
+        self.reference = workflow().run(self.turbines)
+
+    def worker_cache_sizes(self, keep_wake_cache):
+        with workflow() as parallel:
+            parallel.executor = 'process'
+            parallel.workers = 2
+            parallel.keep_wake_cache = keep_wake_cache
+            self.assertEqual(parallel.run(self.turbines), self.reference)
+            return [pool.apply(wake_cache_size) for pool in parallel.pool]
+
+    def test_wake_cache_reset(self):
+        self.assertEqual(self.worker_cache_sizes(False), [0, 0])
+
+    def test_keep_wake_cache(self):
+        self.assertTrue(all(size > 0 for size in self.worker_cache_sizes(True)))
+
+
+if __name__ == '__main__':
+    unittest.main()
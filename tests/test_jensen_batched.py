@@ -0,0 +1,90 @@
+import unittest
+
+import numpy as np
+
+import support
+
+
+def setUpModule():
+    global Problem, Group, IndepVarComp, max_n_turbines, DistanceComponent, JensenWakeFraction, JensenWakeDeficit, \
+        ScalarJensenWakeFraction, ScalarJensenWakeDeficit
+    support.enter_example()
+    from openmdao.api import Problem, Group, IndepVarComp
+    from WINDOW_openMDAO.input_params import max_n_turbines
+    from WINDOW_openMDAO.src.AbsWakeModel.distance import DistanceComponent
+    from WINDOW_openMDAO.WakeModel.jensen import JensenWakeFraction, JensenWakeDeficit, determine_if_in_wake
+
+    # The same models, evaluated one case at a time.
+    class ScalarJensenWakeFraction(JensenWakeFraction):
+        batched = False
+
+        def wake_fraction_model(self, inputs, *args, **kwargs):
+            return determine_if_in_wake(k_jensen=0.04, *args, **kwargs)
+
+    class ScalarJensenWakeDeficit(JensenWakeDeficit):
+        batched = False
+
+
+def tearDownModule():
+    support.leave_example()
+
+
+def wake(fraction_model, deficit_model, number, ordered, angle, ct, n_turbines):
+    # Fractions and deficits of turbine number on the other turbines, for every case.
+    n_cases = len(angle)
+    group = Group()
+    indep = IndepVarComp()
+    indep.add_output('ordered', val=ordered)
+    indep.add_output('angle', val=angle)
+    indep.add_output('ct', val=ct)
+    indep.add_output('n_turbines', val=n_turbines)
+    indep.add_output('turbine_radius', val=40.0)
+    group.add_subsystem('indep', indep, promotes=['*'])
+    group.add_subsystem('distance', DistanceComponent(number, n_cases), promotes_inputs=['*'])
+    group.add_subsystem('fraction', fraction_model(number, n_cases), promotes_inputs=['ordered', 'angle', 'n_turbines', 'turbine_radius'])
+    group.add_subsystem('deficit', deficit_model(n_cases), promotes_inputs=['ct', 'n_turbines', 'turbine_radius'])
+    group.connect('distance.dist_down', ['fraction.downwind_d', 'deficit.downwind_d'])
+    group.connect('distance.dist_cross', ['fraction.crosswind_d', 'deficit.crosswind_d'])
+    group.connect('fraction.fractions', 'deficit.fractions')
+    problem = Problem(group)
+    problem.setup()
+    problem.run_model()
+    return problem['fraction.fractions'].copy(), problem['deficit.dU'].copy()
+
+
+class TestJensenBatched(unittest.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.n_cases = 24
+        self.n_turbines = min(9, max_n_turbines - 1)
+        self.ordered = np.zeros((self.n_cases, max_n_turbines, 3))
+        self.ordered[:, :self.n_turbines, 0] = np.arange(self.n_turbines)
+        self.ordered[:, :self.n_turbines, 1:] = random.uniform(0.0, 3000.0, (self.n_turbines, 2))
+        self.angle = np.repeat(np.arange(0.0, 360.0, 30.0), self.n_cases // 12)
+        self.ct = random.uniform(0.05, 0.9, (self.n_cases, max_n_turbines))
+
+    def compare(self, number):
+        batched = wake(JensenWakeFraction, JensenWakeDeficit, number, self.ordered, self.angle, self.ct, self.n_turbines)
+        scalar = wake(ScalarJensenWakeFraction, ScalarJensenWakeDeficit, number, self.ordered, self.angle, self.ct,
+                      self.n_turbines)
+        np.testing.assert_array_equal(batched[0], scalar[0])
+        np.testing.assert_array_equal(batched[1], scalar[1])
+        return batched
+
+    def test_identical_to_scalar(self):
+        in_wake = 0
+        for number in range(self.n_turbines):
+            fractions, deficits = self.compare(number)
+            in_wake += np.count_nonzero(fractions)
+            self.assertEqual(np.count_nonzero(deficits), np.count_nonzero(fractions))
+        # Some pairs are waked, so the deficits are compared too.
+        self.assertTrue(in_wake > 0)
+
+    def test_padded_turbine(self):
+        fractions, deficits = self.compare(self.n_turbines)
+        self.assertFalse(np.any(fractions))
+        self.assertFalse(np.any(deficits))
+
+
+if __name__ == '__main__':
+    unittest.main()
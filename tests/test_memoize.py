@@ -0,0 +1,93 @@
+import unittest
+
+import support
+
+
+def setUpModule():
+    global Memoize, LRUCache
+    support.enter_example()
+    from WINDOW_openMDAO.AEP.FastAEP.farm_energy.wake_model_mean_new.memoize import Memoize, LRUCache
+
+
+def tearDownModule():
+    support.leave_example()
+
+
+def offset(x, y, scale=1.0):
+    return [(x[0] - y[0]) * scale, (x[1] - y[1]) * scale]
+
+
+class TestMemoize(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+        def counted(*args, **kwargs):
+            self.calls.append(args)
+            return offset(*args, **kwargs)
+        counted.__name__ = 'offset'
+        self.memoized = Memoize(counted)
+
+    def test_same_as_function(self):
+        arguments = [([0.0, 1.0], [2.0, 3.0]), ((0.0, 1.0), (2.0, 3.0)), ([0.0, 1.0], [2.0, 3.0])]
+        for args in arguments:
+            self.assertEqual(self.memoized(*args), offset(*args))
+            self.assertEqual(self.memoized(*args, scale=2.0), offset(*args, scale=2.0))
+        # Lists and tuples with the same items share a key, and keyword arguments are part of it.
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.memoized.stats()['hits'], 4)
+
+    def test_decimals(self):
+        memoized = Memoize(offset, decimals=3)
+        self.assertEqual(memoized([0.0, 1.0], [2.0, 3.0]), offset([0.0, 1.0], [2.0, 3.0]))
+        self.assertEqual(memoized([0.0001, 1.0], [2.0, 3.0]), offset([0.0, 1.0], [2.0, 3.0]))
+        self.assertEqual(memoized.stats()['hits'], 1)
+
+    def test_shared_cache(self):
+        # Functions sharing a cache keep apart results for the same arguments.
+        cache = LRUCache('shared')
+        first = Memoize(offset, cache=cache)
+        second = Memoize(lambda x, y: offset(y, x), cache=cache)
+        self.assertEqual(first([0.0, 1.0], [2.0, 3.0]), [-2.0, -2.0])
+        self.assertEqual(second([0.0, 1.0], [2.0, 3.0]), [2.0, 2.0])
+
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.cache = LRUCache('test', maxsize=4)
+        self.memoized = Memoize(self.square, cache=self.cache)
+
+    def square(self, x):
+        self.calls.append(x)
+        return x * x
+
+    def test_eviction(self):
+        for x in [1, 2, 1, 3]:
+            self.memoized(x)
+        # 1 was used again after the first generation change, 2 was not, so only 2 is dropped at the second one.
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 3, 'evictions': 1, 'size': 2})
+        self.assertEqual(self.memoized(1), 1)
+        self.assertEqual(self.memoized(2), 4)
+        self.assertEqual(self.calls, [1, 2, 3, 2])
+
+    def test_stats(self):
+        for x in [1, 1, 1]:
+            self.memoized(x)
+        self.assertEqual(self.cache.stats(), {'hits': 2, 'misses': 1, 'evictions': 0, 'size': 1})
+        self.assertEqual(LRUCache.counts()['test'], self.cache.stats())
+        self.cache.reset()
+        self.assertEqual(self.cache.stats()['size'], 0)
+        self.assertEqual(self.memoized(1), 1)
+        self.assertEqual(self.cache.stats()['misses'], 2)
+        self.cache.reset_stats()
+        self.assertEqual(self.cache.stats(), {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 1})
+
+    def test_bounded(self):
+        for x in range(100):
+            self.memoized(x)
+            self.assertTrue(self.cache.stats()['size'] < 4)
+        self.assertEqual(self.cache.stats()['evictions'], 98)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+import numpy as np
+
+import support
+
+
+def setUpModule():
+    global Problem, Group, IndepVarComp, max_n_turbines, layout, rotor_radius, WakeModel, VectorizedWakeModel, \
+        turbine_src_indices, TIWorkflow, MaxTI, JensenWakeFraction, JensenWakeDeficit, MergeRSS, Polynomial, \
+        DanishRecommendation, Frandsen
+    support.enter_example()
+    from openmdao.api import Problem, Group, IndepVarComp
+    from WINDOW_openMDAO.input_params import max_n_turbines, layout, rotor_radius
+    from WINDOW_openMDAO.src.api import WakeModel, VectorizedWakeModel, turbine_src_indices, TIWorkflow, MaxTI
+    from WINDOW_openMDAO.WakeModel.jensen import JensenWakeFraction, JensenWakeDeficit
+    from WINDOW_openMDAO.WakeModel.WakeMerge.RSS import MergeRSS
+    from WINDOW_openMDAO.Turbine.polynomial import Polynomial
+    from WINDOW_openMDAO.WakeModel.Turbulence.turbulence_wake_models import DanishRecommendation, Frandsen
+
+
+def tearDownModule():
+    support.leave_example()
+
+
+def turbulence_problem(turbulence_model, streaming, n_turbines=20, wake_group=None):
+    # Maximum TI of the first turbines of the example layout, for 12 directions at two wind speeds.
+    angle = np.tile(np.arange(0.0, 360.0, 30.0), 2)
+    n_cases = len(angle)
+    wake_group = wake_group or WakeModel
+    original = np.zeros((max_n_turbines, 3))
+    original[:, 0] = np.arange(max_n_turbines)
+    original[:n_turbines, 1:] = np.array(layout[:n_turbines]) - np.min(layout, axis=0) + 1000.0
+    model = Group()
+    indep = model.add_subsystem('indep', IndepVarComp(), promotes=['*'])
+    indep.add_output('original', val=original)
+    indep.add_output('angle', val=angle)
+    indep.add_output('freestream', val=np.repeat([8.0, 12.0], 12))
+    indep.add_output('n_turbines', val=n_turbines)
+    indep.add_output('turbine_radius', val=rotor_radius)
+    indep.add_output('TI_amb', val=np.full(n_cases, 0.11))
+    model.add_subsystem('wake', wake_group(n_cases, JensenWakeFraction, JensenWakeDeficit, MergeRSS, Polynomial),
+                        promotes_inputs=['original', 'angle', 'freestream', 'n_turbines', 'turbine_radius'])
+    model.add_subsystem('TI', TIWorkflow(n_cases, turbulence_model, streaming=streaming, chunk_size=5),
+                        promotes_inputs=['freestream', 'n_turbines', 'TI_amb'])
+    model.connect('turbine_radius', 'TI.radius')
+    model.connect('wake.ct', 'TI.ct')
+    if wake_group is VectorizedWakeModel:
+        # Same wiring as the workflows with the wake_group option.
+        model.connect('wake.ordered', 'TI.ordered')
+        model.connect('wake.permutation', 'TI.permutation')
+        for n in range(max_n_turbines):
+            if streaming:
+                model.connect('wake.closest', 'TI.closest{}'.format(n), src_indices=turbine_src_indices(n_cases, n),
+                              flat_src_indices=True)
+                model.connect('wake.waked', 'TI.waked{}'.format(n), src_indices=turbine_src_indices(n_cases, n),
+                              flat_src_indices=True)
+            else:
+                model.connect('wake.dU', 'TI.dU_matrix.deficits{}'.format(n),
+                              src_indices=turbine_src_indices(n_cases, n, max_n_turbines), flat_src_indices=True)
+    else:
+        model.connect('wake.linear_solve.order_layout.ordered', 'TI.ordered')
+        model.connect('wake.linear_solve.order_layout.permutation', 'TI.permutation')
+        for n in range(max_n_turbines):
+            if streaming:
+                model.connect('wake.linear_solve.deficits{}.closest'.format(n), 'TI.closest{}'.format(n))
+                model.connect('wake.linear_solve.deficits{}.waked'.format(n), 'TI.waked{}'.format(n))
+            else:
+                model.connect('wake.linear_solve.deficits{}.dU'.format(n), 'TI.dU_matrix.deficits{}'.format(n))
+    if not streaming:
+        model.add_subsystem('find_max_TI', MaxTI(n_cases))
+        model.connect('TI.TI_eff', 'find_max_TI.all_TI')
+    problem = Problem(model)
+    problem.setup()
+    problem.run_model()
+    return problem
+
+
+class TestStreamingMaxTI(unittest.TestCase):
+    def test_same_as_recorded(self):
+        for turbulence_model in [DanishRecommendation, Frandsen]:
+            recorded = turbulence_problem(turbulence_model, False)
+            streamed = turbulence_problem(turbulence_model, True)
+            np.testing.assert_array_equal(streamed['TI.max_TI'], recorded['find_max_TI.max_TI'])
+            # Some turbines are waked, so that the maximum is not only the ambient turbulence.
+            self.assertTrue(np.any(recorded['find_max_TI.max_TI'] > 0.11))
+            self.assertTrue(np.any(recorded['TI.TI_eff'] == 0.11))
+
+    def test_vectorized_wake_model(self):
+        recorded = turbulence_problem(DanishRecommendation, False)
+        for streaming in [False, True]:
+            vectorized = turbulence_problem(DanishRecommendation, streaming, wake_group=VectorizedWakeModel)
+            max_TI = vectorized['TI.max_TI'] if streaming else vectorized['find_max_TI.max_TI']
+            np.testing.assert_allclose(max_TI, recorded['find_max_TI.max_TI'], rtol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
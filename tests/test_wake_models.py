@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+import support
+
+
+def setUpModule():
+    global Problem, Group, IndepVarComp, max_n_turbines, layout, rotor_radius, WakeModel, VectorizedWakeModel, \
+        JensenWakeFraction, JensenWakeDeficit, MergeRSS, Polynomial
+    support.enter_example()
+    from openmdao.api import Problem, Group, IndepVarComp
+    from WINDOW_openMDAO.input_params import max_n_turbines, layout, rotor_radius
+    from WINDOW_openMDAO.src.api import WakeModel, VectorizedWakeModel
+    from WINDOW_openMDAO.WakeModel.jensen import JensenWakeFraction, JensenWakeDeficit
+    from WINDOW_openMDAO.WakeModel.WakeMerge.RSS import MergeRSS
+    from WINDOW_openMDAO.Turbine.polynomial import Polynomial
+
+
+def tearDownModule():
+    support.leave_example()
+
+
+def wake_problem(wake_group, n_turbines=20):
+    # Wake group on the first turbines of the example layout, for 12 directions at two wind speeds.
+    angle = np.tile(np.arange(0.0, 360.0, 30.0), 2)
+    freestream = np.repeat([8.0, 12.0], 12)
+    original = np.zeros((max_n_turbines, 3))
+    original[:, 0] = np.arange(max_n_turbines)
+    original[:n_turbines, 1:] = np.array(layout[:n_turbines]) - np.min(layout, axis=0) + 1000.0
+    model = Group()
+    indep = model.add_subsystem('indep', IndepVarComp(), promotes=['*'])
+    indep.add_output('original', val=original)
+    indep.add_output('angle', val=angle)
+    indep.add_output('freestream', val=freestream)
+    indep.add_output('n_turbines', val=n_turbines)
+    indep.add_output('turbine_radius', val=rotor_radius)
+    model.add_subsystem('wake', wake_group(len(angle), JensenWakeFraction, JensenWakeDeficit, MergeRSS, Polynomial),
+                        promotes_inputs=['original', 'angle', 'freestream', 'n_turbines', 'turbine_radius'])
+    problem = Problem(model)
+    problem.setup()
+    problem.run_model()
+    return problem
+
+
+class TestTurbineChain(unittest.TestCase):
+    def setUp(self):
+        self.problem = wake_problem(WakeModel)
+        self.chain = self.problem.model.wake.linear_solve
+
+    def test_rerun(self):
+        powers = self.problem['wake.p'].copy()
+        self.problem.run_model()
+        np.testing.assert_array_equal(self.problem['wake.p'], powers)
+
+    def test_out_of_order(self):
+        # The chain is only consistent when the whole LinearSolveWake runs, from turbine0.
+        self.assertRaises(RuntimeError, self.chain.turbine5.run_solve_nonlinear)
+        self.assertRaises(RuntimeError, self.chain.deficits3.run_solve_nonlinear)
+
+
+class TestVectorizedWakeModel(unittest.TestCase):
+    def test_same_as_linear_solve(self):
+        linear = wake_problem(WakeModel, max_n_turbines)
+        vectorized = wake_problem(VectorizedWakeModel, max_n_turbines)
+        chain = 'wake.linear_solve.'
+        for name in ['p', 'ct']:
+            np.testing.assert_allclose(vectorized['wake.' + name], linear['wake.' + name], rtol=1e-12, atol=1e-9)
+        for name in ['ordered', 'permutation']:
+            np.testing.assert_array_equal(vectorized['wake.' + name], linear[chain + 'order_layout.' + name])
+        for n in range(max_n_turbines):
+            np.testing.assert_allclose(vectorized['wake.dU'][:, n], linear[chain + 'deficits{}.dU'.format(n)], rtol=1e-12,
+                                       atol=1e-15)
+            for name in ['closest', 'waked']:
+                np.testing.assert_array_equal(vectorized['wake.' + name][:, n], linear[chain + 'deficits{}.{}'.format(n, name)])
+        self.assertTrue(np.any(vectorized['wake.waked']))
+
+
+if __name__ == '__main__':
+    unittest.main()